@@ -20,6 +20,8 @@ from backend.routes.subtasks import subtask_bp
 from backend.routes.reminders import reminder_bp
 from backend.routes.assistant import assistant_bp
 from backend.routes.analytics import analytics_bp
+from backend.routes.events import events_bp
+from backend.routes.jobs import jobs_bp
 # Get the absolute path to the project root
 BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 
@@ -43,6 +45,8 @@ app.register_blueprint(subtask_bp, url_prefix='/api')
 app.register_blueprint(reminder_bp, url_prefix='/api')
 app.register_blueprint(assistant_bp, url_prefix='/api')
 app.register_blueprint(analytics_bp, url_prefix='/api')
+app.register_blueprint(events_bp, url_prefix='/api')
+app.register_blueprint(jobs_bp, url_prefix='/api')
 @app.route('/')
 def index():
     return render_template('tasks/dashboard.html')
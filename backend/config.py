@@ -10,11 +10,179 @@ class Config:
     
     # --- MongoDB Settings ---
     MONGO_URI = os.environ.get('MONGO_URI') or 'mongodb://localhost:27017/smart_task_manager'
+
+    # --- MongoDB Connection Pool Settings ---
+    # One client (and therefore one pool) is shared by every model and service in a process.
+    MONGO_MAX_POOL_SIZE = int(os.environ.get('MONGO_MAX_POOL_SIZE', 50))
+    MONGO_MIN_POOL_SIZE = int(os.environ.get('MONGO_MIN_POOL_SIZE', 0))
+    MONGO_MAX_IDLE_TIME_MS = int(os.environ.get('MONGO_MAX_IDLE_TIME_MS', 300000))
+    MONGO_CONNECT_TIMEOUT_MS = int(os.environ.get('MONGO_CONNECT_TIMEOUT_MS', 5000))
+    MONGO_SOCKET_TIMEOUT_MS = int(os.environ.get('MONGO_SOCKET_TIMEOUT_MS', 30000))
+    MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('MONGO_SERVER_SELECTION_TIMEOUT_MS', 5000))
+    MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.environ.get('MONGO_WAIT_QUEUE_TIMEOUT_MS', 10000))
+    
+    # --- Task List Pagination ---
+    TASKS_PAGE_SIZE_DEFAULT = int(os.environ.get('TASKS_PAGE_SIZE_DEFAULT', 50))
+    TASKS_PAGE_SIZE_MAX = int(os.environ.get('TASKS_PAGE_SIZE_MAX', 200))
+    
+    # --- Task Export / Import ---
+    # Tasks per Mongo fetch during export, and documents per insert_many during import
+    TASK_EXPORT_BATCH_SIZE = int(os.environ.get('TASK_EXPORT_BATCH_SIZE', 500))
+    TASK_IMPORT_BATCH_SIZE = int(os.environ.get('TASK_IMPORT_BATCH_SIZE', 1000))
+    TASK_IMPORT_BATCH_SIZE_MAX = int(os.environ.get('TASK_IMPORT_BATCH_SIZE_MAX', 10000))
+    # Largest single exported task (with its subtasks and reminders) an import buffers before rejecting
+    # the body, so one malformed element cannot pull the rest of a large upload into memory.
+    # Measured in decoded characters, which never exceed the UTF-8 byte count
+    TASK_IMPORT_MAX_ITEM_BYTES = int(os.environ.get('TASK_IMPORT_MAX_ITEM_BYTES', 16 * 1024 * 1024))
+    
+    # --- Bulk Task Mutations ---
+    TASK_BULK_MAX_OPERATIONS = int(os.environ.get('TASK_BULK_MAX_OPERATIONS', 1000))
+    
+    # --- Reminder Scheduler ---
+    REMINDER_CHECK_INTERVAL_SECONDS = int(os.environ.get('REMINDER_CHECK_INTERVAL_SECONDS', 60))
+    REMINDER_TRIGGER_BATCH_SIZE = int(os.environ.get('REMINDER_TRIGGER_BATCH_SIZE', 1000))
+    # Each trigger pass stops after this long so it always finishes before the next interval
+    REMINDER_TRIGGER_TIME_BUDGET_SECONDS = float(os.environ.get('REMINDER_TRIGGER_TIME_BUDGET_SECONDS', 45))
+    # Reminders are split into user-hash partitions; each scheduler instance leases a share of them.
+    # Changing this requires re-running: python migrate.py run reminder_partitions --restart
+    REMINDER_PARTITIONS = int(os.environ.get('REMINDER_PARTITIONS', 16))
+    SCHEDULER_LEASE_TTL_SECONDS = int(os.environ.get('SCHEDULER_LEASE_TTL_SECONDS', 30))
+    SCHEDULER_LEASE_RENEW_SECONDS = int(os.environ.get('SCHEDULER_LEASE_RENEW_SECONDS', 10))
+    # In-memory timer engine: fires reminders at their trigger time instead of on the next poll
+    REMINDER_ENGINE_ENABLED = os.environ.get('REMINDER_ENGINE_ENABLED', 'true').lower() == 'true'
+    REMINDER_ENGINE_HORIZON_SECONDS = int(os.environ.get('REMINDER_ENGINE_HORIZON_SECONDS', 600))
+    REMINDER_ENGINE_PRECISION_MS = int(os.environ.get('REMINDER_ENGINE_PRECISION_MS', 250))
+    # Fallback poll, only used when change streams are unavailable (standalone mongod)
+    REMINDER_ENGINE_SYNC_SECONDS = int(os.environ.get('REMINDER_ENGINE_SYNC_SECONDS', 60))
+    # With the engine enabled the interval sweep is only a catch-up for backlogs (e.g. after downtime),
+    # so it runs at this interval instead of REMINDER_CHECK_INTERVAL_SECONDS (0 disables it)
+    REMINDER_ENGINE_CATCHUP_INTERVAL_SECONDS = int(os.environ.get('REMINDER_ENGINE_CATCHUP_INTERVAL_SECONDS', 900))
+    # POST /api/reminders/bulk: maximum number of tasks one rule may target
+    REMINDER_BULK_MAX_TASKS = int(os.environ.get('REMINDER_BULK_MAX_TASKS', 1000))
+    
+    # --- Reminder Retention ---
+    # Triggered/Dismissed reminders older than these windows (by trigger time) move to reminders_archive
+    REMINDER_RETENTION_TRIGGERED_DAYS = int(os.environ.get('REMINDER_RETENTION_TRIGGERED_DAYS', 30))
+    REMINDER_RETENTION_DISMISSED_DAYS = int(os.environ.get('REMINDER_RETENTION_DISMISSED_DAYS', 7))
+    # Archived reminders are removed by a TTL index this long after archival (0 keeps them forever).
+    # Changing it requires dropping the reminders_archive.archived index and running manage_indexes.py create
+    REMINDER_ARCHIVE_TTL_DAYS = int(os.environ.get('REMINDER_ARCHIVE_TTL_DAYS', 365))
+    REMINDER_ARCHIVE_BATCH_SIZE = int(os.environ.get('REMINDER_ARCHIVE_BATCH_SIZE', 1000))
+    REMINDER_ARCHIVE_INTERVAL_SECONDS = int(os.environ.get('REMINDER_ARCHIVE_INTERVAL_SECONDS', 3600))
+    # GET /api/reminders?include_archived=true returns at most this many (most recent) reminders
+    REMINDER_LIST_ARCHIVED_LIMIT = int(os.environ.get('REMINDER_LIST_ARCHIVED_LIMIT', 500))
+    
+    # --- Server-Sent Events (GET /api/events) ---
+    # Events are kept in a capped collection; the oldest fall out once it reaches this size
+    EVENTS_CAPPED_BYTES = int(os.environ.get('EVENTS_CAPPED_BYTES', 64 * 1024 * 1024))
+    # Each open stream holds a request thread: run gunicorn with gunicorn.conf.py (gthread workers
+    # with EVENTS_MAX_STREAMS_PER_WORKER + 32 threads); sync workers would hold a process per stream
+    EVENTS_MAX_STREAMS_PER_WORKER = int(os.environ.get('EVENTS_MAX_STREAMS_PER_WORKER', 200))
+    EVENTS_HEARTBEAT_SECONDS = int(os.environ.get('EVENTS_HEARTBEAT_SECONDS', 15))
+    EVENTS_RETRY_MS = int(os.environ.get('EVENTS_RETRY_MS', 5000))
+    # Maximum number of missed events replayed on reconnect (Last-Event-ID)
+    EVENTS_REPLAY_LIMIT = int(os.environ.get('EVENTS_REPLAY_LIMIT', 500))
+    # Events buffered per stream; a client that falls further behind is disconnected and resumes
+    EVENTS_STREAM_QUEUE_SIZE = int(os.environ.get('EVENTS_STREAM_QUEUE_SIZE', 256))
+    EVENTS_TAIL_AWAIT_MS = int(os.environ.get('EVENTS_TAIL_AWAIT_MS', 1000))
+    # Event ids are ObjectIds from the publishing process, ordered only by second across processes:
+    # the dispatcher and Last-Event-ID replay look back this many seconds (also covers clock skew
+    # between hosts) and skip events already delivered
+    EVENTS_REORDER_SECONDS = int(os.environ.get('EVENTS_REORDER_SECONDS', 30))
+    # Lifetime of the stream-scoped token EventSource passes in the URL (it cannot send headers)
+    EVENTS_TOKEN_TTL_SECONDS = int(os.environ.get('EVENTS_TOKEN_TTL_SECONDS', 60))
+
+    # --- Alerts ---
+    ALERTS_BUCKET_LIMIT = int(os.environ.get('ALERTS_BUCKET_LIMIT', 50))
+    ALERTS_BUCKET_LIMIT_MAX = int(os.environ.get('ALERTS_BUCKET_LIMIT_MAX', 500))
+    
+    # --- Analytics ---
+    ANALYTICS_TREND_DAYS_DEFAULT = int(os.environ.get('ANALYTICS_TREND_DAYS_DEFAULT', 7))
+    ANALYTICS_ACTIVITY_DAYS_DEFAULT = int(os.environ.get('ANALYTICS_ACTIVITY_DAYS_DEFAULT', 30))
+    ANALYTICS_MAX_WINDOW_DAYS = int(os.environ.get('ANALYTICS_MAX_WINDOW_DAYS', 365))
+    ANALYTICS_CACHE_MAX_ENTRIES = int(os.environ.get('ANALYTICS_CACHE_MAX_ENTRIES', 4096))
+    ANALYTICS_CACHE_TTL_SECONDS = int(os.environ.get('ANALYTICS_CACHE_TTL_SECONDS', 300))
+    
+    # --- AI Response Cache ---
+    # Summaries and subtask generations keyed by a hash of (normalized input, prompt template, model)
+    AI_CACHE_ENABLED = os.environ.get('AI_CACHE_ENABLED', 'true').lower() == 'true'
+    AI_CACHE_MAX_ENTRIES = int(os.environ.get('AI_CACHE_MAX_ENTRIES', 2048))
+    AI_CACHE_MEMORY_TTL_SECONDS = int(os.environ.get('AI_CACHE_MEMORY_TTL_SECONDS', 3600))
+    AI_CACHE_TTL_SECONDS = int(os.environ.get('AI_CACHE_TTL_SECONDS', 7 * 86400))
+    # How long an identical concurrent request waits for the in-flight call before calling upstream itself
+    AI_CACHE_FLIGHT_WAIT_SECONDS = float(os.environ.get('AI_CACHE_FLIGHT_WAIT_SECONDS', 30))
+    
+    # --- AI Batch Summarization (POST /api/ai/summarize/batch) ---
+    AI_BATCH_MAX_ITEMS = int(os.environ.get('AI_BATCH_MAX_ITEMS', 100))
+    # Concurrent upstream calls per worker, shared by all batch requests
+    AI_BATCH_CONCURRENCY = int(os.environ.get('AI_BATCH_CONCURRENCY', 16))
+    
+    # --- Priority Ranking (POST /api/ai/prioritize) ---
+    # Tasks are scored locally; only the top K (with truncated fields) go to the AI for justification
+    PRIORITY_TOP_K = int(os.environ.get('PRIORITY_TOP_K', 15))
+    PRIORITY_TITLE_MAX_CHARS = int(os.environ.get('PRIORITY_TITLE_MAX_CHARS', 80))
+    PRIORITY_DESCRIPTION_MAX_CHARS = int(os.environ.get('PRIORITY_DESCRIPTION_MAX_CHARS', 160))
+    # The local ranking is returned if the AI has not answered within this many seconds
+    PRIORITY_AI_TIMEOUT_SECONDS = float(os.environ.get('PRIORITY_AI_TIMEOUT_SECONDS', 8))
+    # Urgency halves every this many hours before the due date (overdue tasks score above 1)
+    PRIORITY_URGENCY_HALF_LIFE_HOURS = float(os.environ.get('PRIORITY_URGENCY_HALF_LIFE_HOURS', 48))
+    # Score weights: due-date urgency, priority level, task age, subtask progress
+    PRIORITY_WEIGHT_URGENCY = float(os.environ.get('PRIORITY_WEIGHT_URGENCY', 0.45))
+    PRIORITY_WEIGHT_PRIORITY = float(os.environ.get('PRIORITY_WEIGHT_PRIORITY', 0.30))
+    PRIORITY_WEIGHT_AGE = float(os.environ.get('PRIORITY_WEIGHT_AGE', 0.10))
+    PRIORITY_WEIGHT_PROGRESS = float(os.environ.get('PRIORITY_WEIGHT_PROGRESS', 0.15))
+    
+    # --- Background Jobs (worker.py) ---
+    JOB_WORKER_THREADS = int(os.environ.get('JOB_WORKER_THREADS', 4))
+    JOB_POLL_INTERVAL_SECONDS = float(os.environ.get('JOB_POLL_INTERVAL_SECONDS', 1.0))
+    # A running job's lease is renewed while it runs; a crashed worker's jobs are picked up after it expires
+    JOB_LEASE_SECONDS = int(os.environ.get('JOB_LEASE_SECONDS', 120))
+    JOB_MAX_ATTEMPTS = int(os.environ.get('JOB_MAX_ATTEMPTS', 5))
+    # Retry n waits about JOB_RETRY_BASE_SECONDS * 2^(n-1) (with jitter), capped at JOB_RETRY_MAX_SECONDS
+    JOB_RETRY_BASE_SECONDS = float(os.environ.get('JOB_RETRY_BASE_SECONDS', 2))
+    JOB_RETRY_MAX_SECONDS = float(os.environ.get('JOB_RETRY_MAX_SECONDS', 300))
+    # Finished jobs are removed by a TTL index this long after they finish
+    JOB_RETENTION_SECONDS = int(os.environ.get('JOB_RETENTION_SECONDS', 7 * 86400))
+    
+    # --- AI Client Resilience (gemini/cohere calls go through services/ai_client.py) ---
+    # Client-side token bucket: sustained calls per second per worker, plus burst allowance
+    AI_RATE_LIMIT_PER_SECOND = float(os.environ.get('AI_RATE_LIMIT_PER_SECOND', 10))
+    AI_RATE_LIMIT_BURST = int(os.environ.get('AI_RATE_LIMIT_BURST', 20))
+    # How long a call may wait for a token before failing fast
+    AI_RATE_LIMIT_WAIT_SECONDS = float(os.environ.get('AI_RATE_LIMIT_WAIT_SECONDS', 5))
+    # Retries on 429 / 5xx / timeouts; retry n waits up to AI_RETRY_BASE_SECONDS * 2^n (full jitter)
+    AI_MAX_RETRIES = int(os.environ.get('AI_MAX_RETRIES', 3))
+    AI_RETRY_BASE_SECONDS = float(os.environ.get('AI_RETRY_BASE_SECONDS', 0.5))
+    AI_RETRY_MAX_SECONDS = float(os.environ.get('AI_RETRY_MAX_SECONDS', 8))
+    # Per-attempt HTTP timeout, and the overall deadline for a call including its retries
+    AI_CALL_TIMEOUT_SECONDS = float(os.environ.get('AI_CALL_TIMEOUT_SECONDS', 30))
+    AI_CALL_DEADLINE_SECONDS = float(os.environ.get('AI_CALL_DEADLINE_SECONDS', 60))
+    # Consecutive upstream failures that open the circuit, and how long it stays open before a probe
+    AI_BREAKER_FAILURE_THRESHOLD = int(os.environ.get('AI_BREAKER_FAILURE_THRESHOLD', 5))
+    AI_BREAKER_RESET_SECONDS = float(os.environ.get('AI_BREAKER_RESET_SECONDS', 30))
     
     # --- JWT Settings ---
     JWT_SECRET_KEY = os.environ.get('JWT_SECRET_KEY') or 'jwt-secret-key'
     JWT_ACCESS_TOKEN_EXPIRES = 86400  # 24 hours
     
-    # --- AI Settings (Using Gemini) ---
-    # The key is primarily used in ai_service.py but listed here for completeness/config access
-    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
\ No newline at end of file
+    # --- AI Settings ---
+    # Provider behind every AI endpoint (services/ai_providers.py): gemini, cohere or local
+    AI_PROVIDER = os.environ.get('AI_PROVIDER', 'gemini').lower()
+    # Overrides the provider's default model (gemini-2.5-flash / command-r / local-deterministic)
+    AI_MODEL = os.environ.get('AI_MODEL', '')
+    GEMINI_API_KEY = os.environ.get('GEMINI_API_KEY')
+    # Point the client at another endpoint (e.g. a local fake server for load tests); empty uses Google's
+    GEMINI_BASE_URL = os.environ.get('GEMINI_BASE_URL', '')
+    COHERE_API_KEY = os.environ.get('COHERE_API_KEY')
+    COHERE_BASE_URL = os.environ.get('COHERE_BASE_URL', '')
+    
+    # --- Local AI Provider (AI_PROVIDER=local, offline load tests) ---
+    # Responses and timings are deterministic per (seed, prompt); change the seed for another sample
+    AI_LOCAL_SEED = int(os.environ.get('AI_LOCAL_SEED', 0))
+    # Time to first token: log-normal with this median (ms) and sigma
+    AI_LOCAL_LATENCY_MS = float(os.environ.get('AI_LOCAL_LATENCY_MS', 400))
+    AI_LOCAL_LATENCY_SIGMA = float(os.environ.get('AI_LOCAL_LATENCY_SIGMA', 0.3))
+    # Response length in tokens: normal(mean, stddev), and the delay between streamed tokens
+    AI_LOCAL_TOKENS_MEAN = int(os.environ.get('AI_LOCAL_TOKENS_MEAN', 60))
+    AI_LOCAL_TOKENS_STDDEV = int(os.environ.get('AI_LOCAL_TOKENS_STDDEV', 20))
+    AI_LOCAL_TOKEN_MS = float(os.environ.get('AI_LOCAL_TOKEN_MS', 15))
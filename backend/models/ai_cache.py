@@ -0,0 +1,35 @@
+# backend/models/ai_cache.py
+from datetime import datetime, timedelta
+from .db import get_db
+
+# Shared (cross-worker) tier of the AI response cache: {_id: key, kind, model, value, compute_ms,
+# created_at, expires_at}. A TTL index on expires_at removes entries once they expire.
+
+class AICacheEntry:
+    @staticmethod
+    def collection():
+        return get_db().ai_cache
+
+    @staticmethod
+    def get(key):
+        """Returns the unexpired entry for key, or None (the TTL monitor only runs once a minute)."""
+        return AICacheEntry.collection().find_one(
+            {'_id': key, 'expires_at': {'$gt': datetime.now()}},
+            {'value': 1, 'compute_ms': 1}
+        )
+
+    @staticmethod
+    def put(key, kind, model, value, compute_ms, ttl_seconds):
+        now = datetime.now()
+        return AICacheEntry.collection().update_one(
+            {'_id': key},
+            {'$set': {
+                'kind': kind,
+                'model': model,
+                'value': value,
+                'compute_ms': compute_ms,
+                'created_at': now,
+                'expires_at': now + timedelta(seconds=ttl_seconds)
+            }},
+            upsert=True
+        )
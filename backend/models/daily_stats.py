@@ -0,0 +1,113 @@
+# backend/models/daily_stats.py
+from datetime import datetime, timedelta
+from pymongo import UpdateOne
+from .db import get_db
+from .normalize import STATUS_COMPLETED
+
+# task_daily_stats holds one document per (user_id, day):
+#   completed - tasks whose completion (status Completed, dated by updated_at) falls on that day
+#   active    - tasks whose latest activity (updated_at, else created_at) falls on that day
+# These mirror the raw-task definitions used by the completion trend and weekday activity charts,
+# so the rollup is kept exact by moving a task's contribution whenever it changes.
+
+DAY_FORMAT = '%Y-%m-%d'
+
+
+def day_key(dt):
+    return dt.strftime(DAY_FORMAT)
+
+
+def task_contributions(task, sign=1):
+    """Returns [(day, {field: delta})] describing what one task document contributes to the rollup."""
+    if not task:
+        return []
+    contributions = []
+    activity_dt = task.get('updated_at') or task.get('created_at')
+    if isinstance(activity_dt, datetime):
+        contributions.append((day_key(activity_dt), {'active': sign}))
+    if task.get('status') == STATUS_COMPLETED and isinstance(task.get('updated_at'), datetime):
+        contributions.append((day_key(task['updated_at']), {'completed': sign}))
+    return contributions
+
+
+class DailyStats:
+    @staticmethod
+    def collection():
+        return get_db().task_daily_stats
+
+    @staticmethod
+    def apply_changes(user_id, before=None, after=None):
+        """Moves one task's contribution from its previous state (`before`) to its new state (`after`)."""
+        DailyStats.apply_contributions(user_id, task_contributions(before, -1) + task_contributions(after, 1))
+
+    @staticmethod
+    def apply_contributions(user_id, contributions):
+        """Applies [(day, {field: delta})] with one bulk_write of atomic upserting $inc updates."""
+        merged = {}
+        for day, deltas in contributions:
+            bucket = merged.setdefault(day, {})
+            for field, delta in deltas.items():
+                bucket[field] = bucket.get(field, 0) + delta
+        requests = [
+            UpdateOne({'user_id': user_id, 'day': day}, {'$inc': deltas}, upsert=True)
+            for day, deltas in merged.items()
+            if any(deltas.values())
+        ]
+        if requests:
+            DailyStats.collection().bulk_write(requests, ordered=False)
+
+    @staticmethod
+    def find_range(user_id, start_day, end_day):
+        """Returns the rollup rows for user_id with start_day <= day <= end_day (O(days))."""
+        return list(DailyStats.collection().find(
+            {'user_id': user_id, 'day': {'$gte': day_key(start_day), '$lte': day_key(end_day)}},
+            {'_id': 0, 'day': 1, 'completed': 1, 'active': 1}
+        ))
+
+    @staticmethod
+    def rebuild(user_id=None):
+        """
+        Recomputes the rollup from the raw tasks (backfill / repair) and returns the number of rows written.
+        Restricting to one user_id rebuilds only that user's rows.
+        """
+        db = get_db()
+        # $merge needs the unique (user_id, day) index; create_index is a no-op when it exists
+        DailyStats.collection().create_index([('user_id', 1), ('day', 1)], name='user_day_unique', unique=True)
+        task_filter = {'user_id': user_id} if user_id else {}
+        DailyStats.collection().delete_many(task_filter)
+
+        day_of = lambda expr: {'$dateToString': {'format': DAY_FORMAT, 'date': expr}}
+        pipeline = [
+            {'$match': task_filter},
+            {'$project': {
+                'user_id': 1,
+                'events': {'$concatArrays': [
+                    {'$cond': [
+                        {'$ne': [{'$ifNull': ['$updated_at', '$created_at']}, None]},
+                        [{'day': day_of({'$ifNull': ['$updated_at', '$created_at']}), 'active': 1, 'completed': 0}],
+                        []
+                    ]},
+                    {'$cond': [
+                        {'$and': [{'$eq': ['$status', STATUS_COMPLETED]}, {'$ne': [{'$ifNull': ['$updated_at', None]}, None]}]},
+                        [{'day': day_of('$updated_at'), 'active': 0, 'completed': 1}],
+                        []
+                    ]},
+                ]}
+            }},
+            {'$unwind': '$events'},
+            {'$group': {
+                '_id': {'user_id': '$user_id', 'day': '$events.day'},
+                'active': {'$sum': '$events.active'},
+                'completed': {'$sum': '$events.completed'}
+            }},
+            {'$project': {'_id': 0, 'user_id': '$_id.user_id', 'day': '$_id.day', 'active': 1, 'completed': 1}},
+            {'$merge': {'into': 'task_daily_stats', 'on': ['user_id', 'day'], 'whenMatched': 'replace', 'whenNotMatched': 'insert'}}
+        ]
+        db.tasks.aggregate(pipeline)
+        return DailyStats.collection().count_documents(task_filter)
+
+
+def window_days(days, now=None):
+    """Returns (start_day, end_day) datetimes covering the last `days` days including today."""
+    today = (now or datetime.now()).replace(hour=0, minute=0, second=0, microsecond=0)
+    return today - timedelta(days=days - 1), today
@@ -0,0 +1,26 @@
+# backend/models/data_version.py
+from pymongo import ReturnDocument
+from .db import get_db
+from .normalize import normalize_user_id
+
+# One counter per user, bumped by every task/subtask write.
+# Caches key their entries on this version, so a write in any worker invalidates them everywhere.
+
+class DataVersion:
+    @staticmethod
+    def get(user_id):
+        doc = get_db().data_versions.find_one({'_id': normalize_user_id(user_id)}, {'v': 1})
+        return doc['v'] if doc else 0
+
+    @staticmethod
+    def bump(user_id):
+        """Atomically increments and returns the user's data version."""
+        if user_id is None:
+            return None
+        doc = get_db().data_versions.find_one_and_update(
+            {'_id': normalize_user_id(user_id)},
+            {'$inc': {'v': 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return doc['v']
@@ -0,0 +1,45 @@
+import os
+import threading
+from pymongo import MongoClient
+from ..config import Config
+
+# Process-wide connection registry.
+# The client is created lazily on first use and re-created if the PID changes,
+# so gunicorn workers never inherit a client (or its monitor threads) from the master.
+_lock = threading.Lock()
+_client = None
+_client_pid = None
+
+def get_client():
+    """Returns the shared MongoClient for the current process, creating it on first use."""
+    global _client, _client_pid
+    pid = os.getpid()
+    if _client is None or _client_pid != pid:
+        with _lock:
+            if _client is None or _client_pid != pid:
+                _client = MongoClient(
+                    Config.MONGO_URI,
+                    maxPoolSize=Config.MONGO_MAX_POOL_SIZE,
+                    minPoolSize=Config.MONGO_MIN_POOL_SIZE,
+                    maxIdleTimeMS=Config.MONGO_MAX_IDLE_TIME_MS,
+                    connectTimeoutMS=Config.MONGO_CONNECT_TIMEOUT_MS,
+                    socketTimeoutMS=Config.MONGO_SOCKET_TIMEOUT_MS,
+                    serverSelectionTimeoutMS=Config.MONGO_SERVER_SELECTION_TIMEOUT_MS,
+                    waitQueueTimeoutMS=Config.MONGO_WAIT_QUEUE_TIMEOUT_MS,
+                    connect=False,
+                )
+                _client_pid = pid
+    return _client
+
+def get_db():
+    """Returns the default database of the shared client."""
+    return get_client().get_default_database()
+
+def close_client():
+    """Closes the shared client (e.g. on worker shutdown). The next get_db() call reconnects."""
+    global _client, _client_pid
+    with _lock:
+        if _client is not None and _client_pid == os.getpid():
+            _client.close()
+        _client = None
+        _client_pid = None
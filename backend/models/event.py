@@ -0,0 +1,66 @@
+# backend/models/event.py
+from datetime import datetime, timedelta, timezone
+from bson.objectid import ObjectId
+from pymongo import CursorType
+from pymongo.errors import CollectionInvalid
+from .db import get_db
+from ..config import Config
+
+# Events live in a capped collection so every web worker can follow new ones with a single
+# tailable cursor (works on a standalone mongod too). An event's ObjectId _id, generated by the
+# publishing process, is its SSE event id and the resume point for Last-Event-ID, so publishing is
+# a single insert. ObjectIds only order by second across processes (and by each host's clock), so
+# readers look back EVENTS_REORDER_SECONDS from a resume point rather than treating it as a
+# high-water mark, and skip the events they have already sent.
+
+
+def oid_before(event_id, seconds):
+    """The smallest ObjectId generated `seconds` before event_id (or before now when event_id is None)."""
+    at = event_id.generation_time if event_id is not None else datetime.now(timezone.utc)
+    return ObjectId.from_datetime(at - timedelta(seconds=seconds))
+
+
+class Event:
+    @staticmethod
+    def collection():
+        return get_db().events
+
+    @staticmethod
+    def ensure_collection(db=None):
+        """Creates the capped events collection if it does not exist yet (tailable cursors need a capped collection)."""
+        db = db if db is not None else get_db()
+        try:
+            db.create_collection('events', capped=True, size=Config.EVENTS_CAPPED_BYTES)
+        except CollectionInvalid:
+            pass  # Already exists
+
+    @staticmethod
+    def publish_many(events):
+        """Publishes [(user_id, event_type, data)] with one insert_many (the driver assigns the ObjectIds)."""
+        if not events:
+            return
+        now = datetime.now()
+        Event.collection().insert_many([
+            {'user_id': str(user_id), 'type': event_type, 'data': data, 'created_at': now}
+            for user_id, event_type, data in events
+        ])
+
+    @staticmethod
+    def find_since(user_id, after_id, limit):
+        """Events for user_id with _id > after_id, in _id order (Last-Event-ID replay)."""
+        return list(Event.collection().find(
+            {'user_id': str(user_id), '_id': {'$gt': after_id}}
+        ).sort('_id', 1).limit(limit))
+
+    @staticmethod
+    def ids_since(after_id):
+        """_ids of every stored event with _id > after_id."""
+        return [doc['_id'] for doc in Event.collection().find({'_id': {'$gt': after_id}}, {'_id': 1})]
+
+    @staticmethod
+    def tail(after_id):
+        """Tailable, awaiting cursor over events with _id > after_id, in insertion (not _id) order."""
+        return Event.collection().find(
+            {'_id': {'$gt': after_id}},
+            cursor_type=CursorType.TAILABLE_AWAIT
+        ).max_await_time_ms(Config.EVENTS_TAIL_AWAIT_MS)
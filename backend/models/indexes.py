@@ -0,0 +1,217 @@
+# backend/models/indexes.py
+from datetime import datetime
+from pymongo import ASCENDING, DESCENDING
+from pymongo.errors import OperationFailure
+from .db import get_db
+from .event import Event
+from ..config import Config
+
+# --- Index Registry ---
+# Every hot query in the models/services must be covered by one of these indexes.
+# Keys are listed in equality -> sort -> range order.
+INDEXES = {
+    'tasks': [
+        # Task.find_by_user_id and the paginated task list
+        {'name': 'user_created', 'keys': [('user_id', ASCENDING), ('created_at', ASCENDING), ('_id', ASCENDING)]},
+        # Paginated task list sorted by due date
+        {'name': 'user_due', 'keys': [('user_id', ASCENDING), ('due_date', ASCENDING), ('_id', ASCENDING)]},
+        # Analytics: status counts and completion trend ($match on user_id + status + updated_at)
+        {'name': 'user_status_updated', 'keys': [('user_id', ASCENDING), ('status', ASCENDING), ('updated_at', ASCENDING)]},
+        # Alerts: open tasks by due date / by priority (get_alert_tasks)
+        {'name': 'user_status_due', 'keys': [('user_id', ASCENDING), ('status', ASCENDING), ('due_date', ASCENDING)]},
+        {'name': 'user_status_priority', 'keys': [('user_id', ASCENDING), ('status', ASCENDING), ('priority', ASCENDING)]},
+        # Analytics: day-of-week activity ($or on created_at / updated_at)
+        {'name': 'user_updated', 'keys': [('user_id', ASCENDING), ('updated_at', ASCENDING)]},
+    ],
+    'subtasks': [
+        # Subtask.find_by_parent_id(...).sort('created_at')
+        {'name': 'parent_created', 'keys': [('parent_task_id', ASCENDING), ('created_at', ASCENDING)]},
+        # Subtask.delete_by_job_id (a retried generate_subtasks job replaces its earlier writes)
+        {'name': 'job', 'keys': [('job_id', ASCENDING)],
+         'partialFilterExpression': {'job_id': {'$exists': True}}},
+    ],
+    'reminders': [
+        # Reminder.find_pending_before (background trigger pass)
+        {'name': 'status_trigger', 'keys': [('status', ASCENDING), ('trigger_time', ASCENDING)]},
+        # Reminder.find_due_ids and retention scans, restricted to the partitions a scheduler instance holds
+        {'name': 'status_partition_trigger', 'keys': [('status', ASCENDING), ('partition', ASCENDING), ('trigger_time', ASCENDING)]},
+        # Incremental sync of the scheduler's timer engine when change streams are unavailable
+        {'name': 'updated', 'keys': [('updated_at', ASCENDING)]},
+        # Reminder.find_by_user_id(...).sort('trigger_time')
+        {'name': 'user_trigger', 'keys': [('user_id', ASCENDING), ('trigger_time', ASCENDING)]},
+        # Reminder.find_by_task_ids (task export), relative-reminder rescheduling and cascade deletes
+        {'name': 'task', 'keys': [('task_id', ASCENDING)]},
+        # get_triggered_reminders (Alerts page)
+        {'name': 'user_status_trigger', 'keys': [('user_id', ASCENDING), ('status', ASCENDING), ('trigger_time', ASCENDING)]},
+        # At most one pending reminder of a type per task and trigger time (bulk creation skips duplicates)
+        {'name': 'pending_task_type_trigger_unique',
+         'keys': [('task_id', ASCENDING), ('reminder_type', ASCENDING), ('trigger_time', ASCENDING)],
+         'unique': True,
+         'partialFilterExpression': {'status': 'Pending', 'task_id': {'$type': 'objectId'}}},
+    ],
+    'reminders_archive': [
+        # Reminder.find_by_user_id(..., include_archived=True) ($unionWith sub-pipeline)
+        {'name': 'user_trigger', 'keys': [('user_id', ASCENDING), ('trigger_time', ASCENDING)]},
+        # Expires archived reminders REMINDER_ARCHIVE_TTL_DAYS after archival (plain index when 0)
+        dict({'name': 'archived', 'keys': [('archived_at', ASCENDING)]},
+             **({'expireAfterSeconds': Config.REMINDER_ARCHIVE_TTL_DAYS * 86400} if Config.REMINDER_ARCHIVE_TTL_DAYS else {})),
+    ],
+    'ai_cache': [
+        # Removes AI cache entries at their expires_at
+        {'name': 'expires_ttl', 'keys': [('expires_at', ASCENDING)], 'expireAfterSeconds': 0},
+    ],
+    'jobs': [
+        # Job.claim: runnable queued jobs, oldest first
+        {'name': 'status_run_at', 'keys': [('status', ASCENDING), ('run_at', ASCENDING)]},
+        # Job.claim: running jobs whose worker's lease expired
+        {'name': 'status_lease', 'keys': [('status', ASCENDING), ('lease_expires_at', ASCENDING)]},
+        # Job.enqueue: one job per (user, Idempotency-Key)
+        {'name': 'user_idempotency_unique', 'keys': [('user_id', ASCENDING), ('idempotency_key', ASCENDING)],
+         'unique': True, 'partialFilterExpression': {'idempotency_key': {'$type': 'string'}}},
+        # Removes finished jobs JOB_RETENTION_SECONDS after they finish
+        {'name': 'finished_ttl', 'keys': [('finished_at', ASCENDING)], 'expireAfterSeconds': Config.JOB_RETENTION_SECONDS},
+    ],
+    'task_daily_stats': [
+        # Rollup upserts and range reads (also required by $merge in DailyStats.rebuild)
+        {'name': 'user_day_unique', 'keys': [('user_id', ASCENDING), ('day', ASCENDING)], 'unique': True},
+    ],
+    'users': [
+        # User.find_by_email (login / signup)
+        {'name': 'email_unique', 'keys': [('email', ASCENDING)], 'unique': True},
+    ],
+    'events': [
+        # Last-Event-ID replay: Event.find_since(user_id, _id)
+        # (Event.ids_since and Event.tail use the default _id index)
+        {'name': 'user_id', 'keys': [('user_id', ASCENDING), ('_id', ASCENDING)]},
+    ],
+    'conversations': [
+        # Conversation.find_by_user_id(...).sort('created_at', -1)
+        {'name': 'user_created', 'keys': [('user_id', ASCENDING), ('created_at', DESCENDING)]},
+    ],
+}
+
+# Options that are compared when checking an existing index for drift
+_COMPARED_OPTIONS = ('unique', 'sparse', 'expireAfterSeconds', 'partialFilterExpression')
+
+
+class IndexDriftError(Exception):
+    """Raised when an index in the database does not match its registry definition."""
+
+
+def _spec_options(spec):
+    return {k: spec[k] for k in _COMPARED_OPTIONS if k in spec}
+
+
+def _existing_indexes(collection):
+    """Returns {name: index_info} for a collection (empty if the collection does not exist yet)."""
+    return dict(collection.index_information())
+
+
+def verify_indexes(db=None):
+    """
+    Compares the registry against the database.
+    Returns a list of {'collection', 'name', 'state'} rows where state is
+    'ok', 'missing' or 'drift: <reason>'.
+    """
+    db = db if db is not None else get_db()
+    rows = []
+    for coll_name, specs in INDEXES.items():
+        existing = _existing_indexes(db[coll_name])
+        for spec in specs:
+            info = existing.get(spec['name'])
+            if info is None:
+                # Same keys under a different name also counts as drift: create_index would fail
+                same_keys = [n for n, i in existing.items() if list(i['key']) == list(spec['keys'])]
+                state = f"drift: keys exist as '{same_keys[0]}'" if same_keys else 'missing'
+            elif [tuple(k) for k in info['key']] != [tuple(k) for k in spec['keys']]:
+                state = f"drift: keys {info['key']} != {spec['keys']}"
+            else:
+                actual = {k: info[k] for k in _COMPARED_OPTIONS if k in info}
+                state = 'ok' if actual == _spec_options(spec) else f"drift: options {actual} != {_spec_options(spec)}"
+            rows.append({'collection': coll_name, 'name': spec['name'], 'state': state})
+    return rows
+
+
+def ensure_indexes(db=None):
+    """
+    Creates every missing index. Idempotent: existing, matching indexes are left alone.
+    Raises IndexDriftError (before creating anything) if any index has drifted.
+    Returns the verification rows with created indexes marked as 'created'.
+    """
+    db = db if db is not None else get_db()
+    # Must exist as a capped collection before create_index would implicitly create a plain one
+    Event.ensure_collection(db)
+    rows = verify_indexes(db)
+    drifted = [r for r in rows if r['state'].startswith('drift')]
+    if drifted:
+        details = '; '.join(f"{r['collection']}.{r['name']} ({r['state']})" for r in drifted)
+        raise IndexDriftError(f"Index drift detected, refusing to continue: {details}")
+
+    specs_by_key = {(c, s['name']): s for c, specs in INDEXES.items() for s in specs}
+    for row in rows:
+        if row['state'] != 'missing':
+            continue
+        spec = specs_by_key[(row['collection'], row['name'])]
+        try:
+            db[row['collection']].create_index(spec['keys'], name=spec['name'], **_spec_options(spec))
+        except OperationFailure as e:
+            raise IndexDriftError(f"Failed to create {row['collection']}.{row['name']}: {e}")
+        row['state'] = 'created'
+    return rows
+
+
+# --- explain() probes ---
+# Representative query shapes for each registered index; values are filled from a sample document.
+
+def _sample(db, coll_name, field):
+    doc = db[coll_name].find_one({field: {'$exists': True}}, {field: 1})
+    return doc.get(field) if doc else None
+
+
+def _probes(db):
+    user_id = _sample(db, 'tasks', 'user_id')
+    reminder_user = _sample(db, 'reminders', 'user_id')
+    parent_id = _sample(db, 'subtasks', 'parent_task_id')
+    email = _sample(db, 'users', 'email')
+    now = datetime.now()
+    return [
+        ('tasks', 'Task.find_by_user_id', {'user_id': user_id}, [('created_at', 1)]),
+        ('tasks', 'analytics completed trend', {'user_id': user_id, 'status': 'Completed', 'updated_at': {'$gte': now}}, None),
+        ('subtasks', 'Subtask.find_by_parent_id', {'parent_task_id': parent_id}, [('created_at', 1)]),
+        ('reminders', 'Reminder.find_pending_before', {'status': 'Pending', 'trigger_time': {'$lte': now}}, None),
+        ('reminders', 'Reminder.find_by_user_id', {'user_id': reminder_user}, [('trigger_time', 1)]),
+        ('users', 'User.find_by_email', {'email': email}, None),
+    ]
+
+
+def _plan_stages(plan):
+    """Flattens a winningPlan tree into a list of stage names (e.g. ['FETCH', 'IXSCAN'])."""
+    stages = [plan.get('stage')] if plan.get('stage') else []
+    for child_key in ('inputStage', 'queryPlan'):
+        if child_key in plan:
+            stages += _plan_stages(plan[child_key])
+    for child in plan.get('inputStages', []):
+        stages += _plan_stages(child)
+    return stages
+
+
+def explain_summary(db=None):
+    """Runs every probe through explain() and returns one summary row per query shape."""
+    db = db if db is not None else get_db()
+    rows = []
+    for coll_name, label, query, sort in _probes(db):
+        cursor = db[coll_name].find(query)
+        if sort:
+            cursor = cursor.sort(sort)
+        explained = cursor.explain()
+        planner = explained.get('queryPlanner', {})
+        stats = explained.get('executionStats', {})
+        rows.append({
+            'collection': coll_name,
+            'query': label,
+            'stages': '>'.join(_plan_stages(planner.get('winningPlan', {}))),
+            'docs_examined': stats.get('totalDocsExamined'),
+            'keys_examined': stats.get('totalKeysExamined'),
+            'returned': stats.get('nReturned'),
+        })
+    return rows
@@ -0,0 +1,115 @@
+# backend/models/job.py
+from datetime import datetime, timedelta
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .db import get_db
+
+# Background jobs: {_id, type, user_id, payload, status, attempts, max_attempts, run_at,
+# locked_by, lease_expires_at, idempotency_key, result, error, created_at, updated_at, finished_at}.
+# status moves queued -> running -> succeeded | failed, and back to queued when a retry is scheduled.
+
+JOB_QUEUED = 'queued'
+JOB_RUNNING = 'running'
+JOB_SUCCEEDED = 'succeeded'
+JOB_FAILED = 'failed'
+
+class Job:
+    @staticmethod
+    def collection():
+        return get_db().jobs
+
+    @staticmethod
+    def enqueue(job_type, user_id, payload, max_attempts, idempotency_key=None):
+        """
+        Queues a job and returns (job_doc, created).
+        With an idempotency_key, a repeated request returns the job created by the first one.
+        """
+        now = datetime.now()
+        doc = {
+            '_id': ObjectId(),
+            'type': job_type,
+            'user_id': user_id,
+            'payload': payload,
+            'status': JOB_QUEUED,
+            'attempts': 0,
+            'max_attempts': max_attempts,
+            'run_at': now,
+            'created_at': now,
+            'updated_at': now,
+        }
+        if not idempotency_key:
+            Job.collection().insert_one(doc)
+            return doc, True
+
+        doc['idempotency_key'] = idempotency_key
+        query = {'user_id': user_id, 'idempotency_key': idempotency_key}
+        try:
+            stored = Job.collection().find_one_and_update(
+                query, {'$setOnInsert': doc}, upsert=True, return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # A concurrent request with the same key inserted first
+            stored = Job.collection().find_one(query)
+        return stored, stored['_id'] == doc['_id']
+
+    @staticmethod
+    def find_for_user(job_id, user_id):
+        try:
+            return Job.collection().find_one({'_id': ObjectId(job_id), 'user_id': user_id})
+        except (InvalidId, TypeError):
+            return None
+
+    @staticmethod
+    def claim(worker_id, lease_seconds, job_types):
+        """
+        Atomically takes the oldest runnable job: a queued job whose run_at has come, or a running
+        job whose worker's lease expired (crashed worker). Returns the claimed job or None.
+        """
+        now = datetime.now()
+        update = {
+            '$set': {'status': JOB_RUNNING, 'locked_by': worker_id,
+                     'lease_expires_at': now + timedelta(seconds=lease_seconds), 'updated_at': now},
+            '$inc': {'attempts': 1}
+        }
+        for query, sort_field in (
+            ({'status': JOB_QUEUED, 'run_at': {'$lte': now}}, 'run_at'),
+            ({'status': JOB_RUNNING, 'lease_expires_at': {'$lt': now}}, 'lease_expires_at'),
+        ):
+            query['type'] = {'$in': list(job_types)}
+            job = Job.collection().find_one_and_update(
+                query, update, sort=[(sort_field, 1)], return_document=ReturnDocument.AFTER
+            )
+            if job is not None:
+                return job
+        return None
+
+    @staticmethod
+    def extend_lease(job_id, worker_id, lease_seconds):
+        now = datetime.now()
+        return Job.collection().update_one(
+            {'_id': job_id, 'status': JOB_RUNNING, 'locked_by': worker_id},
+            {'$set': {'lease_expires_at': now + timedelta(seconds=lease_seconds), 'updated_at': now}}
+        ).modified_count == 1
+
+    @staticmethod
+    def _finish(job_id, worker_id, fields):
+        """Writes the outcome only if this worker still owns the job (its lease was not taken over)."""
+        fields['updated_at'] = datetime.now()
+        return Job.collection().update_one(
+            {'_id': job_id, 'status': JOB_RUNNING, 'locked_by': worker_id},
+            {'$set': fields, '$unset': {'lease_expires_at': '', 'locked_by': ''}}
+        ).modified_count == 1
+
+    @staticmethod
+    def succeed(job_id, worker_id, result):
+        return Job._finish(job_id, worker_id, {'status': JOB_SUCCEEDED, 'result': result, 'error': None,
+                                               'finished_at': datetime.now()})
+
+    @staticmethod
+    def fail(job_id, worker_id, error, retry_at=None):
+        """Schedules a retry at retry_at, or marks the job failed for good when retry_at is None."""
+        if retry_at is not None:
+            return Job._finish(job_id, worker_id, {'status': JOB_QUEUED, 'error': error, 'run_at': retry_at})
+        return Job._finish(job_id, worker_id, {'status': JOB_FAILED, 'error': error, 'finished_at': datetime.now()})
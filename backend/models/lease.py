@@ -0,0 +1,85 @@
+# backend/models/lease.py
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from .db import get_db
+
+# Leases are documents {_id: name, owner, token, expires_at} in scheduler_leases.
+# `token` increases every time ownership changes, so it doubles as a fencing token:
+# a process that lost its lease (e.g. after a long GC pause) can detect that its token is stale.
+
+class Lease:
+    @staticmethod
+    def collection():
+        return get_db().scheduler_leases
+
+    @staticmethod
+    def acquire(name, owner, ttl_seconds):
+        """Takes the lease if it is free or expired. Returns the new fencing token, or None if held elsewhere."""
+        now = datetime.now()
+        try:
+            doc = Lease.collection().find_one_and_update(
+                {'_id': name, '$or': [{'expires_at': {'$lt': now}}, {'owner': None}]},
+                {'$set': {'owner': owner, 'expires_at': now + timedelta(seconds=ttl_seconds), 'acquired_at': now},
+                 '$inc': {'token': 1}},
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            # The lease exists and is held by a live owner
+            return None
+        return doc['token']
+
+    @staticmethod
+    def renew(name, owner, token, ttl_seconds):
+        """Extends a lease this owner still holds. Returns False if it was lost (expired and taken over)."""
+        now = datetime.now()
+        result = Lease.collection().update_one(
+            {'_id': name, 'owner': owner, 'token': token, 'expires_at': {'$gte': now}},
+            {'$set': {'expires_at': now + timedelta(seconds=ttl_seconds)}}
+        )
+        return result.matched_count == 1
+
+    @staticmethod
+    def release(name, owner, token):
+        """Gives the lease up immediately so another instance can take it without waiting for expiry."""
+        Lease.collection().update_one(
+            {'_id': name, 'owner': owner, 'token': token},
+            {'$set': {'owner': None, 'expires_at': datetime.now()}}
+        )
+
+    @staticmethod
+    def count_valid(names_and_tokens, owner):
+        """Counts how many of the given (name, token) leases this owner still validly holds (fencing check)."""
+        if not names_and_tokens:
+            return 0
+        return Lease.collection().count_documents({
+            '$or': [{'_id': name, 'token': token} for name, token in names_and_tokens],
+            'owner': owner,
+            'expires_at': {'$gte': datetime.now()}
+        })
+
+
+class SchedulerMembers:
+    """Heartbeats of live scheduler instances, used to size each instance's share of partitions."""
+
+    @staticmethod
+    def collection():
+        return get_db().scheduler_members
+
+    @staticmethod
+    def heartbeat(owner, ttl_seconds):
+        now = datetime.now()
+        SchedulerMembers.collection().update_one(
+            {'_id': owner},
+            {'$set': {'expires_at': now + timedelta(seconds=ttl_seconds), 'seen_at': now}},
+            upsert=True
+        )
+
+    @staticmethod
+    def count_alive():
+        return SchedulerMembers.collection().count_documents({'expires_at': {'$gte': datetime.now()}})
+
+    @staticmethod
+    def leave(owner):
+        SchedulerMembers.collection().delete_one({'_id': owner})
@@ -0,0 +1,124 @@
+# backend/models/migrations.py
+import time
+from datetime import datetime
+from pymongo import UpdateOne
+from .db import get_db
+from .normalize import normalize_status, normalize_user_id, parse_due_date
+from .reminder import reminder_partition
+
+# --- Document transforms ---
+# Each transform receives one document and returns the $set payload it needs (or None if it is already canonical).
+
+def _normalize_user_and_status(doc):
+    updates = {}
+    if 'user_id' in doc and doc['user_id'] is not None and not isinstance(doc['user_id'], str):
+        updates['user_id'] = normalize_user_id(doc['user_id'])
+    if doc.get('status') is not None:
+        try:
+            status = normalize_status(doc['status'])
+        except ValueError:
+            status = doc['status']  # Unknown values are left for manual review
+        if status != doc['status']:
+            updates['status'] = status
+    return updates or None
+
+
+def _due_date_to_datetime(doc):
+    if 'due_date' not in doc or isinstance(doc['due_date'], datetime):
+        return None
+    try:
+        due_date, has_time = parse_due_date(doc['due_date'])
+    except ValueError:
+        return None  # Unparseable values are left for manual review
+    return {'due_date': due_date, 'due_has_time': has_time}
+
+
+def _reminder_partition(doc):
+    partition = reminder_partition(doc.get('user_id'))
+    return {'partition': partition} if doc.get('partition') != partition else None
+
+
+# --- Migration Registry ---
+MIGRATIONS = {
+    'normalize_user_status': {
+        'description': 'Store user_id as a string and status as its canonical enum value on tasks and subtasks.',
+        'collections': ['tasks', 'subtasks'],
+        'projection': {'user_id': 1, 'status': 1},
+        'transform': _normalize_user_and_status,
+    },
+    'due_date_to_datetime': {
+        'description': "Convert 'YYYY-MM-DD' string due dates on tasks to BSON dates.",
+        'collections': ['tasks'],
+        'projection': {'due_date': 1},
+        'transform': _due_date_to_datetime,
+    },
+    'reminder_partitions': {
+        'description': 'Assign every reminder its user-hash partition for the multi-instance scheduler.',
+        'collections': ['reminders'],
+        'projection': {'user_id': 1, 'partition': 1},
+        'transform': _reminder_partition,
+    },
+}
+
+
+def migration_status(db=None):
+    """Returns the stored progress document of every migration that has been started."""
+    db = db if db is not None else get_db()
+    return list(db.migrations.find({}).sort('_id', 1))
+
+
+def run_migration(name, batch_size=1000, throttle_seconds=0.0, restart=False, db=None, log=print):
+    """
+    Rewrites documents in _id order, batch by batch, using one unordered bulk_write per batch.
+    Progress (last processed _id per collection) is saved after every batch, so an interrupted
+    run resumes where it stopped. Safe to run while the app is serving traffic.
+    """
+    if name not in MIGRATIONS:
+        raise KeyError(f"Unknown migration '{name}'. Available: {', '.join(MIGRATIONS)}")
+    db = db if db is not None else get_db()
+    migration = MIGRATIONS[name]
+    state_col = db.migrations
+
+    if restart:
+        state_col.delete_one({'_id': name})
+    state = state_col.find_one({'_id': name}) or {}
+    if state.get('completed_at'):
+        log(f"[{name}] already completed at {state['completed_at']}; use restart to run again.")
+        return state
+
+    state_col.update_one(
+        {'_id': name},
+        {'$setOnInsert': {'started_at': datetime.now(), 'description': migration['description']}},
+        upsert=True
+    )
+
+    for coll_name in migration['collections']:
+        collection = db[coll_name]
+        last_id = (state.get('progress') or {}).get(coll_name)
+        while True:
+            query = {'_id': {'$gt': last_id}} if last_id is not None else {}
+            docs = list(collection.find(query, migration['projection']).sort('_id', 1).limit(batch_size))
+            if not docs:
+                break
+
+            requests = []
+            for doc in docs:
+                updates = migration['transform'](doc)
+                if updates:
+                    requests.append(UpdateOne({'_id': doc['_id']}, {'$set': updates}))
+            modified = collection.bulk_write(requests, ordered=False).modified_count if requests else 0
+
+            last_id = docs[-1]['_id']
+            state_col.update_one(
+                {'_id': name},
+                {
+                    '$set': {f'progress.{coll_name}': last_id, 'updated_at': datetime.now()},
+                    '$inc': {f'scanned.{coll_name}': len(docs), f'modified.{coll_name}': modified}
+                }
+            )
+            log(f"[{name}] {coll_name}: scanned {len(docs)}, modified {modified}, last _id {last_id}")
+            if throttle_seconds:
+                time.sleep(throttle_seconds)
+
+    state_col.update_one({'_id': name}, {'$set': {'completed_at': datetime.now()}})
+    return state_col.find_one({'_id': name})
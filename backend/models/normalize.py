@@ -0,0 +1,104 @@
+# backend/models/normalize.py
+from datetime import datetime, timedelta
+
+# Canonical representations for fields that older documents stored inconsistently.
+# Every write path goes through these helpers so read paths can use plain equality matches.
+
+STATUS_PENDING = 'Pending'
+STATUS_IN_PROGRESS = 'In Progress'
+STATUS_COMPLETED = 'Completed'
+TASK_STATUSES = (STATUS_PENDING, STATUS_IN_PROGRESS, STATUS_COMPLETED)
+
+# Lower-cased legacy spellings -> canonical status
+_STATUS_ALIASES = {
+    'pending': STATUS_PENDING,
+    'todo': STATUS_PENDING,
+    'to do': STATUS_PENDING,
+    'in progress': STATUS_IN_PROGRESS,
+    'in-progress': STATUS_IN_PROGRESS,
+    'inprogress': STATUS_IN_PROGRESS,
+    'completed': STATUS_COMPLETED,
+    'complete': STATUS_COMPLETED,
+    'done': STATUS_COMPLETED,
+}
+
+
+def normalize_status(status, default=STATUS_PENDING):
+    """Maps any known spelling of a status to its canonical value. Raises ValueError for unknown values."""
+    if status is None or status == '':
+        return default
+    canonical = _STATUS_ALIASES.get(str(status).strip().lower())
+    if canonical is None:
+        raise ValueError(f"Invalid status '{status}'. Allowed: {', '.join(TASK_STATUSES)}")
+    return canonical
+
+
+def normalize_user_id(user_id):
+    """user_id is always stored as the string form of the user's ObjectId (the JWT identity)."""
+    return str(user_id) if user_id is not None else None
+
+
+DUE_DATE_FORMAT = '%Y-%m-%d'
+DUE_DATETIME_FORMAT = '%Y-%m-%dT%H:%M'
+# Deadline assumed for tasks whose due date has no time of day
+DEFAULT_DUE_HOUR = 17
+
+
+def parse_due_date(value):
+    """
+    Converts an API due date into (datetime, has_time).
+    Accepts 'YYYY-MM-DD' (stored as midnight, has_time False), an ISO date-time such as
+    'YYYY-MM-DDTHH:MM', or a datetime. Empty values give (None, False); anything else raises ValueError.
+    """
+    if value is None or value == '':
+        return None, False
+    if isinstance(value, datetime):
+        if value.tzinfo is not None:
+            value = value.astimezone().replace(tzinfo=None)  # Same local-time convention as offset strings
+        return value, (value.hour, value.minute, value.second) != (0, 0, 0)
+    text = str(value).strip()
+    try:
+        if len(text) == 10:
+            return datetime.strptime(text, DUE_DATE_FORMAT), False
+        parsed = datetime.fromisoformat(text.replace('Z', '+00:00'))
+    except ValueError:
+        raise ValueError(f"Invalid due_date '{value}'. Use YYYY-MM-DD or YYYY-MM-DDTHH:MM.")
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone().replace(tzinfo=None)
+    return parsed, True
+
+
+def format_due_date(value, has_time=False):
+    """Renders a stored due date in the API's string format (legacy string values pass through)."""
+    if not isinstance(value, datetime):
+        return value
+    return value.strftime(DUE_DATETIME_FORMAT if has_time else DUE_DATE_FORMAT)
+
+
+def due_of(task):
+    """(datetime, has_time) of a task document, or (None, False) when it has no usable due date."""
+    try:
+        due_date, has_time = parse_due_date(task.get('due_date'))
+    except ValueError:
+        return None, False
+    return due_date, task.get('due_has_time', has_time)
+
+
+def effective_due(due_date, due_has_time):
+    """The deadline a date-only due date stands for (DEFAULT_DUE_HOUR, 5 PM, on that day)."""
+    return due_date if due_has_time else due_date + timedelta(hours=DEFAULT_DUE_HOUR)
+
+
+def normalize_task_fields(data):
+    """Normalizes user_id/status/due_date in a task or subtask document (or $set payload) in place."""
+    if 'user_id' in data:
+        data['user_id'] = normalize_user_id(data['user_id'])
+    if 'status' in data:
+        data['status'] = normalize_status(data['status'])
+    if 'due_date' in data:
+        due_date, has_time = parse_due_date(data['due_date'])
+        # A stored datetime (e.g. from an export) keeps its own flag
+        if not (isinstance(data['due_date'], datetime) and 'due_has_time' in data):
+            data['due_has_time'] = has_time
+        data['due_date'] = due_date
+    return data
@@ -1,24 +1,27 @@
-from pymongo import MongoClient
+import zlib
 from bson.objectid import ObjectId
 from datetime import datetime
+from pymongo import ReplaceOne
+from .db import get_db
 from ..config import Config
 
-# Connect to the same database
-client = MongoClient(Config.MONGO_URI)
-db = client.get_default_database() # <-- This defines the global 'db' object
+def reminder_partition(user_id):
+    """Stable user-hash partition used to split the trigger work between scheduler instances."""
+    return zlib.crc32(str(user_id).encode('utf-8')) % Config.REMINDER_PARTITIONS
 
 class Reminder:
-    def __init__(self, user_id, task_id, trigger_time, message, reminder_type='Absolute'):
+    def __init__(self, user_id, task_id, trigger_time, message, reminder_type='Absolute', offset_hours=None):
         self.user_id = user_id
         # Note: task_id is stored as a string initially, converted to ObjectId in save
         self.task_id = task_id  
         self.trigger_time = trigger_time  # datetime object for triggering
         self.message = message
         self.reminder_type = reminder_type
+        self.offset_hours = offset_hours  # Relative reminders: hours before the task's due time
         self.status = 'Pending'  # Can be: Pending, Triggered, Dismissed
         self.created_at = datetime.now()
 
-    def save(self):
+    def to_document(self):
         # Convert task_id string to ObjectId before saving if it exists
         task_id_obj = ObjectId(self.task_id) if self.task_id else None
         
@@ -30,36 +33,176 @@ class Reminder:
             'message': self.message,
             'reminder_type': self.reminder_type,
             'status': self.status,
-            'created_at': self.created_at
+            'created_at': self.created_at,
+            'updated_at': self.created_at,
+            'partition': reminder_partition(self.user_id)
         }
-        return db.reminders.insert_one(reminder_data)
+        if self.offset_hours is not None:
+            reminder_data['offset_hours'] = self.offset_hours
+        return reminder_data
+
+    def save(self):
+        return get_db().reminders.insert_one(self.to_document())
+
+    @staticmethod
+    def find_by_user_id(user_id, include_archived=False, limit=None):
+        """
+        Finds all reminders for a user, sorted by trigger time.
+        With include_archived, archived ones are merged in by the server ($unionWith) and only the
+        `limit` most recent by trigger time are returned, so a long archive is never loaded whole.
+        """
+        # Uses the shared connection from models.db
+        if not include_archived:
+            return list(get_db().reminders.find({'user_id': user_id}).sort('trigger_time', 1))
+        reminders = list(get_db().reminders.aggregate([
+            {'$match': {'user_id': user_id}},
+            {'$unionWith': {'coll': 'reminders_archive', 'pipeline': [{'$match': {'user_id': user_id}}]}},
+            {'$sort': {'trigger_time': -1, '_id': -1}},
+            {'$limit': limit or Config.REMINDER_LIST_ARCHIVED_LIMIT}
+        ]))
+        reminders.reverse()
+        return reminders
+
+    @staticmethod
+    def find_by_task_ids(task_ids):
+        """Fetches the reminders attached to several tasks in one query."""
+        return get_db().reminders.find({'task_id': {'$in': list(task_ids)}}).sort('trigger_time', 1)
+
+    @staticmethod
+    def find_pending_relative_by_task_ids(task_ids, relative_types):
+        """Pending relative reminders of the given tasks (served by the task_id index)."""
+        return get_db().reminders.find(
+            {'task_id': {'$in': list(task_ids)}, 'status': 'Pending', 'reminder_type': {'$in': list(relative_types)}},
+            {'task_id': 1, 'trigger_time': 1, 'offset_hours': 1}
+        )
+
+    @staticmethod
+    def bulk_write(requests):
+        return get_db().reminders.bulk_write(requests, ordered=False)
 
     @staticmethod
-    def find_by_user_id(user_id):
-        """Finds all reminders for a user, sorted by trigger time."""
-        # Uses the global 'db' defined above
-        return list(db.reminders.find({'user_id': user_id}).sort('trigger_time', 1))
+    def delete_by_task_ids(task_ids):
+        """Cascade delete: removes every reminder attached to the given tasks in one delete_many."""
+        return get_db().reminders.delete_many({'task_id': {'$in': list(task_ids)}})
+
+    @staticmethod
+    def insert_many(reminder_docs):
+        # A fresh updated_at lets the scheduler's incremental sync see imported reminders too
+        now = datetime.now()
+        for doc in reminder_docs:
+            doc['partition'] = reminder_partition(doc.get('user_id'))
+            doc['updated_at'] = now
+        return get_db().reminders.insert_many(reminder_docs, ordered=False)
 
     @staticmethod
     def find_pending_before(time_now):
         """Finds all pending reminders that are due before the current time."""
-        # Uses the global 'db' defined above
-        return list(db.reminders.find({
+        # Uses the shared connection from models.db
+        return list(get_db().reminders.find({
             'status': 'Pending',
             'trigger_time': {'$lte': time_now}
         }))
 
+    @staticmethod
+    def find_pending_within(until, partitions, since=None):
+        """
+        Pending reminders due at or before `until` in the given partitions (timer preload).
+        With `since`, only reminders changed after that time are returned (incremental sync).
+        """
+        partitions = list(partitions)
+        if 0 in partitions:
+            partitions.append(None)
+        query = {'status': 'Pending', 'trigger_time': {'$lte': until}, 'partition': {'$in': partitions}}
+        if since is not None:
+            query = {'updated_at': {'$gt': since}, 'partition': {'$in': partitions}}
+        return get_db().reminders.find(query, {'trigger_time': 1, 'status': 1, 'partition': 1, 'updated_at': 1})
+
+    @staticmethod
+    def watch_changes():
+        """Change stream over reminders (requires a replica set; raises OperationFailure on a standalone mongod)."""
+        return get_db().reminders.watch(
+            [{'$match': {'operationType': {'$in': ['insert', 'update', 'replace', 'delete']}}}],
+            full_document='updateLookup'
+        )
+
+    @staticmethod
+    def find_due_ids(time_now, limit, partitions=None):
+        """
+        Returns up to `limit` _ids of pending reminders due at or before time_now, oldest first.
+        `partitions` restricts the search to the partitions this scheduler instance holds.
+        """
+        query = {'status': 'Pending', 'trigger_time': {'$lte': time_now}}
+        if partitions is not None:
+            partitions = list(partitions)
+            if 0 in partitions:
+                # Reminders saved before partitioning (no field yet) are handled by partition 0's owner
+                partitions.append(None)
+            query['partition'] = {'$in': partitions}
+        cursor = get_db().reminders.find(query, {'_id': 1}).sort('trigger_time', 1).limit(limit)
+        return [doc['_id'] for doc in cursor]
+
+    @staticmethod
+    def mark_triggered(reminder_ids, time_now):
+        """
+        Atomically claims a batch: only reminders still Pending are flipped to Triggered,
+        so a reminder claimed by a concurrent pass is never triggered twice.
+        """
+        return get_db().reminders.update_many(
+            {'_id': {'$in': list(reminder_ids)}, 'status': 'Pending'},
+            {'$set': {'status': 'Triggered', 'triggered_at': time_now, 'updated_at': time_now}}
+        )
+
+    @staticmethod
+    def find_triggered_in_batch(reminder_ids, time_now):
+        """Reminders of a batch that mark_triggered(reminder_ids, time_now) actually flipped (for event publishing)."""
+        return list(get_db().reminders.find(
+            {'_id': {'$in': list(reminder_ids)}, 'status': 'Triggered', 'triggered_at': time_now},
+            {'user_id': 1, 'task_id': 1, 'message': 1, 'trigger_time': 1}
+        ))
+
+    @staticmethod
+    def find_expired(status, before, limit, partitions=None):
+        """Up to `limit` full reminder documents in `status` whose trigger time is before `before` (retention)."""
+        query = {'status': status, 'trigger_time': {'$lt': before}}
+        if partitions is not None:
+            partitions = list(partitions)
+            if 0 in partitions:
+                partitions.append(None)
+            query['partition'] = {'$in': partitions}
+        return list(get_db().reminders.find(query).sort('trigger_time', 1).limit(limit))
+
+    @staticmethod
+    def archive(reminder_docs, status, archived_at):
+        """
+        Copies the reminders to reminders_archive, then removes them from reminders.
+        Copies are upserted by _id, so a retried batch overwrites what an interrupted run left behind.
+        Only documents still in `status` are removed, so a concurrent change is never lost; the copies
+        of documents that changed in between are then dropped again, leaving no stale archive entry.
+        """
+        db = get_db()
+        ids = [doc['_id'] for doc in reminder_docs]
+        db.reminders_archive.bulk_write(
+            [ReplaceOne({'_id': doc['_id']}, {**doc, 'archived_at': archived_at}, upsert=True) for doc in reminder_docs],
+            ordered=False
+        )
+        result = db.reminders.delete_many({'_id': {'$in': ids}, 'status': status})
+        if result.deleted_count < len(ids):
+            kept = [doc['_id'] for doc in db.reminders.find({'_id': {'$in': ids}}, {'_id': 1})]
+            if kept:
+                db.reminders_archive.delete_many({'_id': {'$in': kept}})
+        return result
+
     @staticmethod
     def update_status(reminder_id, new_status):
         """Updates the status of a specific reminder."""
-        # Uses the global 'db' defined above
-        return db.reminders.update_one(
+        # Uses the shared connection from models.db
+        return get_db().reminders.update_one(
             {'_id': ObjectId(reminder_id)},
-            {'$set': {'status': new_status}}
+            {'$set': {'status': new_status, 'updated_at': datetime.now()}}
         )
 
     @staticmethod
     def delete_by_id(reminder_id):
         """Deletes a reminder by ID."""
-        # Uses the global 'db' defined above
-        return db.reminders.delete_one({'_id': ObjectId(reminder_id)})
\ No newline at end of file
+        # Uses the shared connection from models.db
+        return get_db().reminders.delete_one({'_id': ObjectId(reminder_id)})
\ No newline at end of file
@@ -1,14 +1,11 @@
-from pymongo import MongoClient
 from bson.objectid import ObjectId
 from datetime import datetime
-from ..config import Config
+from .db import get_db
+from .normalize import STATUS_COMPLETED, STATUS_PENDING
 
-# Connect to the same database
-client = MongoClient(Config.MONGO_URI)
-db = client.get_default_database()
 
 class Subtask:
-    def __init__(self, parent_task_id, title, description, user_id, status='Pending'):
+    def __init__(self, parent_task_id, title, description, user_id, status=STATUS_PENDING):
         self.parent_task_id = parent_task_id
         self.title = title
         self.description = description
@@ -17,8 +14,8 @@ class Subtask:
         self.created_at = datetime.now()
         self.completed_at = None
 
-    def save(self):
-        subtask_data = {
+    def to_document(self):
+        return {
             'parent_task_id': ObjectId(self.parent_task_id),
             'title': self.title,
             'description': self.description,
@@ -27,30 +24,63 @@ class Subtask:
             'created_at': self.created_at,
             'completed_at': self.completed_at
         }
-        return db.subtasks.insert_one(subtask_data)
+
+    def save(self):
+        return get_db().subtasks.insert_one(self.to_document())
 
     @staticmethod
     def find_by_parent_id(parent_task_id):
-        return list(db.subtasks.find({'parent_task_id': ObjectId(parent_task_id)}).sort('created_at', 1))
+        return list(get_db().subtasks.find({'parent_task_id': ObjectId(parent_task_id)}).sort('created_at', 1))
+
+    @staticmethod
+    def find_by_parent_ids(parent_task_ids):
+        """Fetches the subtasks of several parent tasks in one query."""
+        return get_db().subtasks.find({'parent_task_id': {'$in': list(parent_task_ids)}}).sort('created_at', 1)
+
+    @staticmethod
+    def progress_by_parent_ids(parent_task_ids):
+        """Returns {parent_task_id: (total, completed)} for the given parent tasks in one aggregation."""
+        pipeline = [
+            {'$match': {'parent_task_id': {'$in': list(parent_task_ids)}}},
+            {'$group': {
+                '_id': '$parent_task_id',
+                'total': {'$sum': 1},
+                'completed': {'$sum': {'$cond': [{'$eq': ['$status', STATUS_COMPLETED]}, 1, 0]}}
+            }}
+        ]
+        return {doc['_id']: (doc['total'], doc['completed']) for doc in get_db().subtasks.aggregate(pipeline)}
+
+    @staticmethod
+    def insert_many(subtask_docs):
+        return get_db().subtasks.insert_many(subtask_docs, ordered=False)
 
     @staticmethod
     def update_status(subtask_id, status):
         update_data = {'status': status}
-        if status == 'Completed':
+        if status == STATUS_COMPLETED:
             update_data['completed_at'] = datetime.now()
         else:
             update_data['completed_at'] = None
             
-        return db.subtasks.update_one(
+        return get_db().subtasks.update_one(
             {'_id': ObjectId(subtask_id)},
             {'$set': update_data}
         )
 
     @staticmethod
     def delete_by_id(subtask_id):
-        return db.subtasks.delete_one({'_id': ObjectId(subtask_id)})
+        return get_db().subtasks.delete_one({'_id': ObjectId(subtask_id)})
+
+    @staticmethod
+    def delete_by_job_id(job_id):
+        """Removes the subtasks saved by an earlier attempt of a background job."""
+        return get_db().subtasks.delete_many({'job_id': job_id})
+
+    @staticmethod
+    def delete_by_parent_ids(parent_task_ids):
+        return get_db().subtasks.delete_many({'parent_task_id': {'$in': list(parent_task_ids)}})
 
     @staticmethod
     def delete_by_parent_id(parent_task_id):
         # Useful for cleaning up subtasks when the parent task is deleted
-        return db.subtasks.delete_many({'parent_task_id': ObjectId(parent_task_id)})
\ No newline at end of file
+        return get_db().subtasks.delete_many({'parent_task_id': ObjectId(parent_task_id)})
\ No newline at end of file
@@ -1,55 +1,168 @@
-from pymongo import MongoClient
 from bson.objectid import ObjectId
+from pymongo import ASCENDING, ReturnDocument
 from datetime import datetime
-from ..config import Config
+from .db import get_db
+from .normalize import STATUS_PENDING, STATUS_IN_PROGRESS
 
-client = MongoClient(Config.MONGO_URI)
-db = client.get_default_database()
+def _keyset_after(field, direction, value, last_id):
+    """Builds the filter selecting documents that sort strictly after (value, last_id)."""
+    # Mongo sorts null/missing values before everything else
+    if direction == ASCENDING:
+        if value is None:
+            return {'$or': [{field: None, '_id': {'$gt': last_id}}, {field: {'$ne': None}}]}
+        return {'$or': [{field: {'$gt': value}}, {field: value, '_id': {'$gt': last_id}}]}
+    if value is None:
+        return {field: None, '_id': {'$lt': last_id}}
+    return {'$or': [{field: {'$lt': value}}, {field: value, '_id': {'$lt': last_id}}, {field: None}]}
 
 class Task:
-    def __init__(self, title, description, priority, tags, due_date, status, user_id, summary=None):
+    def __init__(self, title, description, priority, tags, due_date, status, user_id, summary=None, due_has_time=False):
         self.title = title
         self.description = description
         self.priority = priority
         self.tags = tags
-        self.due_date = due_date
+        self.due_date = due_date  # datetime (BSON date) or None
+        self.due_has_time = due_has_time
         self.status = status
         self.user_id = user_id
         self.summary = summary  # Added summary parameter
         self.created_at = datetime.now()
         self.updated_at = None
     
-    def save(self):
-        task_data = {
+    def to_document(self):
+        return {
             'title': self.title,
             'description': self.description,
             'priority': self.priority,
             'tags': self.tags,
             'due_date': self.due_date,
+            'due_has_time': self.due_has_time,
             'status': self.status,
             'user_id': self.user_id,
             'summary': self.summary,  # Added summary to task data
             'created_at': self.created_at,
             'updated_at': self.updated_at
         }
-        return db.tasks.insert_one(task_data)
+
+    def save(self):
+        return get_db().tasks.insert_one(self.to_document())
     
     @staticmethod
-    def find_by_user_id(user_id):
-        return list(db.tasks.find({'user_id': user_id}))
+    def find_by_user_id(user_id, filters=None):
+        query = {'user_id': user_id}
+        query.update(filters or {})
+        return list(get_db().tasks.find(query).sort([('created_at', 1), ('_id', 1)]))
+
+    @staticmethod
+    def find_reminder_targets(user_id, filters, limit):
+        """Up to `limit` matching tasks with only the fields a bulk reminder rule needs."""
+        query = {'user_id': user_id}
+        query.update(filters or {})
+        return list(get_db().tasks.find(
+            query, {'title': 1, 'due_date': 1, 'due_has_time': 1}
+        ).sort([('created_at', 1), ('_id', 1)]).limit(limit))
+
+    @staticmethod
+    def find_page(user_id, filters, sort_field, direction, limit, after=None):
+        """
+        Keyset pagination over a user's tasks ordered by (sort_field, _id).
+        `after` is the (sort_value, _id) pair of the last task on the previous page.
+        Fetches limit + 1 documents so the caller can tell whether another page exists.
+        """
+        query = {'user_id': user_id}
+        query.update(filters or {})
+        if after is not None:
+            query = {'$and': [query, _keyset_after(sort_field, direction, *after)]}
+        return list(
+            get_db().tasks.find(query)
+            .sort([(sort_field, direction), ('_id', direction)])
+            .limit(limit + 1)
+        )
     
+    @staticmethod
+    def iter_by_user_id(user_id, batch_size=500):
+        """Returns a lazy cursor over a user's tasks (for streaming; nothing is loaded up front)."""
+        return get_db().tasks.find({'user_id': user_id}).sort([('created_at', 1), ('_id', 1)]).batch_size(batch_size)
+
+    @staticmethod
+    def insert_many(task_docs):
+        return get_db().tasks.insert_many(task_docs, ordered=False)
+
+    @staticmethod
+    def aggregate_alerts(user_id, today, tomorrow, limit):
+        """
+        Buckets a user's open tasks into overdue / due today / high priority with one aggregation.
+        Only open tasks that fall into at least one bucket are read (via the user_status_* indexes).
+        Returns {'overdue': [...], 'dueToday': [...], 'highPriority': [...], 'counts': [{...}]}.
+        """
+        open_tasks = {'user_id': user_id, 'status': {'$in': [STATUS_PENDING, STATUS_IN_PROGRESS]}}
+        overdue = {'due_date': {'$lt': today}}
+        due_today = {'due_date': {'$gte': today, '$lt': tomorrow}}
+        high_priority = {'priority': 'High'}
+
+        def bucket(match):
+            return [{'$match': match}, {'$sort': {'due_date': 1, '_id': 1}}, {'$limit': limit}]
+
+        pipeline = [
+            {'$match': {'$or': [
+                {**open_tasks, 'due_date': {'$lt': tomorrow}},
+                {**open_tasks, **high_priority}
+            ]}},
+            {'$facet': {
+                'overdue': bucket(overdue),
+                'dueToday': bucket(due_today),
+                'highPriority': bucket(high_priority),
+                'counts': [{'$group': {
+                    '_id': None,
+                    # BSON comparison order puts null below dates, so guard against missing due dates
+                    'overdue': {'$sum': {'$cond': [{'$and': [{'$gt': ['$due_date', None]}, {'$lt': ['$due_date', today]}]}, 1, 0]}},
+                    'dueToday': {'$sum': {'$cond': [{'$and': [{'$gte': ['$due_date', today]}, {'$lt': ['$due_date', tomorrow]}]}, 1, 0]}},
+                    'highPriority': {'$sum': {'$cond': [{'$eq': ['$priority', 'High']}, 1, 0]}}
+                }}]
+            }}
+        ]
+        return next(get_db().tasks.aggregate(pipeline), {})
+
     @staticmethod
     def find_by_id(task_id):
-        return db.tasks.find_one({'_id': ObjectId(task_id)})
+        return get_db().tasks.find_one({'_id': ObjectId(task_id)})
     
     @staticmethod
     def update_task(task_id, update_data):
         update_data['updated_at'] = datetime.now()
-        return db.tasks.update_one(
+        return get_db().tasks.update_one(
             {'_id': ObjectId(task_id)},
             {'$set': update_data}
         )
     
+    @staticmethod
+    def find_existing(task_ids, user_id):
+        """Returns {_id: doc} (status/timestamps/due date only) for the task_ids that exist and belong to user_id."""
+        cursor = get_db().tasks.find(
+            {'_id': {'$in': list(task_ids)}, 'user_id': user_id},
+            {'status': 1, 'created_at': 1, 'updated_at': 1, 'due_date': 1, 'due_has_time': 1}
+        )
+        return {doc['_id']: doc for doc in cursor}
+
+    @staticmethod
+    def update_and_get_previous(task_id, update_data):
+        """Applies update_data and returns the task as it was before the update (None if not found)."""
+        update_data['updated_at'] = datetime.now()
+        return get_db().tasks.find_one_and_update(
+            {'_id': ObjectId(task_id)},
+            {'$set': update_data},
+            return_document=ReturnDocument.BEFORE
+        )
+
+    @staticmethod
+    def delete_and_get_previous(task_id):
+        """Deletes the task and returns the deleted document (None if not found)."""
+        return get_db().tasks.find_one_and_delete({'_id': ObjectId(task_id)})
+
+    @staticmethod
+    def bulk_write(requests, ordered=True):
+        return get_db().tasks.bulk_write(requests, ordered=ordered)
+
     @staticmethod
     def delete_task(task_id):
-        return db.tasks.delete_one({'_id': ObjectId(task_id)})
\ No newline at end of file
+        return get_db().tasks.delete_one({'_id': ObjectId(task_id)})
\ No newline at end of file
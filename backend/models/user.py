@@ -1,10 +1,7 @@
-from pymongo import MongoClient
 from bson.objectid import ObjectId
 from werkzeug.security import generate_password_hash, check_password_hash
-from ..config import Config
+from .db import get_db
 
-client = MongoClient(Config.MONGO_URI)
-db = client.get_default_database()
 
 class User:
     def __init__(self, username, email, password):
@@ -18,11 +15,11 @@ class User:
             'email': self.email,
             'password': self.password_hash
         }
-        return db.users.insert_one(user_data)
+        return get_db().users.insert_one(user_data)
     
     @staticmethod
     def find_by_email(email):
-        return db.users.find_one({'email': email})
+        return get_db().users.find_one({'email': email})
     
     @staticmethod
     def check_password(user, password):
@@ -30,4 +27,4 @@ class User:
     
     @staticmethod
     def find_by_id(user_id):
-        return db.users.find_one({'_id': ObjectId(user_id)})
\ No newline at end of file
+        return get_db().users.find_one({'_id': ObjectId(user_id)})
\ No newline at end of file
@@ -1,20 +1,34 @@
-from flask import Blueprint, request, jsonify, render_template # Note: render_template is used for the assistant page if in this file
+from flask import Blueprint, request, jsonify, render_template, Response, stream_with_context # Note: render_template is used for the assistant page if in this file
 from flask_jwt_extended import jwt_required, get_jwt_identity
 
 # Import services
 from ..services.ai_service import (
     generate_task_summary, 
     generate_detailed_summary, 
-    get_priority_ranking
+    get_priority_ranking,
+    get_ai_cache_stats,
+    get_ai_client_stats,
+    stream_detailed_summary,
+    _api_key_check
 )
+from ..services.ai_stream_service import stream_stats
 from ..services.task_service import get_task_by_id, update_task
 from ..services.subtask_service import generate_subtasks_only
+from ..services.ai_batch_service import summarize_batch
+from ..services.job_service import wants_async, enqueue_job
 
 # Import the Conversation model (if used by the assistant page route, which is often in app.py or a different blueprint)
 from ..models.conversation import Conversation 
 
 ai_bp = Blueprint('ai', __name__)
 
+def _enqueue(job_type, payload):
+    """Async mode (?async=true): queue the work for worker.py and return 202 with the job's status URL."""
+    response, status_code = enqueue_job(
+        get_jwt_identity(), job_type, payload, idempotency_key=request.headers.get('Idempotency-Key')
+    )
+    return jsonify(response), status_code
+
 # --- 1. Summarize (Concise) ---
 @ai_bp.route('/ai/summarize', methods=['POST'])
 @jwt_required()
@@ -26,6 +40,9 @@ def summarize_task():
     if not description:
         return jsonify({'error': 'Task description is required'}), 400
     
+    if wants_async(request.args, data):
+        return _enqueue('summarize', {'description': description, 'task_id': task_id})
+    
     summary = generate_task_summary(description)
     
     if summary.startswith("Error:") or summary.startswith("API key not configured"):
@@ -40,6 +57,17 @@ def summarize_task():
     
     return jsonify({'summary': summary}), 200
 
+# --- 1b. Summarize many tasks at once ---
+@ai_bp.route('/ai/summarize/batch', methods=['POST'])
+@jwt_required()
+def summarize_batch_route():
+    """Summarizes up to AI_BATCH_MAX_ITEMS items ({"task_id"} and/or {"description"}) concurrently."""
+    data = request.get_json(silent=True) or {}
+    if wants_async(request.args, data):
+        return _enqueue('summarize_batch', {'items': data.get('items')})
+    response, status_code = summarize_batch(get_jwt_identity(), data.get('items'))
+    return jsonify(response), status_code
+
 # --- 2. Summarize (Detailed/Point-Form) ---
 @ai_bp.route('/ai/summarize-detailed', methods=['POST'])
 @jwt_required()
@@ -50,6 +78,9 @@ def summarize_task_detailed():
     if not description:
         return jsonify({'error': 'Task description is required'}), 400
     
+    if wants_async(request.args, data):
+        return _enqueue('summarize_detailed', {'description': description})
+    
     summary_points = generate_detailed_summary(description)
     
     if len(summary_points) == 1 and (summary_points[0].startswith("Error:") or summary_points[0].startswith("API key not configured")):
@@ -57,6 +88,25 @@ def summarize_task_detailed():
     
     return jsonify({'summary': summary_points}), 200
 
+# --- 2b. Summarize (Detailed), streamed as Server-Sent Events ---
+@ai_bp.route('/ai/summarize-detailed/stream', methods=['POST'])
+@jwt_required()
+def summarize_task_detailed_stream():
+    data = request.get_json(silent=True) or {}
+    description = data.get('description')
+    
+    if not description:
+        return jsonify({'error': 'Task description is required'}), 400
+    error_check = _api_key_check()
+    if error_check:
+        return jsonify({'error': error_check}), 500
+    
+    return Response(
+        stream_with_context(stream_detailed_summary(description)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 # --- 3. Subtask Generation (Sandbox/No DB Save) ---
 @ai_bp.route('/ai/generate-subtasks-only', methods=['POST'])
 @jwt_required()
@@ -67,6 +117,9 @@ def generate_subtasks_sandbox():
     if not description:
         return jsonify({'error': 'Task description is required'}), 400
         
+    if wants_async(request.args, data):
+        return _enqueue('subtasks_only', {'description': description})
+    
     response, status_code = generate_subtasks_only(description, get_jwt_identity())
     
     return jsonify(response), status_code
@@ -82,12 +135,36 @@ def prioritize_tasks_route():
     if not tasks_data or not isinstance(tasks_data, list):
         return jsonify({'error': 'A list of tasks is required for prioritization'}), 400
     
-    response, status_code = get_priority_ranking(tasks_data)
+    if wants_async(request.args, data):
+        return _enqueue('prioritize', {'tasks': tasks_data})
+    
+    response, status_code = get_priority_ranking(tasks_data, get_jwt_identity())
     
     if 'error' in response:
         return jsonify({'error': response['error']}), status_code
 
-    return jsonify({'ranking_markdown': response['ranking_markdown'], 'message': response['message']}), status_code
+    return jsonify(response), status_code
+
+# --- 5. AI Response Cache Stats ---
+@ai_bp.route('/ai/cache-stats', methods=['GET'])
+@jwt_required()
+def ai_cache_stats_route():
+    """Reports this worker's AI cache hit ratio and the upstream latency it saved."""
+    return jsonify({'aiCache': get_ai_cache_stats()}), 200
+
+# --- 6. Streaming Latency Stats ---
+@ai_bp.route('/ai/stream-stats', methods=['GET'])
+@jwt_required()
+def ai_stream_stats_route():
+    """Time-to-first/last-token percentiles and cancellations of this worker's streamed AI responses."""
+    return jsonify({'streams': stream_stats.stats()}), 200
+
+# --- 7. AI Client Health ---
+@ai_bp.route('/ai/client-stats', methods=['GET'])
+@jwt_required()
+def ai_client_stats_route():
+    """AI provider and model in use, with its circuit breaker state and retry counts (or simulated load for local)."""
+    return jsonify({'aiClient': get_ai_client_stats()}), 200
 
 # --- Note: The assistant route is typically handled in a separate blueprint. ---
 # If you have assistant routes defined here, they may cause other conflicts.
@@ -1,11 +1,15 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, jsonify, request
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..services.analytics_service import (
     get_core_metrics,
     get_priority_distribution,
     get_weekly_completion_trend,
-    get_day_of_week_activity # 💡 NEW IMPORT
+    get_day_of_week_activity, # 💡 NEW IMPORT
+    get_dashboard,
+    get_cache_stats,
+    clamp_window
 )
+from ..config import Config
 
 analytics_bp = Blueprint('analytics', __name__)
 
@@ -28,9 +32,10 @@ def get_distribution_route():
 @analytics_bp.route('/analytics/trends', methods=['GET'])
 @jwt_required()
 def get_trends_route():
-    """Fetches task completion counts over the last 7 days."""
+    """Fetches task completion counts over the last 7 days (or ?days=N)."""
     user_id = get_jwt_identity()
-    trends = get_weekly_completion_trend(user_id)
+    days = clamp_window(request.args.get('days'), Config.ANALYTICS_TREND_DAYS_DEFAULT)
+    trends = get_weekly_completion_trend(user_id, days)
     return jsonify({'completionTrends': trends}), 200
 
 @analytics_bp.route('/analytics/activity', methods=['GET']) # 💡 NEW ROUTE
@@ -38,5 +43,24 @@ def get_trends_route():
 def get_activity_route():
     """Fetches Day-of-Week activity for the heatmap/bar chart."""
     user_id = get_jwt_identity()
-    activity = get_day_of_week_activity(user_id)
-    return jsonify({'dayOfWeekActivity': activity}), 200
\ No newline at end of file
+    days = clamp_window(request.args.get('days'), Config.ANALYTICS_ACTIVITY_DAYS_DEFAULT)
+    activity = get_day_of_week_activity(user_id, days)
+    return jsonify({'dayOfWeekActivity': activity}), 200
+
+@analytics_bp.route('/analytics/dashboard', methods=['GET'])
+@jwt_required()
+def get_dashboard_route():
+    """Fetches every dashboard widget in one $facet aggregation (?trend_days=N&activity_days=N)."""
+    user_id = get_jwt_identity()
+    dashboard = get_dashboard(
+        user_id,
+        trend_days=request.args.get('trend_days'),
+        activity_days=request.args.get('activity_days')
+    )
+    return jsonify(dashboard), 200
+
+@analytics_bp.route('/analytics/cache-stats', methods=['GET'])
+@jwt_required()
+def get_cache_stats_route():
+    """Reports this worker's analytics cache hit/miss/eviction counters."""
+    return jsonify({'analyticsCache': get_cache_stats()}), 200
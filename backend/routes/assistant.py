@@ -1,7 +1,8 @@
 # routes/assistant.py
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
-from ..services.assistant_service import generate_assistant_response
+from ..services.assistant_service import generate_assistant_response, stream_assistant_response
+from ..services.ai_service import _api_key_check
 
 assistant_bp = Blueprint('assistant', __name__)
 
@@ -19,6 +20,26 @@ def chat_route():
     response, status_code = generate_assistant_response(user_id, user_message)
     return jsonify(response), status_code
 
+@assistant_bp.route('/assistant/chat/stream', methods=['POST'])
+@jwt_required()
+def chat_stream_route():
+    """Streaming variant of /assistant/chat: Server-Sent Events with 'chunk', then 'done' (or 'error')."""
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    user_message = data.get('message')
+
+    if not user_message:
+        return jsonify({'error': 'Message cannot be empty'}), 400
+    error_check = _api_key_check()
+    if error_check:
+        return jsonify({'error': error_check}), 500
+
+    return Response(
+        stream_with_context(stream_assistant_response(user_id, user_message)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
 @assistant_bp.route('/assistant/history', methods=['GET'])
 @jwt_required()
 def get_history_route():
@@ -0,0 +1,52 @@
+from flask import Blueprint, request, jsonify, Response, stream_with_context
+from flask_jwt_extended import jwt_required, get_jwt_identity, verify_jwt_in_request
+from ..config import Config
+from ..services.event_service import (
+    broker, stream_events, parse_last_event_id, issue_stream_token, verify_stream_token
+)
+
+events_bp = Blueprint('events', __name__)
+
+@events_bp.route('/events/token', methods=['POST'])
+@jwt_required()
+def events_token():
+    """Short-lived token for opening GET /api/events?token=... (EventSource cannot set an Authorization header)."""
+    return jsonify({'token': issue_stream_token(get_jwt_identity()),
+                    'expires_in': Config.EVENTS_TOKEN_TTL_SECONDS}), 200
+
+@events_bp.route('/events', methods=['GET'])
+def events_stream():
+    """
+    Server-Sent Events stream of the user's triggered reminders and task changes.
+    Authenticated by an Authorization header, or by a stream token from POST /api/events/token;
+    access tokens are never accepted in the URL, so they cannot end up in proxy or access logs.
+    """
+    if request.headers.get('Authorization'):
+        verify_jwt_in_request(locations=['headers'])
+        user_id = get_jwt_identity()
+    else:
+        user_id = verify_stream_token(request.args.get('token'))
+        if user_id is None:
+            return jsonify({'error': 'A valid stream token is required'}), 401
+
+    sub = broker.subscribe(user_id)
+    if sub is None:
+        return jsonify({'error': 'Too many open event streams, retry later'}), 503, {'Retry-After': '5'}
+
+    last_event_id = parse_last_event_id(
+        request.headers.get('Last-Event-ID') or request.args.get('last_event_id')
+    )
+    response = Response(
+        stream_with_context(stream_events(sub, last_event_id)),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+    # Frees the slot even if the client disconnects before the generator starts
+    response.call_on_close(lambda: broker.unsubscribe(sub))
+    return response
+
+@events_bp.route('/events/stats', methods=['GET'])
+@jwt_required()
+def events_stats():
+    """Reports this worker's open stream count against its limit."""
+    return jsonify({'events': broker.stats()}), 200
@@ -0,0 +1,12 @@
+from flask import Blueprint, jsonify
+from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..services.job_service import get_job
+
+jobs_bp = Blueprint('jobs', __name__)
+
+@jobs_bp.route('/jobs/<job_id>', methods=['GET'])
+@jwt_required()
+def get_job_route(job_id):
+    """Status (and, once finished, result or error) of a background job started with ?async=true."""
+    response, status_code = get_job(job_id, get_jwt_identity())
+    return jsonify(response), status_code
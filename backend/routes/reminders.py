@@ -1,7 +1,11 @@
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
 from flask import Blueprint, request, jsonify
 from flask_jwt_extended import jwt_required, get_jwt_identity
+from ..services.task_service import build_task_filters
 from ..services.reminder_service import (
     add_reminder, 
+    add_reminders_bulk,
     get_user_reminders, 
     dismiss_reminder,
     get_triggered_reminders # 💡 ADDED IMPORT for the Alerts page
@@ -29,12 +33,58 @@ def create_reminder_route():
     )
     return jsonify(response), status_code
 
+@reminder_bp.route('/reminders/bulk', methods=['POST'])
+@jwt_required()
+def create_reminders_bulk_route():
+    """
+    Creates the same reminder rule for many tasks at once.
+    Body: {"task_ids": [...]} or {"filter": {"status", "priority", "tags", "due_from", "due_to"}},
+    plus {"rule": {"reminder_type", "trigger_value", "message"}}.
+    """
+    user_id = get_jwt_identity()
+    data = request.get_json(silent=True) or {}
+    rule = data.get('rule') or {}
+    if not rule.get('trigger_value'):
+        return jsonify({'error': 'rule.trigger_value is required'}), 400
+
+    task_ids = data.get('task_ids')
+    if task_ids is not None:
+        if not isinstance(task_ids, list) or not task_ids:
+            return jsonify({'error': 'task_ids must be a non-empty list'}), 400
+        try:
+            filters = {'_id': {'$in': [ObjectId(task_id) for task_id in task_ids]}}
+        except (InvalidId, TypeError):
+            return jsonify({'error': 'task_ids contains an invalid ID'}), 400
+    else:
+        task_filter = data.get('filter')
+        if not isinstance(task_filter, dict):
+            return jsonify({'error': 'Either task_ids or filter is required'}), 400
+        try:
+            filters = build_task_filters(
+                status=task_filter.get('status'),
+                priority=task_filter.get('priority'),
+                tags=task_filter.get('tags'),
+                due_from=task_filter.get('due_from'),
+                due_to=task_filter.get('due_to')
+            )
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
+
+    response, status_code = add_reminders_bulk(
+        user_id, filters, rule['trigger_value'],
+        message=rule.get('message'),
+        reminder_type=rule.get('reminder_type', 'Relative_Hours_Before'),
+        requested_ids=[str(task_id) for task_id in task_ids] if task_ids is not None else None
+    )
+    return jsonify(response), status_code
+
 @reminder_bp.route('/reminders', methods=['GET'])
 @jwt_required()
 def get_reminders_route():
-    """Endpoint to get all reminders for the current user (for the Reminders page)."""
+    """Endpoint to get all reminders for the current user (for the Reminders page); ?include_archived=true adds archived ones."""
     user_id = get_jwt_identity()
-    reminders = get_user_reminders(user_id)
+    include_archived = request.args.get('include_archived', 'false').lower() in ('1', 'true', 'yes')
+    reminders = get_user_reminders(user_id, include_archived)
     return jsonify({'reminders': reminders}), 200
 
 @reminder_bp.route('/reminders/<reminder_id>/dismiss', methods=['POST'])
@@ -5,6 +5,7 @@ from ..services.subtask_service import (
     mark_subtask_status, delete_subtask, create_subtask_manual
 )
 from ..services.task_service import get_task_by_id # Used for task existence check
+from ..services.job_service import wants_async, enqueue_job
 
 subtask_bp = Blueprint('subtasks', __name__)
 
@@ -30,6 +31,14 @@ def generate_subtasks(task_id):
     if not task_description:
         return jsonify({'error': 'Task description is empty. Cannot generate subtasks.'}), 400
 
+    # 2a. Async mode: a background worker generates and saves the subtasks
+    if wants_async(request.args, request.get_json(silent=True)):
+        response, status_code = enqueue_job(
+            user_id, 'generate_subtasks', {'task_id': task_id, 'description': task_description},
+            idempotency_key=request.headers.get('Idempotency-Key')
+        )
+        return jsonify(response), status_code
+
     # 2. Call the AI service (it handles saving now)
     response, status_code = generate_subtasks_with_ai(task_id, task_description, user_id)
     
@@ -43,13 +52,13 @@ def complete_subtask(subtask_id):
     # For robust REST API, let's read the status from the body if provided.
     data = request.get_json()
     status = data.get('status', 'Completed') 
-    return mark_subtask_status(subtask_id, status)
+    return mark_subtask_status(subtask_id, status, get_jwt_identity())
 
 @subtask_bp.route('/subtasks/<subtask_id>', methods=['DELETE'])
 @jwt_required()
 def remove_subtask(subtask_id):
     """Delete a subtask."""
-    return delete_subtask(subtask_id)
+    return delete_subtask(subtask_id, get_jwt_identity())
 
 @subtask_bp.route('/tasks/<task_id>/subtasks', methods=['POST'])
 @jwt_required()
@@ -1,9 +1,10 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, stream_with_context
 from flask_jwt_extended import jwt_required, get_jwt_identity
 from ..services.task_service import (
-    create_task, get_user_tasks, get_task_by_id, 
-    update_task, delete_task, mark_task_completed, get_alert_tasks
+    create_task, get_user_tasks, get_user_tasks_page, build_task_filters, get_task_by_id, 
+    update_task, delete_task, mark_task_completed, get_alert_tasks, bulk_mutate_tasks
 )
+from ..services.transfer_service import export_user_tasks, import_user_tasks
 
 tasks_bp = Blueprint('tasks', __name__)
 
@@ -32,14 +33,73 @@ def add_task():
 @jwt_required()
 def get_tasks():
     user_id = get_jwt_identity()
-    tasks = get_user_tasks(user_id)
-    return jsonify({'tasks': tasks}), 200
+    args = request.args
+    try:
+        filters = build_task_filters(
+            status=args.get('status'),
+            priority=args.get('priority'),
+            tags=args.get('tags'),
+            due_from=args.get('due_from'),
+            due_to=args.get('due_to')
+        )
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+
+    # Legacy clients send no paging parameters and receive the full list
+    if not any(key in args for key in ('limit', 'cursor', 'sort', 'order')):
+        tasks = get_user_tasks(user_id, filters)
+        return jsonify({'tasks': tasks}), 200
+
+    response, status_code = get_user_tasks_page(
+        user_id,
+        filters,
+        sort=args.get('sort', 'created_at'),
+        order=args.get('order', 'asc'),
+        limit=args.get('limit'),
+        cursor=args.get('cursor')
+    )
+    return jsonify(response), status_code
+
+@tasks_bp.route('/tasks/export', methods=['GET'])
+@jwt_required()
+def export_tasks():
+    """Streams all of the user's tasks (with subtasks and reminders) as NDJSON or a JSON array."""
+    user_id = get_jwt_identity()
+    fmt = request.args.get('format', 'ndjson')
+    if fmt not in ('ndjson', 'json'):
+        return jsonify({'error': 'format must be ndjson or json'}), 400
+
+    mimetype = 'application/x-ndjson' if fmt == 'ndjson' else 'application/json'
+    return Response(
+        stream_with_context(export_user_tasks(user_id, fmt)),
+        mimetype=mimetype,
+        headers={'Content-Disposition': f'attachment; filename=tasks.{fmt}'}
+    )
+
+@tasks_bp.route('/tasks/import', methods=['POST'])
+@jwt_required()
+def import_tasks():
+    """Imports an export body (NDJSON or JSON array), reading the request stream incrementally."""
+    user_id = get_jwt_identity()
+    response, status_code = import_user_tasks(user_id, request.stream, request.args.get('batch_size'))
+    return jsonify(response), status_code
+
+@tasks_bp.route('/tasks/bulk', methods=['POST'])
+@jwt_required()
+def bulk_tasks():
+    """Applies many create/update/complete/delete operations in one round-trip."""
+    user_id = get_jwt_identity()
+    data = request.get_json() or {}
+    response, status_code = bulk_mutate_tasks(
+        user_id, data.get('operations'), ordered=bool(data.get('ordered', True))
+    )
+    return jsonify(response), status_code
 
 @tasks_bp.route('/tasks/alerts', methods=['GET'])
 @jwt_required()
 def get_alerts():
     user_id = get_jwt_identity()
-    alert_tasks = get_alert_tasks(user_id)
+    alert_tasks = get_alert_tasks(user_id, request.args.get('limit'))
     return jsonify(alert_tasks), 200
 
 @tasks_bp.route('/tasks/<task_id>', methods=['GET'])
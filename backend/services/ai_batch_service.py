@@ -0,0 +1,108 @@
+# services/ai_batch_service.py
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from ..config import Config
+from ..models.task import Task
+from ..models.data_version import DataVersion
+from ..models.daily_stats import DailyStats, task_contributions
+from ..models.normalize import normalize_user_id
+from .ai_service import generate_task_summary
+from .event_service import publish_many
+
+# Shared by every batch request in this worker, so AI_BATCH_CONCURRENCY bounds the
+# number of concurrent upstream calls however many batches are running.
+_executor = ThreadPoolExecutor(max_workers=Config.AI_BATCH_CONCURRENCY, thread_name_prefix='ai-batch')
+
+def _resolve_items(items, user_id):
+    """
+    Validates the batch items and loads every referenced task with one query.
+    Returns (jobs, tasks, results): jobs are (index, task_oid or None, description, store) to summarize,
+    tasks maps the loaded task ids to their documents, and results holds the final outcome of items
+    that were rejected up front. Only summaries of a task's stored description are stored (store=True).
+    """
+    results = [None] * len(items)
+    parsed = []
+    for index, item in enumerate(items):
+        if not isinstance(item, dict):
+            results[index] = {'index': index, 'status': 'invalid', 'error': 'Each item must be an object'}
+            continue
+        task_oid = None
+        if item.get('task_id'):
+            try:
+                task_oid = ObjectId(item['task_id'])
+            except (InvalidId, TypeError):
+                results[index] = {'index': index, 'status': 'invalid', 'error': 'Invalid task_id'}
+                continue
+        elif not item.get('description'):
+            results[index] = {'index': index, 'status': 'invalid', 'error': 'task_id or description is required'}
+            continue
+        parsed.append((index, task_oid, item.get('description')))
+
+    referenced = [task_oid for _, task_oid, _ in parsed if task_oid is not None]
+    tasks = {task['_id']: task for task in Task.find_by_user_id(user_id, {'_id': {'$in': referenced}})} if referenced else {}
+
+    jobs = []
+    for index, task_oid, description in parsed:
+        if task_oid is not None and task_oid not in tasks:
+            results[index] = {'index': index, 'status': 'not_found', 'task_id': str(task_oid)}
+            continue
+        # An explicit description wins, but its summary is not written to the task it names
+        if description or task_oid is None:
+            jobs.append((index, task_oid, description, False))
+        else:
+            jobs.append((index, task_oid, tasks[task_oid].get('description', ''), True))
+    return jobs, tasks, results
+
+def summarize_batch(user_id, items):
+    """
+    Summarizes up to AI_BATCH_MAX_ITEMS tasks or descriptions concurrently on the bounded pool.
+    Summaries of task items without an explicit description are stored with one tasks bulk_write,
+    and the daily rollup follows their new updated_at like every other task write.
+    Returns ({'results': [...per item...], 'summary': {...}}, status_code).
+    """
+    if not isinstance(items, list) or not items:
+        return {'error': 'items must be a non-empty list'}, 400
+    if len(items) > Config.AI_BATCH_MAX_ITEMS:
+        return {'error': f"At most {Config.AI_BATCH_MAX_ITEMS} items are allowed per request"}, 400
+
+    user_id = normalize_user_id(user_id)
+    started = time.perf_counter()
+    jobs, tasks, results = _resolve_items(items, user_id)
+
+    futures = [(index, task_oid, store, _executor.submit(generate_task_summary, description))
+               for index, task_oid, description, store in jobs]
+
+    now = datetime.now()
+    requests, stored_ids, rollup = [], [], []
+    for index, task_oid, store, future in futures:
+        try:
+            summary = future.result()
+        except Exception as e:
+            summary = f"Error: An unexpected error occurred. Details: {e}"
+        task_id = str(task_oid) if task_oid is not None else None
+        if summary.startswith('Error:'):
+            results[index] = {'index': index, 'status': 'error', 'task_id': task_id, 'error': summary}
+            continue
+        results[index] = {'index': index, 'status': 'ok', 'task_id': task_id, 'summary': summary}
+        if store:
+            requests.append(UpdateOne({'_id': task_oid, 'user_id': user_id}, {'$set': {'summary': summary, 'updated_at': now}}))
+            stored_ids.append(task_id)
+            before = tasks[task_oid]
+            rollup += task_contributions(before, -1) + task_contributions({**before, 'updated_at': now}, 1)
+
+    if requests:
+        Task.bulk_write(requests, ordered=False)
+        DailyStats.apply_contributions(user_id, rollup)
+        DataVersion.bump(user_id)
+        publish_many([(user_id, 'task.updated', {'task_id': task_id, 'fields': ['summary']}) for task_id in stored_ids])
+
+    summary = {status: sum(1 for r in results if r['status'] == status)
+               for status in ('ok', 'error', 'not_found', 'invalid')}
+    summary['stored'] = len(requests)
+    summary['elapsed_ms'] = round((time.perf_counter() - started) * 1000, 1)
+    status_code = 200 if summary['ok'] == len(items) else 207
+    return {'results': results, 'summary': summary}, status_code
@@ -0,0 +1,153 @@
+# services/ai_cache_service.py
+import hashlib
+import json
+import threading
+import time
+from pymongo.errors import PyMongoError
+from ..config import Config
+from ..models.ai_cache import AICacheEntry
+from .cache_service import TTLCache
+
+def normalize_text(text):
+    """Collapses whitespace so re-submissions that only differ in spacing share a cache entry."""
+    return ' '.join(str(text or '').split())
+
+def cache_key(kind, template, model, text):
+    """Content address of one AI request: hash of the normalized input, the prompt template and the model."""
+    raw = json.dumps([kind, template, model, normalize_text(text)], ensure_ascii=False)
+    return hashlib.sha256(raw.encode('utf-8')).hexdigest()
+
+class _Flight:
+    """An upstream call in progress; identical concurrent requests wait for its result."""
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.compute_ms = 0.0
+        self.failed = False
+
+class AIResponseCache:
+    """
+    Two-tier cache for AI responses: a per-process LRU (TTLCache) in front of the shared
+    ai_cache collection. Concurrent requests for the same key are collapsed into one upstream
+    call (single flight). Only values accepted by `cacheable` are stored, so errors are retried.
+    """
+
+    def __init__(self, max_entries=None, memory_ttl_seconds=None, store_ttl_seconds=None, enabled=None):
+        self.enabled = Config.AI_CACHE_ENABLED if enabled is None else enabled
+        self.store_ttl_seconds = store_ttl_seconds or Config.AI_CACHE_TTL_SECONDS
+        self._memory = TTLCache(max_entries or Config.AI_CACHE_MAX_ENTRIES,
+                                memory_ttl_seconds or Config.AI_CACHE_MEMORY_TTL_SECONDS)
+        self._flights = {}
+        self._lock = threading.Lock()
+        self._counters = {'requests': 0, 'memoryHits': 0, 'storeHits': 0, 'sharedInFlight': 0, 'upstreamCalls': 0}
+        self._latency_saved_ms = 0.0
+        self._upstream_ms = 0.0
+
+    def _count(self, name, saved_ms=0.0, upstream_ms=0.0):
+        with self._lock:
+            self._counters[name] += 1
+            self._latency_saved_ms += saved_ms or 0.0
+            self._upstream_ms += upstream_ms
+
+    def get_or_compute(self, kind, template, model, text, compute, cacheable=lambda value: True):
+        """Returns the cached response for (kind, template, model, text), calling compute() on a miss."""
+        if not self.enabled:
+            return compute()
+        key = cache_key(kind, template, model, text)
+        self._count('requests')
+
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._count('memoryHits', saved_ms=entry[1])
+            return entry[0]
+
+        with self._lock:
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+
+        if not leader:
+            if flight.done.wait(Config.AI_CACHE_FLIGHT_WAIT_SECONDS) and not flight.failed:
+                self._count('sharedInFlight', saved_ms=flight.compute_ms)
+                return flight.value
+            return compute()  # The leader failed or is too slow: call upstream ourselves
+
+        try:
+            try:
+                stored = AICacheEntry.get(key)
+            except PyMongoError as e:
+                print(f"[ai-cache] store lookup failed, treating as a miss: {e}")
+                stored = None
+            if stored is not None:
+                flight.value, flight.compute_ms = stored['value'], stored.get('compute_ms', 0.0)
+                self._memory.set(key, (flight.value, flight.compute_ms))
+                self._count('storeHits', saved_ms=flight.compute_ms)
+                return flight.value
+
+            started = time.perf_counter()
+            value = compute()
+            flight.value, flight.compute_ms = value, round((time.perf_counter() - started) * 1000, 1)
+            self._count('upstreamCalls', upstream_ms=flight.compute_ms)
+            if cacheable(value):
+                self._memory.set(key, (value, flight.compute_ms))
+                try:
+                    AICacheEntry.put(key, kind, model, value, flight.compute_ms, self.store_ttl_seconds)
+                except PyMongoError as e:
+                    print(f"[ai-cache] store write failed: {e}")
+            return value
+        except Exception:
+            flight.failed = True
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            flight.done.set()
+
+    def lookup(self, kind, template, model, text):
+        """Cached value or None, without computing (used by streaming endpoints before opening a stream)."""
+        if not self.enabled:
+            return None
+        key = cache_key(kind, template, model, text)
+        self._count('requests')
+        entry = self._memory.get(key)
+        if entry is not None:
+            self._count('memoryHits', saved_ms=entry[1])
+            return entry[0]
+        try:
+            stored = AICacheEntry.get(key)
+        except PyMongoError as e:
+            print(f"[ai-cache] store lookup failed, treating as a miss: {e}")
+            stored = None
+        if stored is None:
+            return None
+        self._memory.set(key, (stored['value'], stored.get('compute_ms', 0.0)))
+        self._count('storeHits', saved_ms=stored.get('compute_ms', 0.0))
+        return stored['value']
+
+    def store(self, kind, template, model, text, value, compute_ms):
+        """Stores a value computed outside get_or_compute (e.g. assembled from a stream)."""
+        if not self.enabled:
+            return
+        key = cache_key(kind, template, model, text)
+        self._count('upstreamCalls', upstream_ms=compute_ms)
+        self._memory.set(key, (value, compute_ms))
+        try:
+            AICacheEntry.put(key, kind, model, value, compute_ms, self.store_ttl_seconds)
+        except PyMongoError as e:
+            print(f"[ai-cache] store write failed: {e}")
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+            saved, upstream = self._latency_saved_ms, self._upstream_ms
+        hits = counters['memoryHits'] + counters['storeHits'] + counters['sharedInFlight']
+        return {
+            **counters,
+            'hitRatio': round(hits / counters['requests'], 3) if counters['requests'] else None,
+            'latencySavedMs': round(saved, 1),
+            'avgUpstreamMs': round(upstream / counters['upstreamCalls'], 1) if counters['upstreamCalls'] else None,
+            'memory': self._memory.stats()
+        }
+
+ai_cache = AIResponseCache()
@@ -0,0 +1,241 @@
+# services/ai_client.py
+import random
+import threading
+import time
+from ..config import Config
+
+# Wraps an AI SDK client (see ai_providers.py) so every caller gets the same protection:
+# a client-side token bucket, retries with jittered exponential backoff on 429/5xx/timeouts,
+# an overall per-call deadline and a circuit breaker that fails fast while upstream is down.
+# For the Gemini SDK it mirrors client.models.generate_content / generate_content_stream;
+# other SDKs run their calls through call() / open_stream() directly.
+
+class AIUnavailableError(Exception):
+    """Raised without calling upstream: circuit open, rate limit wait exceeded or deadline spent."""
+
+
+class TokenBucket:
+    def __init__(self, rate_per_second, capacity):
+        self.rate = float(rate_per_second)
+        self.capacity = float(capacity)
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def acquire(self, max_wait_seconds):
+        """Takes one token, waiting up to max_wait_seconds. Returns False if none became available in time."""
+        deadline = time.monotonic() + max_wait_seconds
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return True
+                wait = (1 - self._tokens) / self.rate
+            if now + wait > deadline:
+                return False
+            time.sleep(wait)
+
+    def available(self):
+        with self._lock:
+            self._refill(time.monotonic())
+            return round(self._tokens, 2)
+
+
+class CircuitBreaker:
+    """
+    closed -> open after `failure_threshold` consecutive upstream failures; open rejects calls for
+    `reset_seconds`, then half_open lets a single probe through: success closes, failure re-opens.
+    """
+    CLOSED, OPEN, HALF_OPEN = 'closed', 'open', 'half_open'
+
+    def __init__(self, failure_threshold, reset_seconds):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = None
+        self._probe_in_flight = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self._state = self.HALF_OPEN
+                self._probe_in_flight = False
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.HALF_OPEN and not self._probe_in_flight:
+                self._probe_in_flight = True
+                return True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._probe_in_flight = False
+
+    def release_probe(self):
+        """Ends a half-open probe that finished without an upstream verdict, so the next call can probe."""
+        with self._lock:
+            self._probe_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._probe_in_flight = False
+
+    def state(self):
+        with self._lock:
+            retry_in = None
+            if self._state == self.OPEN:
+                retry_in = round(max(0.0, self.reset_seconds - (time.monotonic() - self._opened_at)), 1)
+            return {'state': self._state, 'consecutiveFailures': self._failures, 'retryInSeconds': retry_in}
+
+
+def is_retryable(error):
+    """429, 408 and 5xx responses, timeouts and connection failures are worth retrying; other 4xx are not."""
+    code = getattr(error, 'code', None)
+    if not isinstance(code, int):
+        code = getattr(error, 'status_code', None)  # cohere's ApiError
+    if isinstance(code, int):
+        return code in (408, 429) or code >= 500
+    if isinstance(error, (TimeoutError, ConnectionError)):
+        return True
+    name = type(error).__name__
+    return any(marker in name for marker in ('Timeout', 'Connect', 'Network', 'RemoteProtocol'))
+
+
+class _Models:
+    def __init__(self, owner):
+        self._owner = owner
+
+    def generate_content(self, **kwargs):
+        return self._owner.call(lambda: self._owner.raw.models.generate_content(**kwargs))
+
+    def generate_content_stream(self, **kwargs):
+        return self._owner.open_stream(lambda: self._owner.raw.models.generate_content_stream(**kwargs))
+
+
+class ResilientAIClient:
+    def __init__(self, raw_client, rate_per_second=None, burst=None, rate_wait_seconds=None, max_retries=None,
+                 retry_base_seconds=None, retry_max_seconds=None, deadline_seconds=None,
+                 breaker_threshold=None, breaker_reset_seconds=None, sleep=time.sleep):
+        self.raw = raw_client
+        self.models = _Models(self)
+        self.bucket = TokenBucket(rate_per_second or Config.AI_RATE_LIMIT_PER_SECOND, burst or Config.AI_RATE_LIMIT_BURST)
+        self.breaker = CircuitBreaker(breaker_threshold or Config.AI_BREAKER_FAILURE_THRESHOLD,
+                                      breaker_reset_seconds or Config.AI_BREAKER_RESET_SECONDS)
+        self.rate_wait_seconds = Config.AI_RATE_LIMIT_WAIT_SECONDS if rate_wait_seconds is None else rate_wait_seconds
+        self.max_retries = Config.AI_MAX_RETRIES if max_retries is None else max_retries
+        self.retry_base = retry_base_seconds or Config.AI_RETRY_BASE_SECONDS
+        self.retry_max = retry_max_seconds or Config.AI_RETRY_MAX_SECONDS
+        self.deadline_seconds = deadline_seconds or Config.AI_CALL_DEADLINE_SECONDS
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'attempts': 0, 'retries': 0, 'successes': 0, 'failures': 0,
+                          'rejectedOpen': 0, 'rateLimited': 0, 'deadlineExceeded': 0}
+
+    def _count(self, name):
+        with self._lock:
+            self._counters[name] += 1
+
+    def _backoff(self, attempt):
+        ceiling = min(self.retry_max, self.retry_base * (2 ** attempt))
+        return random.uniform(0, ceiling)  # Full jitter
+
+    def call(self, fn):
+        """Runs fn() (one upstream request) under the rate limit, breaker, retry policy and deadline."""
+        self._count('calls')
+        deadline = time.monotonic() + self.deadline_seconds
+        attempt = 0
+        while True:
+            # The rate limit token is taken first: a half-open breaker hands out a single probe,
+            # which must always end in record_success/record_failure/release_probe
+            if not self.bucket.acquire(min(self.rate_wait_seconds, max(0.0, deadline - time.monotonic()))):
+                self._count('rateLimited')
+                raise AIUnavailableError('AI request rate limit reached; try again shortly.')
+            if not self.breaker.allow():
+                self._count('rejectedOpen')
+                raise AIUnavailableError('AI service is temporarily unavailable (circuit open); try again shortly.')
+            self._count('attempts')
+            try:
+                result = fn()
+            except Exception as e:
+                if not is_retryable(e):
+                    self.breaker.record_success()  # Upstream answered; the request itself was bad
+                    self._count('failures')
+                    raise
+                self.breaker.record_failure()
+                delay = self._backoff(attempt)
+                past_deadline = time.monotonic() + delay >= deadline
+                if attempt >= self.max_retries or past_deadline:
+                    self._count('failures')
+                    if past_deadline:
+                        self._count('deadlineExceeded')
+                    raise
+                attempt += 1
+                self._count('retries')
+                self._sleep(delay)
+                continue
+            except BaseException:
+                self.breaker.release_probe()  # Interrupted (e.g. GeneratorExit): no verdict on upstream
+                raise
+            self.breaker.record_success()
+            self._count('successes')
+            return result
+
+    _EMPTY = object()
+
+    def open_stream(self, fn):
+        """
+        Opens a stream with the same protection. SDK streams are lazy, so the request is only sent
+        when the first chunk is pulled: that happens inside call(), which makes connection errors and
+        429/5xx responses before the first chunk retryable. Errors later in the stream are not retried.
+        """
+        def open_and_pull():
+            stream = fn()
+            try:
+                return stream, next(iter(stream), self._EMPTY)
+            except BaseException:
+                close = getattr(stream, 'close', None)
+                if close:
+                    close()
+                raise
+
+        stream, first = self.call(open_and_pull)
+        return self._guard_stream(stream, first)
+
+    def _guard_stream(self, stream, first):
+        try:
+            if first is self._EMPTY:
+                return
+            yield first
+            for chunk in stream:
+                yield chunk
+        except Exception as e:
+            if is_retryable(e):
+                self.breaker.record_failure()
+            raise
+        finally:
+            close = getattr(stream, 'close', None)
+            if close:
+                close()
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        return {
+            **counters,
+            'breaker': self.breaker.state(),
+            'rateLimit': {'perSecond': self.bucket.rate, 'burst': self.bucket.capacity, 'available': self.bucket.available()}
+        }
@@ -0,0 +1,222 @@
+# services/ai_providers.py
+import hashlib
+import math
+import random
+import re
+import threading
+import time
+from ..config import Config
+from .ai_client import ResilientAIClient
+
+# Every AI-calling service talks to one provider, chosen by Config.AI_PROVIDER:
+#   gemini - Google Gemini (google-genai), the default
+#   cohere - Cohere chat (the pinned `cohere` package)
+#   local  - deterministic offline backend with configurable latency/token distributions, for load tests
+# A provider exposes generate(prompt, system_instruction, kind) -> text and stream(...) -> iterator of
+# text chunks. `kind` names the expected output shape; real models get it from the prompt, while the
+# local backend uses it to return text the callers' parsers accept.
+
+try:
+    from google.genai.errors import APIError
+except ImportError:  # google-genai is only needed for the gemini provider
+    class APIError(Exception):
+        pass
+
+KIND_TEXT = 'text'          # Free prose (summaries, assistant replies)
+KIND_BULLETS = 'bullets'    # "* point" lines
+KIND_NUMBERED = 'numbered'  # "1. step" lines
+KIND_TABLE = 'table'        # Markdown table (priority ranking)
+
+
+class GeminiProvider:
+    name = 'gemini'
+    default_model = 'gemini-2.5-flash'  # A fast and efficient model for summarization
+
+    def __init__(self, api_key, model=None):
+        from google import genai
+        from google.genai import types
+        self._types = types
+        self.model = model or self.default_model
+        http_options = types.HttpOptions(
+            timeout=int(Config.AI_CALL_TIMEOUT_SECONDS * 1000),  # milliseconds
+            base_url=Config.GEMINI_BASE_URL or None
+        )
+        # Rate limiting, retries, deadline and circuit breaker for every call
+        self.client = ResilientAIClient(genai.Client(api_key=api_key, http_options=http_options))
+
+    def _config(self, system_instruction):
+        if not system_instruction:
+            return None
+        return self._types.GenerateContentConfig(system_instruction=system_instruction)
+
+    def generate(self, prompt, system_instruction=None, kind=KIND_TEXT):
+        response = self.client.models.generate_content(
+            model=self.model, contents=prompt, config=self._config(system_instruction)
+        )
+        return response.text or ''
+
+    def stream(self, prompt, system_instruction=None, kind=KIND_TEXT):
+        stream = self.client.models.generate_content_stream(
+            model=self.model, contents=prompt, config=self._config(system_instruction)
+        )
+        try:
+            for chunk in stream:
+                yield chunk.text or ''
+        finally:
+            stream.close()
+
+    def stats(self):
+        return {'provider': self.name, 'model': self.model, **self.client.stats()}
+
+
+class CohereProvider:
+    name = 'cohere'
+    default_model = 'command-r'
+
+    def __init__(self, api_key, model=None):
+        import cohere
+        self.model = model or self.default_model
+        self.raw = cohere.Client(api_key=api_key, timeout=Config.AI_CALL_TIMEOUT_SECONDS,
+                                 base_url=Config.COHERE_BASE_URL or None)
+        self.client = ResilientAIClient(self.raw)
+
+    def _kwargs(self, prompt, system_instruction):
+        kwargs = {'model': self.model, 'message': prompt}
+        if system_instruction:
+            kwargs['preamble'] = system_instruction
+        return kwargs
+
+    def generate(self, prompt, system_instruction=None, kind=KIND_TEXT):
+        kwargs = self._kwargs(prompt, system_instruction)
+        return self.client.call(lambda: self.raw.chat(**kwargs)).text or ''
+
+    def stream(self, prompt, system_instruction=None, kind=KIND_TEXT):
+        kwargs = self._kwargs(prompt, system_instruction)
+        stream = self.client.open_stream(lambda: self.raw.chat_stream(**kwargs))
+        try:
+            for event in stream:
+                if getattr(event, 'event_type', None) == 'text-generation':
+                    yield event.text or ''
+        finally:
+            stream.close()
+
+    def stats(self):
+        return {'provider': self.name, 'model': self.model, **self.client.stats()}
+
+
+_LOCAL_WORDS = (
+    'review plan draft update schedule confirm outline prepare test deploy document verify share '
+    'collect analyze prioritize finalize the task project team report requirements deadline scope '
+    'feedback milestone budget design notes results data meeting stakeholders progress risks next steps'
+).split()
+
+_TITLE_PATTERN = re.compile(r'"title":\s*"((?:[^"\\]|\\.)*)"')
+
+
+class LocalProvider:
+    """
+    Deterministic offline backend. The same (seed, model, system instruction, prompt) always yields
+    the same text and the same simulated timing, so load-test runs are reproducible:
+      - time to first token: log-normal around AI_LOCAL_LATENCY_MS (sigma AI_LOCAL_LATENCY_SIGMA)
+      - output length: normal(AI_LOCAL_TOKENS_MEAN, AI_LOCAL_TOKENS_STDDEV) tokens (words), at least 1
+      - each further token arrives AI_LOCAL_TOKEN_MS later
+    No network access or API key is needed.
+    """
+    name = 'local'
+    default_model = 'local-deterministic'
+
+    def __init__(self, model=None, seed=None, latency_ms=None, latency_sigma=None,
+                 tokens_mean=None, tokens_stddev=None, token_ms=None, sleep=time.sleep):
+        self.model = model or self.default_model
+        self.seed = Config.AI_LOCAL_SEED if seed is None else seed
+        self.latency_ms = Config.AI_LOCAL_LATENCY_MS if latency_ms is None else latency_ms
+        self.latency_sigma = Config.AI_LOCAL_LATENCY_SIGMA if latency_sigma is None else latency_sigma
+        self.tokens_mean = Config.AI_LOCAL_TOKENS_MEAN if tokens_mean is None else tokens_mean
+        self.tokens_stddev = Config.AI_LOCAL_TOKENS_STDDEV if tokens_stddev is None else tokens_stddev
+        self.token_ms = Config.AI_LOCAL_TOKEN_MS if token_ms is None else token_ms
+        self._sleep = sleep
+        self._lock = threading.Lock()
+        self._counters = {'calls': 0, 'streams': 0, 'tokens': 0, 'simulatedMs': 0.0}
+
+    def _rng(self, prompt, system_instruction):
+        digest = hashlib.sha256(f"{self.seed}\0{self.model}\0{system_instruction or ''}\0{prompt}".encode('utf-8')).digest()
+        return random.Random(int.from_bytes(digest[:8], 'big'))
+
+    @staticmethod
+    def _sentence(rng, n_words):
+        words = [rng.choice(_LOCAL_WORDS) for _ in range(max(1, n_words))]
+        return ' '.join(words).capitalize() + '.'
+
+    def _compose(self, rng, kind, n_tokens, prompt):
+        if kind == KIND_TABLE:
+            titles = [t.replace('\\"', '"') for t in _TITLE_PATTERN.findall(prompt)] or ['Task 1']
+            per_row = max(3, n_tokens // len(titles))
+            rows = ['| Rank | Task Title | Justification |', '| --- | --- | --- |']
+            rows += [f"| {i} | {title} | {self._sentence(rng, per_row)} |" for i, title in enumerate(titles, 1)]
+            return '\n'.join(rows)
+        if kind in (KIND_BULLETS, KIND_NUMBERED):
+            n_lines = rng.randint(4, 6) if kind == KIND_BULLETS else rng.randint(3, 6)
+            per_line = max(3, n_tokens // n_lines)
+            marker = (lambda i: '*') if kind == KIND_BULLETS else (lambda i: f"{i}.")
+            return '\n'.join(f"{marker(i)} {self._sentence(rng, per_line)}" for i in range(1, n_lines + 1))
+        sentences, remaining = [], n_tokens
+        while remaining > 0:
+            length = min(remaining, rng.randint(6, 14))
+            sentences.append(self._sentence(rng, length))
+            remaining -= length
+        return ' '.join(sentences)
+
+    def _plan(self, prompt, system_instruction, kind):
+        """Returns (tokens, time_to_first_token_seconds) for this request."""
+        rng = self._rng(prompt, system_instruction)
+        ttft_ms = self.latency_ms * math.exp(rng.gauss(0, self.latency_sigma)) if self.latency_ms > 0 else 0.0
+        n_tokens = max(1, int(round(rng.gauss(self.tokens_mean, self.tokens_stddev))))
+        text = self._compose(rng, kind, n_tokens, prompt)
+        return re.findall(r'\S+\s*', text), ttft_ms / 1000
+
+    def _record(self, counter, tokens, seconds):
+        with self._lock:
+            self._counters[counter] += 1
+            self._counters['tokens'] += len(tokens)
+            self._counters['simulatedMs'] += seconds * 1000
+
+    def generate(self, prompt, system_instruction=None, kind=KIND_TEXT):
+        tokens, ttft = self._plan(prompt, system_instruction, kind)
+        total = ttft + max(0, len(tokens) - 1) * self.token_ms / 1000
+        self._sleep(total)
+        self._record('calls', tokens, total)
+        return ''.join(tokens).strip()
+
+    def stream(self, prompt, system_instruction=None, kind=KIND_TEXT):
+        tokens, ttft = self._plan(prompt, system_instruction, kind)
+        self._record('streams', tokens, ttft + max(0, len(tokens) - 1) * self.token_ms / 1000)
+        for i, token in enumerate(tokens):
+            self._sleep(ttft if i == 0 else self.token_ms / 1000)
+            yield token
+
+    def stats(self):
+        with self._lock:
+            counters = dict(self._counters)
+        counters['simulatedMs'] = round(counters['simulatedMs'], 1)
+        return {
+            'provider': self.name, 'model': self.model, **counters,
+            'settings': {'seed': self.seed, 'latencyMs': self.latency_ms, 'latencySigma': self.latency_sigma,
+                         'tokensMean': self.tokens_mean, 'tokensStddev': self.tokens_stddev, 'tokenMs': self.token_ms}
+        }
+
+
+def create_provider(name=None, model=None):
+    """Builds the configured provider. Raises ValueError when it cannot be used (unknown name, missing key)."""
+    name = (name or Config.AI_PROVIDER).lower()
+    model = model or Config.AI_MODEL or None
+    if name == 'gemini':
+        if not Config.GEMINI_API_KEY:
+            raise ValueError("GEMINI_API_KEY not configured in .env file.")
+        return GeminiProvider(Config.GEMINI_API_KEY, model)
+    if name == 'cohere':
+        if not Config.COHERE_API_KEY:
+            raise ValueError("COHERE_API_KEY not configured in .env file.")
+        return CohereProvider(Config.COHERE_API_KEY, model)
+    if name == 'local':
+        return LocalProvider(model)
+    raise ValueError(f"Unknown AI_PROVIDER '{name}' (expected gemini, cohere or local).")
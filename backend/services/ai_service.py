@@ -1,50 +1,71 @@
 import os
 from dotenv import load_dotenv
-from google import genai
-from google.genai.errors import APIError
-import json
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout
+from ..config import Config
+from .ai_cache_service import ai_cache
+from .ai_providers import create_provider, APIError, KIND_BULLETS, KIND_TABLE
+from .ai_stream_service import sse_stream
+from .priority_ranking_service import rank_tasks, compact_prompt_json, ranking_markdown
 load_dotenv() 
 
-# Get the Gemini API key
-GEMINI_API_KEY = os.getenv('GEMINI_API_KEY')
-
-# Initialize the Gemini client
-# Note: The client will automatically use the GEMINI_API_KEY environment variable.
+# Initialize the configured AI provider (Config.AI_PROVIDER: gemini, cohere or local)
 try:
-    if not GEMINI_API_KEY:
-        raise ValueError("GEMINI_API_KEY not configured in .env file.")
-        
-    client = genai.Client(api_key=GEMINI_API_KEY)
-    MODEL = 'gemini-2.5-flash' # A fast and efficient model for summarization
+    provider = create_provider()
+    MODEL = provider.model  # Part of every AI cache key
     
 except ValueError as e:
     # Handle missing key case gracefully
     print(f"Configuration Error: {e}")
-    client = None
+    provider = None
+    MODEL = None
 except Exception as e:
-    print(f"Failed to initialize Gemini Client: {e}")
-    client = None
+    print(f"Failed to initialize AI provider: {e}")
+    provider = None
+    MODEL = None
 
 def _api_key_check():
-    """Checks if the Gemini client is initialized."""
-    if not client:
-        return "Error: GEMINI_API_KEY not configured or client failed to initialize."
+    """Checks if the AI provider is initialized."""
+    if not provider:
+        return "Error: AI provider not configured (check AI_PROVIDER and its API key) or failed to initialize."
     return None
 
+# Prompt templates are part of the AI cache key, so editing one never serves stale answers
+SUMMARY_PROMPT_TEMPLATE = "Summarize this task description in 1-2 concise, clear sentences:\n\n{description}"
+
+DETAILED_SUMMARY_SYSTEM_INSTRUCTION = (
+    "You are an expert task summarizer. Generate a detailed, point-form summary "
+    "of the user's task description. The output MUST be a list of 4-6 bullet points "
+    "that provide insights, structure, and break down complex concepts. Do NOT include "
+    "any introductory or concluding text, only the bullet points."
+)
+DETAILED_SUMMARY_PROMPT_TEMPLATE = "Task Description:\n{description}"
+
+def get_ai_cache_stats():
+    return ai_cache.stats()
+
+def get_ai_client_stats():
+    """Provider and model in use, plus circuit breaker state and retry counters (or simulated load for local)."""
+    if not provider:
+        return {'configured': False}
+    return {'configured': True, **provider.stats()}
+
 def generate_task_summary(description):
-    """Generate a concise summary of a task description using the Gemini API."""
+    """Generate a concise summary of a task description using the Gemini API (cached by content)."""
     error_check = _api_key_check()
     if error_check:
         return error_check
-    
-    prompt = f"Summarize this task description in 1-2 concise, clear sentences:\n\n{description}"
+    return ai_cache.get_or_compute(
+        'summary', SUMMARY_PROMPT_TEMPLATE, MODEL, description,
+        lambda: _generate_task_summary(description),
+        cacheable=lambda summary: not summary.startswith('Error:')
+    )
+
+def _generate_task_summary(description):
+    prompt = SUMMARY_PROMPT_TEMPLATE.format(description=description)
     
     try:
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=prompt,
-        )
-        return response.text.strip()
+        return provider.generate(prompt).strip()
     except APIError as e:
         print(f"Gemini API Error: {e}")
         return f"Error: Gemini API call failed. Details: {e}"
@@ -60,35 +81,62 @@ def generate_detailed_summary(description):
     error_check = _api_key_check()
     if error_check:
         return [error_check] 
-        
-    system_instruction = (
-        "You are an expert task summarizer. Generate a detailed, point-form summary "
-        "of the user's task description. The output MUST be a list of 4-6 bullet points "
-        "that provide insights, structure, and break down complex concepts. Do NOT include "
-        "any introductory or concluding text, only the bullet points."
+    return ai_cache.get_or_compute(
+        'detailed_summary', DETAILED_SUMMARY_SYSTEM_INSTRUCTION + DETAILED_SUMMARY_PROMPT_TEMPLATE, MODEL, description,
+        lambda: _generate_detailed_summary(description),
+        cacheable=lambda points: not points[0].startswith('Error:')
     )
+
+def _parse_summary_points(summary_text):
+    # Split by newlines, clean up bullet characters, and filter empty strings
+    points = [
+        point.strip().lstrip('*-').lstrip('•').strip()
+        for point in summary_text.split('\n')
+        if point.strip()
+    ]
     
-    prompt = f"Task Description:\n{description}"
+    return points if points else ["Error: Gemini returned an empty summary or failed to format correctly."]
+
+def stream_detailed_summary(description):
+    """
+    SSE generator for the detailed summary: the summary text streams as it is generated and the
+    final 'done' event carries the parsed points. Cached summaries are sent in a single chunk;
+    if streaming fails before the first token, the non-streaming call answers instead.
+    """
+    cache_args = ('detailed_summary', DETAILED_SUMMARY_SYSTEM_INSTRUCTION + DETAILED_SUMMARY_PROMPT_TEMPLATE, MODEL, description)
+    cached = ai_cache.lookup(*cache_args)
+    started = time.perf_counter()
+
+    def open_stream():
+        if cached is not None:
+            return iter(['\n'.join(cached)])
+        return provider.stream(
+            DETAILED_SUMMARY_PROMPT_TEMPLATE.format(description=description),
+            system_instruction=DETAILED_SUMMARY_SYSTEM_INSTRUCTION, kind=KIND_BULLETS
+        )
+
+    def fallback():
+        points = generate_detailed_summary(description)
+        if len(points) == 1 and points[0].startswith('Error:'):
+            raise RuntimeError(points[0])
+        return '\n'.join(points)
+
+    def finalize(text):
+        points = _parse_summary_points(text.strip())
+        if cached is None and not points[0].startswith('Error:'):
+            ai_cache.store(*cache_args, points, round((time.perf_counter() - started) * 1000, 1))
+        return {'summary': points}
+
+    return sse_stream('summarize_detailed', open_stream, fallback, finalize)
+
+def _generate_detailed_summary(description):
+    system_instruction = DETAILED_SUMMARY_SYSTEM_INSTRUCTION
+    prompt = DETAILED_SUMMARY_PROMPT_TEMPLATE.format(description=description)
     
     try:
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=prompt,
-            config=genai.types.GenerateContentConfig(
-                system_instruction=system_instruction
-            )
-        )
-        
-        summary_text = response.text.strip()
+        summary_text = provider.generate(prompt, system_instruction=system_instruction, kind=KIND_BULLETS)
         
-        # Split by newlines, clean up bullet characters, and filter empty strings
-        points = [
-            point.strip().lstrip('*-').lstrip('•').strip()
-            for point in summary_text.split('\n')
-            if point.strip()
-        ]
-        
-        return points if points else ["Error: Gemini returned an empty summary or failed to format correctly."]
+        return _parse_summary_points(summary_text.strip())
 
     except APIError as e:
         print(f"Gemini API Error: {e}")
@@ -97,60 +145,68 @@ def generate_detailed_summary(description):
         print(f"General Error in detailed summarization: {e}")
         return [f"Error: An unexpected error occurred. Details: {e}"]
     
-    # ... (existing imports and functions) ...
+# Prioritization calls run here so the request can stop waiting and answer with the local ranking
+_ranking_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='ai-prioritize')
+
+PRIORITY_SYSTEM_INSTRUCTION = (
+    "You are an expert prioritization engine. The tasks were pre-ranked by a scoring model using "
+    "due-date urgency, priority, age and subtask progress ('rank'). Review that order, adjusting it only "
+    "where a task's 'desc' clearly warrants, and rank the tasks by their **Urgency and Importance**. "
+    "Your final output MUST be a clean Markdown table with exactly three columns: "
+    "'Rank (1, 2, 3..)', 'Task Title', and 'Justification (1 concise sentence).' "
+    "Do NOT include any introductory text or conclusions outside the table."
+)
 
-def get_priority_ranking(tasks_data):
+def get_priority_ranking(tasks_data, user_id=None):
     """
-    Generates an urgent/important ranking for a list of tasks using the Gemini API.
-    This version returns a Markdown table to avoid JSON parsing errors.
+    Ranks tasks locally (services/priority_ranking_service.py) and asks the AI to justify the top
+    PRIORITY_TOP_K, sent as compact JSON. Tasks beyond the top K keep their local order.
+    When the AI is not configured, fails or takes longer than PRIORITY_AI_TIMEOUT_SECONDS,
+    the local ranking is returned instead ('source': 'local').
+    The structured list follows the local order, so with 'source': 'ai' it is returned as
+    'local_ranking' rather than 'ranking', as it can differ from the order in ranking_markdown.
     """
+    if any(not isinstance(task, dict) for task in tasks_data):
+        return {'error': 'Each task must be an object'}, 400
+
+    ranked = rank_tasks(tasks_data, user_id)
+    top_k, rest = ranked[:Config.PRIORITY_TOP_K], ranked[Config.PRIORITY_TOP_K:]
+    ranking = [{key: item[key] for key in ('rank', 'id', 'title', 'score', 'justification')} for item in ranked]
+
+    def local_result(reason):
+        print(f"[Prioritize] returning the local ranking: {reason}")
+        return {'ranking_markdown': ranking_markdown(ranked), 'ranking': ranking, 'source': 'local',
+                'message': 'Ranking generated locally (AI unavailable).', 'ai_error': reason}, 200
+
     error_check = _api_key_check()
     if error_check:
-        # Return error as a dictionary to be handled correctly by the route
-        return {'error': error_check, 'ranking_markdown': None}, 500
-
-    # Prepare data as a JSON string to pass context efficiently
-    tasks_json = json.dumps(tasks_data, indent=2)
-
-    system_instruction = (
-        "You are an expert prioritization engine. Analyze the provided list of tasks, "
-        "considering their 'due_date', 'priority', and the content of their 'description' "
-        "to determine the optimal working order. Rank the tasks by their **Urgency and Importance**."
-        "Your final output MUST be a clean Markdown table with exactly three columns: "
-        "'Rank (1, 2, 3..)', 'Task Title', and 'Justification (1 concise sentence).' "
-        "Do NOT include any introductory text or conclusions outside the table."
-    )
+        return local_result(error_check)
 
-    prompt = f"""
-    Rank the following tasks and provide a concise justification for the suggested order.
-    
-    Task List:
-    {tasks_json}
-
-    Return ONLY the Markdown table.
-    """
+    prompt = (
+        "Rank the following tasks and provide a concise justification for the suggested order.\n\n"
+        f"Task List:\n{compact_prompt_json(top_k)}\n\n"
+        "Return ONLY the Markdown table."
+    )
 
     try:
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=prompt,
-            config=genai.types.GenerateContentConfig(
-                system_instruction=system_instruction
-            )
-        )
-        
+        future = _ranking_executor.submit(provider.generate, prompt, PRIORITY_SYSTEM_INSTRUCTION, KIND_TABLE)
         # FIX: We now expect and return raw markdown text, not JSON array
-        markdown_output = response.text.strip()
+        markdown_output = future.result(timeout=Config.PRIORITY_AI_TIMEOUT_SECONDS).strip()
         
         if not markdown_output:
              raise ValueError("AI returned an empty response for ranking.")
-             
-        # Return the clean markdown text
-        return {'ranking_markdown': markdown_output, 'message': 'Ranking generated successfully.'}, 200
 
+    except FuturesTimeout:
+        return local_result(f"AI did not answer within {Config.PRIORITY_AI_TIMEOUT_SECONDS:g}s")
     except APIError as e:
         print(f"Gemini API Error (Prioritization): {e}")
-        return {'error': f"Gemini API call failed during prioritization: {e}"}, 500
+        return local_result(f"AI call failed during prioritization: {e}")
     except Exception as e:
         print(f"General Error in prioritization: {e}")
-        return {'error': f"An unexpected error occurred during prioritization: {e}"}, 500
\ No newline at end of file
+        return local_result(f"An unexpected error occurred during prioritization: {e}")
+
+    if rest:
+        markdown_output += "\n\n**Remaining tasks (ranked locally):**\n\n" + ranking_markdown(rest)
+    # Return the clean markdown text
+    return {'ranking_markdown': markdown_output, 'local_ranking': ranking, 'source': 'ai',
+            'message': 'Ranking generated successfully.'}, 200
@@ -0,0 +1,111 @@
+# services/ai_stream_service.py
+import json
+import threading
+import time
+from collections import deque
+
+class StreamStats:
+    """Per-endpoint time-to-first-token / time-to-last-token samples and cancellation counts for this worker."""
+
+    def __init__(self, max_samples=1000):
+        self.max_samples = max_samples
+        self._endpoints = {}
+        self._lock = threading.Lock()
+
+    def record(self, endpoint, ttft_ms, ttlt_ms, cancelled, fallback):
+        with self._lock:
+            entry = self._endpoints.setdefault(endpoint, {
+                'streams': 0, 'cancelled': 0, 'fallbacks': 0,
+                'ttft': deque(maxlen=self.max_samples), 'ttlt': deque(maxlen=self.max_samples)
+            })
+            entry['streams'] += 1
+            entry['cancelled'] += int(cancelled)
+            entry['fallbacks'] += int(fallback)
+            if ttft_ms is not None:
+                entry['ttft'].append(ttft_ms)
+            if ttlt_ms is not None and not cancelled:
+                entry['ttlt'].append(ttlt_ms)
+
+    @staticmethod
+    def _percentiles(samples):
+        samples = sorted(samples)
+        if not samples:
+            return None
+        pick = lambda q: round(samples[min(len(samples) - 1, int(q * len(samples)))], 1)
+        return {'p50': pick(0.50), 'p90': pick(0.90), 'p99': pick(0.99)}
+
+    def stats(self):
+        with self._lock:
+            return {
+                endpoint: {
+                    'streams': entry['streams'],
+                    'cancelled': entry['cancelled'],
+                    'fallbacks': entry['fallbacks'],
+                    'timeToFirstTokenMs': self._percentiles(entry['ttft']),
+                    'timeToLastTokenMs': self._percentiles(entry['ttlt'])
+                }
+                for endpoint, entry in self._endpoints.items()
+            }
+
+stream_stats = StreamStats()
+
+def _sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+def sse_stream(endpoint, open_stream, fallback, finalize=None):
+    """
+    Relays an upstream token stream to the client as Server-Sent Events.
+
+    `open_stream()` returns an iterator of text chunks. Each chunk is sent as a 'chunk' event,
+    followed by one 'done' event carrying `finalize(full_text)` plus the ttft/ttlt timings.
+    If the upstream stream fails before anything was sent, the non-streaming `fallback()`
+    (returning the full text, or raising) answers instead. When the client disconnects, the
+    upstream stream is closed so generation stops, and the stream is counted as cancelled.
+    """
+    started = time.perf_counter()
+    elapsed_ms = lambda: round((time.perf_counter() - started) * 1000, 1)
+    ttft_ms = ttlt_ms = None
+    parts = []
+    cancelled = used_fallback = False
+    upstream = None
+    try:
+        try:
+            upstream = open_stream()
+            for text in upstream:
+                if not text:
+                    continue
+                if ttft_ms is None:
+                    ttft_ms = elapsed_ms()
+                parts.append(text)
+                yield _sse('chunk', {'text': text})
+        except Exception as e:
+            if parts:
+                print(f"[{endpoint}] stream interrupted after {len(parts)} chunk(s): {e}")
+                yield _sse('error', {'error': f"The AI stream was interrupted: {e}"})
+                return
+            print(f"[{endpoint}] streaming failed, using the non-streaming call: {e}")
+            used_fallback = True
+            try:
+                text = fallback()
+            except Exception as fallback_error:
+                yield _sse('error', {'error': str(fallback_error)})
+                return
+            ttft_ms = elapsed_ms()
+            parts = [text]
+            yield _sse('chunk', {'text': text})
+
+        ttlt_ms = elapsed_ms()
+        done = finalize(''.join(parts)) if finalize else {'text': ''.join(parts)}
+        done.update({'ttft_ms': ttft_ms, 'ttlt_ms': ttlt_ms, 'fallback': used_fallback})
+        yield _sse('done', done)
+    except GeneratorExit:
+        # The client went away: stop pulling tokens from upstream
+        cancelled = True
+        raise
+    finally:
+        if upstream is not None and hasattr(upstream, 'close'):
+            try:
+                upstream.close()
+            except Exception:
+                pass
+        stream_stats.record(endpoint, ttft_ms, ttlt_ms if ttlt_ms is not None else elapsed_ms(), cancelled, used_fallback)
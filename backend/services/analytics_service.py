@@ -1,25 +1,28 @@
 from datetime import datetime, timedelta, timezone
-from pymongo import MongoClient
-from bson.objectid import ObjectId
 from ..config import Config
+from ..models.db import get_db
+from ..models.normalize import normalize_user_id, STATUS_COMPLETED
+from ..models.daily_stats import DailyStats, window_days, day_key
+from ..models.data_version import DataVersion
+from .cache_service import TTLCache
 
-# Establish a connection point
-client = MongoClient(Config.MONGO_URI)
-db = client.get_default_database()
-tasks_col = db.tasks
+ANALYTICS_SECTIONS = ('core', 'priority', 'trend', 'activity')
 
-# Helper function to build user filter for safety
+# Results are cached per (user, section, window, data version); any task/subtask write bumps
+# the user's version, so entries computed before the write can never be served again.
+_cache = TTLCache(Config.ANALYTICS_CACHE_MAX_ENTRIES, Config.ANALYTICS_CACHE_TTL_SECONDS)
+
+def get_cache_stats():
+    return _cache.stats()
+
+# Resolve the collection through the shared connection registry on each call
+def _tasks_col():
+    return get_db().tasks
+
+# Helper function to build user filter
 def _build_user_filter(user_id):
-    """Return a robust MongoDB filter matching user_id."""
-    ors = [{'user_id': user_id}]
-    try:
-        from bson.objectid import ObjectId
-        # Check if user_id might be stored as ObjectId
-        if len(str(user_id)) == 24:
-            ors.append({'user_id': ObjectId(str(user_id))})
-    except Exception:
-        pass
-    return {'$or': ors}
+    """Return an index-friendly equality filter on the canonical (string) user_id."""
+    return {'user_id': normalize_user_id(user_id)}
 
 # Helper to map raw date/time fields to a consistent Python datetime object
 def _get_datetime(doc, field):
@@ -29,111 +32,178 @@ def _get_datetime(doc, field):
         return dt.replace(tzinfo=None) # Ensure naive datetime for consistency
     return None
 
-def get_core_metrics(user_id):
-    """
-    Return core KPIs: totalTasks, completedTasks, pendingTasks, completionRate.
-    (Removed Avg Completion Time Calculation)
-    """
-    user_filter = _build_user_filter(user_id)
-    
-    total_tasks = tasks_col.count_documents(user_filter)
-    completed_tasks = tasks_col.count_documents({'$and': [user_filter, {'status': {'$in': ['Completed', 'COMPLETED', 'completed']}}]})
-    
-    completion_rate = round((completed_tasks / total_tasks * 100), 1) if total_tasks > 0 else 0.0
-    pending_tasks = total_tasks - completed_tasks
+def clamp_window(days, default):
+    """Parses a day-window parameter and keeps it within 1..ANALYTICS_MAX_WINDOW_DAYS."""
+    try:
+        days = int(days) if days is not None else default
+    except (TypeError, ValueError):
+        days = default
+    return max(1, min(days, Config.ANALYTICS_MAX_WINDOW_DAYS))
+
+# --- $facet engine ---
+# Each section contributes one facet sub-pipeline and one formatter, so any subset of
+# the dashboard is computed with a single aggregation over the user's tasks.
+
+def _core_facet(now, trend_days, activity_days):
+    return [{'$group': {
+        '_id': None,
+        'total': {'$sum': 1},
+        'completed': {'$sum': {'$cond': [{'$eq': ['$status', STATUS_COMPLETED]}, 1, 0]}}
+    }}]
 
+def _priority_facet(now, trend_days, activity_days):
+    return [
+        {'$match': {'status': {'$ne': STATUS_COMPLETED}}},
+        {'$group': {'_id': {'$ifNull': ['$priority', 'Medium']}, 'count': {'$sum': 1}}}
+    ]
+
+def _format_core(rows, now, trend_days):
+    row = rows[0] if rows else {}
+    total_tasks = int(row.get('total', 0))
+    completed_tasks = int(row.get('completed', 0))
+    completion_rate = round((completed_tasks / total_tasks * 100), 1) if total_tasks > 0 else 0.0
     return {
-        'totalTasks': int(total_tasks),
-        'completedTasks': int(completed_tasks),
-        'pendingTasks': int(pending_tasks),
+        'totalTasks': total_tasks,
+        'completedTasks': completed_tasks,
+        'pendingTasks': total_tasks - completed_tasks,
         'completionRate': completion_rate
-        # 'avgCompletionTimeDays' removed
     }
 
-def get_priority_distribution(user_id):
-    """
-    Returns counts of active (non-completed) tasks grouped by priority.
-    """
-    user_filter = _build_user_filter(user_id)
-    pipeline = [
-        {'$match': {'$and': [user_filter, {'status': {'$nin': ['Completed', 'completed', 'COMPLETED']}}]}},
-        {'$group': {'_id': {'$ifNull': ['$priority', 'Medium']}, 'count': {'$sum': 1}}}
-    ]
-    agg = list(tasks_col.aggregate(pipeline))
+def _format_priority(rows, now, trend_days):
     result = {'High': 0, 'Medium': 0, 'Low': 0}
-    for row in agg:
+    for row in rows:
         key = str(row.get('_id')).capitalize()
         if key in result:
             result[key] = int(row.get('count', 0))
     return result
 
-def get_weekly_completion_trend(user_id, days=7):
-    """
-    Returns list of {'date': 'YYYY-MM-DD', 'count': N} for last `days` days.
-    """
-    user_filter = _build_user_filter(user_id)
-    today_utc = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    start_utc = today_utc - timedelta(days=days - 1)
-    
-    pipeline = [
-        {'$match': {
-            '$and': [user_filter, {'status': {'$in': ['Completed', 'completed', 'COMPLETED']}}],
-            'updated_at': {'$gte': start_utc} 
-        }},
-        {'$group': {
-            '_id': {'$dateToString': {'format': "%Y-%m-%d", 'date': '$updated_at'}},
-            'count': {'$sum': 1}
-        }},
-        {'$sort': {'_id': 1}}
-    ]
-    
-    result = list(tasks_col.aggregate(pipeline))
-    date_counts = {item['_id']: item['count'] for item in result}
-    
+_SECTIONS = {
+    'core': (_core_facet, _format_core),
+    'priority': (_priority_facet, _format_priority),
+}
+
+# --- Rollup readers ---
+# Trend and weekday activity come from the task_daily_stats rollup: O(days), not O(tasks).
+
+def _trend_from_rollup(by_day, now, trend_days):
+    start, _ = window_days(trend_days, now)
     trend_data = []
-    for i in range(days):
-        date = today_utc - timedelta(days=days - 1 - i)
-        date_str = date.strftime("%Y-%m-%d")
-        
+    for i in range(trend_days):
+        date = start + timedelta(days=i)
         trend_data.append({
             'date': date.strftime("%b %d"),
-            'count': date_counts.get(date_str, 0)
+            'count': int(by_day.get(day_key(date), {}).get('completed', 0))
         })
-        
     return trend_data
 
+def _activity_from_rollup(by_day, now, activity_days):
+    start, _ = window_days(activity_days, now)
+    labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']  # datetime.weekday(): 0=Monday
+    dow_counts = {label: 0 for label in labels}
+    for i in range(activity_days):
+        date = start + timedelta(days=i)
+        dow_counts[labels[date.weekday()]] += int(by_day.get(day_key(date), {}).get('active', 0))
+    return dow_counts
+
+def compute_analytics(user_id, sections=ANALYTICS_SECTIONS, trend_days=7, activity_days=30):
+    """
+    Returns {section_name: formatted_result}, serving sections from the cache when the
+    user's data has not changed and computing only the missing ones.
+    Every call, cache hits included, reads the user's data version first (one indexed find_one).
+    """
+    user_id = normalize_user_id(user_id)
+    # Read on every call: a write handled by another worker only shows up as a new version
+    version = DataVersion.get(user_id)
+    windows = {'core': None, 'priority': None, 'trend': trend_days, 'activity': activity_days}
+    keys = {name: (user_id, name, windows[name], version) for name in sections}
+
+    result = {}
+    missing = []
+    for name in sections:
+        cached = _cache.get(keys[name])
+        if cached is None:
+            missing.append(name)
+        else:
+            result[name] = cached
+
+    if missing:
+        computed = _compute_sections(user_id, missing, trend_days, activity_days)
+        for name, value in computed.items():
+            _cache.set(keys[name], value)
+        result.update(computed)
+    return result
+
+def _compute_sections(user_id, sections, trend_days, activity_days):
+    """
+    Computes analytics sections from the database: KPI/priority sections with one $facet
+    aggregation, trend/activity sections with one range read of the daily rollup.
+    """
+    now = datetime.now()
+    result = {}
+
+    facet_sections = [name for name in sections if name in _SECTIONS]
+    if facet_sections:
+        facets = {name: _SECTIONS[name][0](now, trend_days, activity_days) for name in facet_sections}
+        pipeline = [
+            {'$match': _build_user_filter(user_id)},
+            {'$facet': facets}
+        ]
+        raw = next(_tasks_col().aggregate(pipeline), {})
+        for name in facet_sections:
+            result[name] = _SECTIONS[name][1](raw.get(name, []), now, trend_days)
+
+    if 'trend' in sections or 'activity' in sections:
+        widest = max(trend_days if 'trend' in sections else 1, activity_days if 'activity' in sections else 1)
+        start, end = window_days(widest, now)
+        by_day = {row['day']: row for row in DailyStats.find_range(user_id, start, end)}
+        if 'trend' in sections:
+            result['trend'] = _trend_from_rollup(by_day, now, trend_days)
+        if 'activity' in sections:
+            result['activity'] = _activity_from_rollup(by_day, now, activity_days)
+
+    return result
+
+def get_dashboard(user_id, trend_days=None, activity_days=None):
+    """
+    All dashboard sections (KPIs, priority distribution, completion trend, weekday activity):
+    one data version read, plus one $facet aggregation and one rollup range read on a cache miss.
+    """
+    trend_days = clamp_window(trend_days, Config.ANALYTICS_TREND_DAYS_DEFAULT)
+    activity_days = clamp_window(activity_days, Config.ANALYTICS_ACTIVITY_DAYS_DEFAULT)
+    result = compute_analytics(user_id, ANALYTICS_SECTIONS, trend_days, activity_days)
+    return {
+        'metrics': result['core'],
+        'priorityDistribution': result['priority'],
+        'completionTrends': result['trend'],
+        'dayOfWeekActivity': result['activity'],
+        'trendDays': trend_days,
+        'activityDays': activity_days
+    }
+
+# --- Single-section wrappers (used by the per-widget endpoints) ---
+
+def get_core_metrics(user_id):
+    """
+    Return core KPIs: totalTasks, completedTasks, pendingTasks, completionRate.
+    (Removed Avg Completion Time Calculation)
+    """
+    return compute_analytics(user_id, ('core',))['core']
+
+def get_priority_distribution(user_id):
+    """
+    Returns counts of active (non-completed) tasks grouped by priority.
+    """
+    return compute_analytics(user_id, ('priority',))['priority']
+
+def get_weekly_completion_trend(user_id, days=7):
+    """
+    Returns list of {'date': 'Mon DD', 'count': N} for last `days` days.
+    """
+    return compute_analytics(user_id, ('trend',), trend_days=days)['trend']
+
 
 def get_day_of_week_activity(user_id, days=30):
     """
     Return activity counts aggregated by weekday for last `days` days.
     """
-    user_filter = _build_user_filter(user_id)
-    today_utc = datetime.utcnow()
-    start_utc = today_utc - timedelta(days=days)
-    
-    pipeline = [
-        {'$match': {
-            '$and': [user_filter, {'$or': [{'created_at': {'$gte': start_utc}}, {'updated_at': {'$gte': start_utc}}]}]
-        }},
-        {'$project': {
-            'dayOfWeek': {'$dayOfWeek': {'$ifNull': ['$updated_at', '$created_at']}} # 1=Sunday, 7=Saturday
-        }},
-        {'$group': {
-            '_id': '$dayOfWeek',
-            'count': {'$sum': 1}
-        }}
-    ]
-
-    agg = list(tasks_col.aggregate(pipeline))
-    
-    labels = ['Sun', 'Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat']
-    dow_counts = {labels[i]: 0 for i in range(7)}
-    
-    for row in agg:
-        day_index = row['_id'] - 1 
-        dow_counts[labels[day_index]] = int(row['count'])
-        
-    # Reorder starting from Monday
-    reordered_labels = ['Mon', 'Tue', 'Wed', 'Thu', 'Fri', 'Sat', 'Sun']
-    
-    return {label: dow_counts[label] for label in reordered_labels}
\ No newline at end of file
+    return compute_analytics(user_id, ('activity',), activity_days=days)['activity']
@@ -1,6 +1,24 @@
 # services/assistant_service.py
 import json
-from ..services.ai_service import client, MODEL, _api_key_check
+from ..services.ai_service import provider, _api_key_check
+from .ai_stream_service import sse_stream
+
+# 1) System instruction and single-message context (stateless)
+SYSTEM_INSTRUCTION = (
+    "You are the Smart Task Manager AI Assistant, powered by Gemini. "
+    "Answer concisely, helpfully and professionally. If asked for task-specific advice, "
+    "give actionable steps. You have access to the USER_ID but not the real name; if asked, "
+    "tell the user that you only know their USER_ID and display it when requested."
+)
+
+def _build_prompt(user_id, new_user_message):
+    # Build a single-string prompt that is simple and robust (same style used in working subtask code)
+    return (
+        f"SYSTEM INSTRUCTION: {SYSTEM_INSTRUCTION}\n\n"
+        f"USER_ID: {user_id}\n\n"
+        f"User: {new_user_message}\n\n"
+        "Assistant:"
+    )
 
 def generate_assistant_response(user_id, new_user_message):
     """
@@ -11,31 +29,11 @@ def generate_assistant_response(user_id, new_user_message):
     if error_check:
         return {'error': error_check}, 500
 
-    # 1) System instruction and single-message context (stateless)
-    system_instruction = (
-        "You are the Smart Task Manager AI Assistant, powered by Gemini. "
-        "Answer concisely, helpfully and professionally. If asked for task-specific advice, "
-        "give actionable steps. You have access to the USER_ID but not the real name; if asked, "
-        "tell the user that you only know their USER_ID and display it when requested."
-    )
-
-    # Build a single-string prompt that is simple and robust (same style used in working subtask code)
-    prompt_text = (
-        f"SYSTEM INSTRUCTION: {system_instruction}\n\n"
-        f"USER_ID: {user_id}\n\n"
-        f"User: {new_user_message}\n\n"
-        "Assistant:"
-    )
+    prompt_text = _build_prompt(user_id, new_user_message)
 
-    # 2) Call Gemini with a single contents string
+    # 2) Call the AI provider with a single prompt string
     try:
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=prompt_text,
-        )
-
-        # response.text is used in other service files; keep same usage
-        assistant_response = response.text.strip() if hasattr(response, 'text') else str(response)
+        assistant_response = provider.generate(prompt_text).strip()
 
         # Optional debug line (server logs)
         print(f"[Assistant - Stateless] user_id={user_id} assistant_preview={assistant_response[:200]!r}")
@@ -49,3 +47,19 @@ def generate_assistant_response(user_id, new_user_message):
         print(f"Assistant API Error (stateless): {e}")
 
         return {'assistant_response': friendly_msg}, 200
+
+def stream_assistant_response(user_id, new_user_message):
+    """
+    Streaming variant: an SSE generator whose 'chunk' events carry the reply as it is generated
+    and whose 'done' event carries the full {'assistant_response'}. Falls back to the
+    non-streaming call if the stream cannot be opened.
+    """
+    def open_stream():
+        return provider.stream(_build_prompt(user_id, new_user_message))
+
+    def fallback():
+        response, _ = generate_assistant_response(user_id, new_user_message)
+        return response['assistant_response']
+
+    return sse_stream('assistant', open_stream, fallback,
+                      finalize=lambda text: {'assistant_response': text.strip()})
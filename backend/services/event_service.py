@@ -0,0 +1,205 @@
+# services/event_service.py
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+from bson.objectid import ObjectId
+from itsdangerous import URLSafeTimedSerializer, BadSignature, SignatureExpired
+from pymongo.errors import PyMongoError
+from ..config import Config
+from ..models.event import Event, oid_before
+from ..models.normalize import normalize_user_id
+
+# --- Publishing ---
+# Any process (web workers, scheduler) publishes by inserting into the capped events collection.
+# A failed publish never fails the write that caused it; clients catch up on their next reload.
+
+def publish_many(events):
+    """Publishes [(user_id, event_type, data)] in one write."""
+    events = [(normalize_user_id(u), t, d or {}) for u, t, d in events if u is not None]
+    try:
+        Event.publish_many(events)
+    except PyMongoError as e:
+        print(f"[events] publish failed ({len(events)} event(s)): {e}")
+
+def publish(user_id, event_type, data=None):
+    publish_many([(user_id, event_type, data)])
+
+def publish_triggered_reminders(reminders):
+    """One 'reminder.triggered' event per reminder document flipped to Triggered."""
+    publish_many([
+        (r.get('user_id'), 'reminder.triggered', {
+            'reminder_id': str(r['_id']),
+            'task_id': str(r['task_id']) if r.get('task_id') else None,
+            'message': r.get('message'),
+            'trigger_time': r['trigger_time'].isoformat() if r.get('trigger_time') else None
+        })
+        for r in reminders
+    ])
+
+# --- Per-worker fan-out ---
+
+class Subscription:
+    def __init__(self, user_id, queue_size):
+        self.user_id = user_id
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.overflowed = False
+
+class EventBroker:
+    """
+    Fans events out to the SSE streams open in this worker process.
+    A single dispatcher thread follows the capped events collection with a tailable cursor,
+    so the database sees one cursor per worker no matter how many clients are connected.
+    At most `max_streams` streams are served at once; subscribe() returns None beyond that.
+    """
+
+    def __init__(self, max_streams=None, queue_size=None):
+        self.max_streams = max_streams or Config.EVENTS_MAX_STREAMS_PER_WORKER
+        self.queue_size = queue_size or Config.EVENTS_STREAM_QUEUE_SIZE
+        self._subscribers = {}  # user_id -> set of Subscription
+        self._active = 0
+        self._lock = threading.Lock()
+        self._thread = None
+        self._pid = None
+
+    def subscribe(self, user_id):
+        user_id = normalize_user_id(user_id)
+        with self._lock:
+            if self._active >= self.max_streams:
+                return None
+            sub = Subscription(user_id, self.queue_size)
+            self._subscribers.setdefault(user_id, set()).add(sub)
+            self._active += 1
+            # The dispatcher is started lazily, and again in a forked worker (threads do not survive fork)
+            if self._thread is None or self._pid != os.getpid() or not self._thread.is_alive():
+                self._pid = os.getpid()
+                self._thread = threading.Thread(target=self._dispatch_loop, name='event-dispatcher', daemon=True)
+                self._thread.start()
+            return sub
+
+    def unsubscribe(self, sub):
+        """Idempotent: called both when the stream generator ends and when the response closes."""
+        with self._lock:
+            subs = self._subscribers.get(sub.user_id)
+            if subs is None or sub not in subs:
+                return
+            subs.discard(sub)
+            if not subs:
+                del self._subscribers[sub.user_id]
+            self._active -= 1
+
+    def stats(self):
+        with self._lock:
+            return {'activeStreams': self._active, 'users': len(self._subscribers), 'maxStreams': self.max_streams}
+
+    def _deliver(self, event):
+        with self._lock:
+            subs = list(self._subscribers.get(event.get('user_id'), ()))
+        for sub in subs:
+            try:
+                sub.queue.put_nowait(event)
+            except queue.Full:
+                # Slow client: its stream ends and the browser resumes from Last-Event-ID
+                sub.overflowed = True
+
+    def _dispatch_loop(self):
+        # Events arrive in insertion order, which is not _id order across publishing processes, so
+        # every event the cursor yields is delivered. A re-opened cursor looks back EVENTS_REORDER_SECONDS
+        # from the newest id and skips the ones already delivered (or present before this worker started).
+        window = Config.EVENTS_REORDER_SECONDS
+        seen, seen_order = set(), deque()
+        newest = None
+
+        def mark_seen(event_id):
+            seen.add(event_id)
+            seen_order.append(event_id)
+            # Ids further than twice the window behind the newest one can no longer be re-read
+            while seen_order and (newest.generation_time - seen_order[0].generation_time).total_seconds() > 2 * window:
+                seen.discard(seen_order.popleft())
+
+        while True:
+            try:
+                if newest is None:
+                    Event.ensure_collection()
+                    newest = oid_before(None, 0)
+                    for event_id in Event.ids_since(oid_before(None, window)):
+                        mark_seen(event_id)
+                cursor = Event.tail(oid_before(newest, window))
+                while cursor.alive:
+                    for event in cursor:
+                        if event['_id'] in seen:
+                            continue
+                        newest = max(newest, event['_id'])
+                        mark_seen(event['_id'])
+                        self._deliver(event)
+            except PyMongoError as e:
+                print(f"[events] dispatcher error, retrying: {e}")
+            # A tailable cursor on an empty collection dies immediately; back off before re-opening
+            time.sleep(1.0)
+
+broker = EventBroker()
+
+# --- Streaming ---
+
+def _format_event(event):
+    payload = json.dumps({
+        'type': event['type'],
+        'data': event.get('data') or {},
+        'created_at': event['created_at'].isoformat() if event.get('created_at') else None
+    }, default=str)
+    return f"id: {event['_id']}\nevent: {event['type']}\ndata: {payload}\n\n"
+
+# EventSource cannot send an Authorization header, so GET /api/events takes a short-lived token in
+# the URL instead of the access token. It is only valid for the events stream and expires after
+# EVENTS_TOKEN_TTL_SECONDS, so a copy left in proxy or access logs is useless soon after.
+_stream_tokens = URLSafeTimedSerializer(Config.JWT_SECRET_KEY, salt='events-stream')
+
+def issue_stream_token(user_id):
+    return _stream_tokens.dumps({'sub': normalize_user_id(user_id)})
+
+def verify_stream_token(token):
+    """Returns the user_id of a valid, unexpired stream token, else None."""
+    try:
+        return _stream_tokens.loads(token, max_age=Config.EVENTS_TOKEN_TTL_SECONDS)['sub']
+    except (BadSignature, SignatureExpired, KeyError, TypeError):
+        return None
+
+def parse_last_event_id(value):
+    return ObjectId(value) if isinstance(value, str) and ObjectId.is_valid(value) else None
+
+def stream_events(sub, last_event_id=None):
+    """
+    SSE generator for one subscription: replays events from EVENTS_REORDER_SECONDS before
+    `last_event_id` from the database, then forwards live events in arrival order, with a comment
+    heartbeat every EVENTS_HEARTBEAT_SECONDS. The look-back catches events another process published
+    in the same moment, so delivery is at-least-once: a replayed event may already have been
+    received, and clients dedupe by event id. The subscription is taken before the replay, so events
+    published in between are not lost; live events are only skipped when the replay already sent them.
+    """
+    try:
+        yield f"retry: {Config.EVENTS_RETRY_MS}\n\n"
+        replayed = set()
+        if last_event_id is not None:
+            after = oid_before(last_event_id, Config.EVENTS_REORDER_SECONDS)
+            while True:
+                missed = Event.find_since(sub.user_id, after, Config.EVENTS_REPLAY_LIMIT)
+                for event in missed:
+                    after = event['_id']
+                    replayed.add(event['_id'])
+                    if event['_id'] != last_event_id:
+                        yield _format_event(event)
+                if len(missed) < Config.EVENTS_REPLAY_LIMIT:
+                    break
+        while not sub.overflowed:
+            try:
+                event = sub.queue.get(timeout=Config.EVENTS_HEARTBEAT_SECONDS)
+            except queue.Empty:
+                yield ': heartbeat\n\n'
+                continue
+            if event['_id'] in replayed:
+                continue  # Already sent during the replay
+            yield _format_event(event)
+    finally:
+        broker.unsubscribe(sub)
@@ -0,0 +1,164 @@
+# services/job_service.py
+import os
+import random
+import socket
+import threading
+import traceback
+import uuid
+from datetime import datetime, timedelta
+from pymongo.errors import PyMongoError
+from ..config import Config
+from ..models.job import Job
+from ..models.normalize import normalize_user_id
+from .ai_service import generate_task_summary, generate_detailed_summary, get_priority_ranking
+from .subtask_service import generate_subtasks_only, generate_subtasks_with_ai
+from .task_service import update_task
+from .ai_batch_service import summarize_batch
+
+# --- Handlers ---
+# Each handler takes (user_id, payload, job_id) and returns (result_dict, status_code) like the services it wraps.
+# 5xx outcomes are treated as transient and retried with backoff; 4xx outcomes fail the job immediately,
+# so handlers that write must be safe to re-run (generate_subtasks tags its writes with the job id).
+
+def _summarize(user_id, payload, job_id):
+    summary = generate_task_summary(payload['description'])
+    if summary.startswith('Error:'):
+        return {'error': summary}, 500
+    task_id = payload.get('task_id')
+    if task_id and task_id != 'temp':
+        response, status_code = update_task(task_id, {'summary': summary})
+        if status_code != 200:
+            return response, status_code
+    return {'summary': summary}, 200
+
+def _summarize_detailed(user_id, payload, job_id):
+    points = generate_detailed_summary(payload['description'])
+    if len(points) == 1 and points[0].startswith('Error:'):
+        return {'error': points[0]}, 500
+    return {'summary': points}, 200
+
+JOB_HANDLERS = {
+    'summarize': _summarize,
+    'summarize_detailed': _summarize_detailed,
+    'summarize_batch': lambda user_id, payload, job_id: summarize_batch(user_id, payload['items']),
+    'subtasks_only': lambda user_id, payload, job_id: generate_subtasks_only(payload['description'], user_id),
+    'generate_subtasks': lambda user_id, payload, job_id: generate_subtasks_with_ai(
+        payload['task_id'], payload['description'], user_id, job_id=job_id),
+    'prioritize': lambda user_id, payload, job_id: get_priority_ranking(payload['tasks'], user_id),
+}
+
+# --- Enqueue / Status (web workers) ---
+
+def wants_async(args, body=None):
+    """True when the caller asked for async mode (?async=true or {"async": true})."""
+    flag = args.get('async') or (body or {}).get('async')
+    return str(flag).lower() in ('1', 'true', 'yes')
+
+def _serialize_job(job):
+    return {
+        'job_id': str(job['_id']),
+        'type': job['type'],
+        'status': job['status'],
+        'attempts': job.get('attempts', 0),
+        'max_attempts': job.get('max_attempts'),
+        'result': job.get('result'),
+        'error': job.get('error'),
+        'next_attempt_at': job['run_at'].isoformat() if job['status'] == 'queued' and job.get('run_at') else None,
+        'created_at': job['created_at'].isoformat() if job.get('created_at') else None,
+        'updated_at': job['updated_at'].isoformat() if job.get('updated_at') else None,
+        'finished_at': job['finished_at'].isoformat() if job.get('finished_at') else None,
+    }
+
+def enqueue_job(user_id, job_type, payload, idempotency_key=None):
+    """Queues an AI job for worker.py. Returns ({'job_id', 'status', 'status_url', ...}, 202)."""
+    if job_type not in JOB_HANDLERS:
+        return {'error': f"Unknown job type '{job_type}'"}, 400
+    job, created = Job.enqueue(job_type, normalize_user_id(user_id), payload, Config.JOB_MAX_ATTEMPTS,
+                               idempotency_key=idempotency_key)
+    response = _serialize_job(job)
+    response['status_url'] = f"/api/jobs/{job['_id']}"
+    response['duplicate'] = not created
+    return response, 202
+
+def get_job(job_id, user_id):
+    job = Job.find_for_user(job_id, normalize_user_id(user_id))
+    if not job:
+        return {'error': 'Job not found'}, 404
+    return _serialize_job(job), 200
+
+# --- Worker ---
+
+def retry_delay(attempt):
+    """Exponential backoff with full jitter for the given (1-based) attempt number."""
+    ceiling = min(Config.JOB_RETRY_MAX_SECONDS, Config.JOB_RETRY_BASE_SECONDS * (2 ** (attempt - 1)))
+    return random.uniform(ceiling / 2, ceiling)
+
+class JobWorker:
+    """
+    Claims jobs from the jobs collection and runs their handlers, one job at a time per thread.
+    While a job runs its lease is renewed every JOB_LEASE_SECONDS / 3, so only jobs of a worker
+    that died are ever re-claimed. Outcomes are written only while this worker still holds the job.
+    """
+
+    def __init__(self, worker_id=None, job_types=None, lease_seconds=None, poll_interval=None, log=print):
+        self.worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.job_types = list(job_types or JOB_HANDLERS)
+        self.lease_seconds = lease_seconds or Config.JOB_LEASE_SECONDS
+        self.poll_interval = poll_interval or Config.JOB_POLL_INTERVAL_SECONDS
+        self.log = log
+        self._stop = threading.Event()
+
+    def _keep_lease(self, job_id, done):
+        while not done.wait(self.lease_seconds / 3):
+            try:
+                if not Job.extend_lease(job_id, self.worker_id, self.lease_seconds):
+                    return
+            except PyMongoError as e:
+                self.log(f"[JobWorker] lease renewal failed for {job_id}: {e}")
+
+    def run_once(self):
+        """Claims and runs at most one job. Returns True if a job was processed."""
+        job = Job.claim(self.worker_id, self.lease_seconds, self.job_types)
+        if job is None:
+            return False
+
+        if job['attempts'] > job.get('max_attempts', Config.JOB_MAX_ATTEMPTS):
+            # Re-claimed after its workers kept dying (e.g. the handler crashes the process)
+            Job.fail(job['_id'], self.worker_id, 'Gave up after repeated worker failures')
+            return True
+
+        done = threading.Event()
+        keeper = threading.Thread(target=self._keep_lease, args=(job['_id'], done), daemon=True)
+        keeper.start()
+        try:
+            result, status_code = JOB_HANDLERS[job['type']](job['user_id'], job.get('payload') or {}, job['_id'])
+            error = None if status_code < 400 else (result.get('error') or f"Failed with status {status_code}")
+            transient = status_code >= 500
+        except Exception as e:
+            self.log(f"[JobWorker] job {job['_id']} ({job['type']}) raised: {traceback.format_exc()}")
+            result, error, transient = None, f"Unexpected error: {e}", True
+        finally:
+            done.set()
+
+        if error is None:
+            Job.succeed(job['_id'], self.worker_id, result)
+        elif transient and job['attempts'] < job.get('max_attempts', Config.JOB_MAX_ATTEMPTS):
+            delay = retry_delay(job['attempts'])
+            Job.fail(job['_id'], self.worker_id, error, retry_at=datetime.now() + timedelta(seconds=delay))
+            self.log(f"[JobWorker] job {job['_id']} ({job['type']}) attempt {job['attempts']} failed; retrying in {delay:.1f}s")
+        else:
+            Job.fail(job['_id'], self.worker_id, error)
+            self.log(f"[JobWorker] job {job['_id']} ({job['type']}) failed permanently: {error}")
+        return True
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                if not self.run_once():
+                    self._stop.wait(self.poll_interval)
+            except PyMongoError as e:
+                self.log(f"[JobWorker] database error, retrying: {e}")
+                self._stop.wait(self.poll_interval)
+
+    def stop(self):
+        self._stop.set()
@@ -0,0 +1,180 @@
+# services/priority_ranking_service.py
+import json
+import math
+from array import array
+from datetime import datetime
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo.errors import PyMongoError
+from ..config import Config
+from ..models.task import Task
+from ..models.subtask import Subtask
+from ..models.normalize import normalize_user_id, due_of, effective_due
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional; the pure-Python path computes the same scores
+    np = None
+
+# Deterministic local scoring for /api/ai/prioritize. Each task becomes one row of four
+# columns (hours until due, priority level, age in days, subtask progress) and the columns are
+# scored in one pass, so the AI only has to justify (and may reorder) a compact top-K.
+
+PRIORITY_LEVELS = {'high': 1.0, 'medium': 0.6, 'low': 0.3}
+DEFAULT_PRIORITY_LEVEL = 0.5
+AGE_HALF_LIFE_DAYS = 14
+OVERDUE_CAP_HOURS = 7 * 24  # Overdue urgency grows from 1.0 to 1.5 over the first week
+
+def _truncate(text, limit):
+    text = ' '.join(str(text or '').split())
+    return text if len(text) <= limit else text[:limit - 1].rstrip() + '…'
+
+def _task_oid(task):
+    try:
+        value = task.get('id') or task.get('_id')
+        return ObjectId(value) if value else None
+    except (InvalidId, TypeError):
+        return None
+
+def load_task_context(tasks, user_id):
+    """
+    Looks up what the client does not send: creation time and subtask progress of the user's tasks,
+    with one query each. Returns ({task_oid: task_doc}, {task_oid: (total, completed)}).
+    """
+    oids = [oid for oid in map(_task_oid, tasks) if oid is not None]
+    if not oids or not user_id:
+        return {}, {}
+    try:
+        return Task.find_existing(oids, normalize_user_id(user_id)), Subtask.progress_by_parent_ids(oids)
+    except PyMongoError as e:
+        print(f"[Prioritize] could not load task context, scoring without it: {e}")
+        return {}, {}
+
+def _columns(tasks, stored, progress, now):
+    """Builds the four score inputs as float arrays (NaN where a value is unknown)."""
+    hours, levels, ages, done = array('d'), array('d'), array('d'), array('d')
+    counts = []
+    for task in tasks:
+        oid = _task_oid(task)
+        doc = stored.get(oid, {})
+
+        due_date, has_time = due_of(task)
+        if due_date is None and doc.get('due_date'):
+            due_date, has_time = doc['due_date'], doc.get('due_has_time', False)
+        hours.append((effective_due(due_date, has_time) - now).total_seconds() / 3600 if due_date else math.nan)
+
+        levels.append(PRIORITY_LEVELS.get(str(task.get('priority') or '').strip().lower(), DEFAULT_PRIORITY_LEVEL))
+
+        created_at = doc.get('created_at')
+        if created_at is None and task.get('created_at'):
+            try:
+                created_at = datetime.fromisoformat(str(task['created_at']).replace('Z', '+00:00'))
+            except ValueError:
+                created_at = None
+        if created_at is not None and created_at.tzinfo is not None:
+            created_at = created_at.astimezone().replace(tzinfo=None)  # `now` is naive local time
+        ages.append(max(0.0, (now - created_at).total_seconds() / 86400) if created_at else 0.0)
+
+        total, completed = progress.get(oid, (0, 0))
+        done.append(completed / total if total else math.nan)
+        counts.append((total, completed))
+    return hours, levels, ages, done, counts
+
+def score_columns(hours, levels, ages, done):
+    """
+    Scores every task at once and returns the scores as a list.
+    urgency halves every PRIORITY_URGENCY_HALF_LIFE_HOURS before the deadline and rises above 1 once
+    overdue; age saturates towards 1 over a few weeks; progress rewards finishing started work.
+    """
+    half_life = Config.PRIORITY_URGENCY_HALF_LIFE_HOURS
+    w_urgency, w_priority = Config.PRIORITY_WEIGHT_URGENCY, Config.PRIORITY_WEIGHT_PRIORITY
+    w_age, w_progress = Config.PRIORITY_WEIGHT_AGE, Config.PRIORITY_WEIGHT_PROGRESS
+
+    if np is not None:
+        h, p, a, d = (np.asarray(col, dtype=np.float64) for col in (hours, levels, ages, done))
+        no_due = np.isnan(h)
+        h = np.where(no_due, 0.0, h)
+        urgency = np.where(h >= 0, 0.5 ** (np.maximum(h, 0.0) / half_life),
+                           1.0 + 0.5 * np.minimum(-h, OVERDUE_CAP_HOURS) / OVERDUE_CAP_HOURS)
+        urgency = np.where(no_due, 0.0, urgency)
+        age = 1.0 - 0.5 ** (a / AGE_HALF_LIFE_DAYS)
+        progress = np.nan_to_num(d, nan=0.0)
+        score = w_urgency * urgency + w_priority * p + w_age * age + w_progress * progress
+        return score.tolist()
+
+    urgency = [
+        0.0 if math.isnan(x) else
+        0.5 ** (x / half_life) if x >= 0 else
+        1.0 + 0.5 * min(-x, OVERDUE_CAP_HOURS) / OVERDUE_CAP_HOURS
+        for x in hours
+    ]
+    age = [1.0 - 0.5 ** (x / AGE_HALF_LIFE_DAYS) for x in ages]
+    progress = [0.0 if math.isnan(x) else x for x in done]
+    return [w_urgency * u + w_priority * p + w_age * g + w_progress * r
+            for u, p, g, r in zip(urgency, levels, age, progress)]
+
+def _justification(hours_to_due, priority, counts, age_days):
+    if math.isnan(hours_to_due):
+        parts = ['No due date']
+    elif hours_to_due < 0:
+        days = int(-hours_to_due // 24)
+        parts = [f"Overdue by {days} day{'s' if days != 1 else ''}" if days else 'Overdue since earlier today']
+    elif hours_to_due < 24:
+        parts = [f"Due in {max(1, int(hours_to_due))} hour{'s' if int(hours_to_due) > 1 else ''}"]
+    else:
+        days = int(round(hours_to_due / 24))
+        parts = [f"Due in {days} day{'s' if days != 1 else ''}"]
+    parts.append(f"{priority or 'Unspecified'} priority")
+    total, completed = counts
+    if total:
+        parts.append(f"{completed}/{total} subtasks done")
+    if age_days >= 7:
+        parts.append(f"open for {int(age_days)} days")
+    return '; '.join(parts) + '.'
+
+def rank_tasks(tasks, user_id=None, now=None):
+    """
+    Ranks tasks locally, most pressing first. Ties keep the earlier due date, then the input order.
+    Returns a list of {'rank', 'id', 'title', 'priority', 'due_date', 'description', 'score',
+    'progress', 'justification'} dicts.
+    """
+    now = now or datetime.now()
+    stored, progress = load_task_context(tasks, user_id)
+    hours, levels, ages, done, counts = _columns(tasks, stored, progress, now)
+    score = score_columns(hours, levels, ages, done)
+
+    order = sorted(range(len(tasks)), key=lambda i: (-score[i], math.inf if math.isnan(hours[i]) else hours[i], i))
+    ranked = []
+    for rank, i in enumerate(order, 1):
+        task = tasks[i]
+        total, completed = counts[i]
+        ranked.append({
+            'rank': rank,
+            'id': task.get('id') or task.get('_id'),
+            'title': task.get('title') or 'Untitled task',
+            'priority': task.get('priority'),
+            'due_date': task.get('due_date') if task.get('due_date') not in ('', 'N/A') else None,
+            'description': task.get('description') or '',
+            'score': round(score[i], 4),
+            'progress': f"{completed}/{total}" if total else None,
+            'justification': _justification(hours[i], task.get('priority'), counts[i], ages[i]),
+        })
+    return ranked
+
+def compact_prompt_json(ranked, k=None):
+    """The top-K tasks as minified JSON with truncated fields, for the AI prompt."""
+    k = k or Config.PRIORITY_TOP_K
+    items = []
+    for item in ranked[:k]:
+        compact = {'rank': item['rank'], 'title': _truncate(item['title'], Config.PRIORITY_TITLE_MAX_CHARS),
+                   'priority': item['priority'], 'due': item['due_date'], 'subtasks': item['progress'],
+                   'desc': _truncate(item['description'], Config.PRIORITY_DESCRIPTION_MAX_CHARS)}
+        items.append({key: value for key, value in compact.items() if value not in (None, '')})
+    return json.dumps(items, separators=(',', ':'), ensure_ascii=False)
+
+def ranking_markdown(ranked):
+    """Renders a local ranking in the same three-column table the AI returns."""
+    cell = lambda text: str(text).replace('|', '\\|').replace('\n', ' ')
+    rows = ['| Rank | Task Title | Justification |', '| --- | --- | --- |']
+    rows += [f"| {item['rank']} | {cell(item['title'])} | {cell(item['justification'])} |" for item in ranked]
+    return '\n'.join(rows)
@@ -0,0 +1,206 @@
+# services/reminder_engine.py
+import heapq
+import threading
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from pymongo.errors import OperationFailure, PyMongoError
+from ..config import Config
+from ..models.reminder import Reminder
+from .event_service import publish_triggered_reminders
+
+class ReminderEngine:
+    """
+    In-memory timer heap for the scheduler process.
+
+    Pending reminders due within the next REMINDER_ENGINE_HORIZON_SECONDS (in the partitions this
+    instance leases) are preloaded into a heap, and a timer thread sleeps until the earliest one
+    is due, firing everything due within REMINDER_ENGINE_PRECISION_MS as one atomic batch.
+    The heap follows add/dismiss changes through a change stream on reminders; only when the server
+    does not support change streams does it fall back to an incremental `updated_at` query every
+    REMINDER_ENGINE_SYNC_SECONDS. The check_and_trigger_reminders sweep then only runs as an
+    infrequent catch-up for backlogs (REMINDER_ENGINE_CATCHUP_INTERVAL_SECONDS).
+    """
+
+    def __init__(self, partitions_provider, fence=None, horizon_seconds=None, precision_ms=None, sync_seconds=None, log=print):
+        self.partitions_provider = partitions_provider
+        self.fence = fence
+        self.horizon = horizon_seconds or Config.REMINDER_ENGINE_HORIZON_SECONDS
+        self.precision = (precision_ms or Config.REMINDER_ENGINE_PRECISION_MS) / 1000.0
+        self.sync_seconds = sync_seconds or Config.REMINDER_ENGINE_SYNC_SECONDS
+        self.log = log
+
+        self._heap = []        # (trigger_timestamp, reminder_id)
+        self._scheduled = {}   # reminder_id -> trigger_timestamp (stale heap entries are skipped)
+        self._partitions = set()
+        self._loaded_until = 0.0
+        self._last_sync = None
+        self._cond = threading.Condition()
+        self._stop = threading.Event()
+        self._lags_ms = deque(maxlen=10000)
+        self._metrics_lock = threading.Lock()  # _fire appends from the timer thread while lag_stats reads
+        self._fired = 0
+        self._threads = []
+
+    # --- Heap maintenance ---
+
+    def _schedule(self, reminder_id, trigger_time):
+        ts = trigger_time.timestamp()
+        if self._scheduled.get(reminder_id) == ts:
+            return
+        self._scheduled[reminder_id] = ts
+        heapq.heappush(self._heap, (ts, reminder_id))
+
+    def _unschedule(self, reminder_id):
+        self._scheduled.pop(reminder_id, None)
+
+    def _apply_doc(self, doc):
+        """Schedules or drops one reminder according to its current state."""
+        partition = doc.get('partition')
+        in_scope = partition in self._partitions or (partition is None and 0 in self._partitions)
+        trigger_time = doc.get('trigger_time')
+        if (doc.get('status') == 'Pending' and in_scope and isinstance(trigger_time, datetime)
+                and trigger_time.timestamp() <= self._loaded_until):
+            self._schedule(doc['_id'], trigger_time)
+        else:
+            self._unschedule(doc['_id'])
+
+    def reload(self):
+        """Rebuilds the heap for the currently leased partitions and a fresh horizon window."""
+        partitions = set(self.partitions_provider())
+        now = datetime.now()
+        until = now + timedelta(seconds=self.horizon)
+        docs = list(Reminder.find_pending_within(until, partitions)) if partitions else []
+        with self._cond:
+            self._partitions = partitions
+            self._loaded_until = until.timestamp()
+            self._heap, self._scheduled = [], {}
+            for doc in docs:
+                self._apply_doc(doc)
+            self._last_sync = now
+            self._cond.notify()
+        self.log(f"[ReminderEngine] loaded {len(self._scheduled)} reminder(s) due before {until.strftime('%H:%M:%S')} "
+                 f"for partitions {sorted(partitions)}")
+
+    def on_change(self, doc=None, deleted_id=None):
+        """Applies a single reminder change (insert/update) or deletion."""
+        with self._cond:
+            if deleted_id is not None:
+                self._unschedule(deleted_id)
+            elif doc is not None:
+                self._apply_doc(doc)
+            self._cond.notify()
+
+    def _sync_incremental(self):
+        since, now = self._last_sync, datetime.now()
+        if since is None or not self._partitions:
+            return
+        for doc in Reminder.find_pending_within(None, self._partitions, since=since):
+            self.on_change(doc)
+        self._last_sync = now
+
+    # --- Threads ---
+
+    def _timer_loop(self):
+        while not self._stop.is_set():
+            with self._cond:
+                now = time.time()
+                if now >= self._loaded_until - self.precision:
+                    due = None  # Horizon exhausted: reload outside the lock
+                else:
+                    due = []
+                    while self._heap and self._heap[0][0] <= now + self.precision:
+                        ts, reminder_id = heapq.heappop(self._heap)
+                        if self._scheduled.get(reminder_id) == ts:
+                            del self._scheduled[reminder_id]
+                            due.append((ts, reminder_id))
+                    if not due:
+                        next_ts = self._heap[0][0] if self._heap else self._loaded_until
+                        self._cond.wait(timeout=max(0.0, min(next_ts, self._loaded_until) - now))
+                        continue
+            try:
+                if due is None:
+                    self.reload()
+                else:
+                    self._fire(due)
+            except PyMongoError as e:
+                self.log(f"[ReminderEngine] database error, retrying: {e}")
+                self._stop.wait(1.0)
+            except Exception as e:
+                # e.g. DocumentTooLarge (not a PyMongoError): never let the timer thread die silently
+                self.log(f"[ReminderEngine] unexpected error in timer loop, retrying: {e!r}")
+                self._stop.wait(1.0)
+
+    def _fire(self, due):
+        if self.fence is not None and not self.fence():
+            self.log('[ReminderEngine] partition lease lost; dropping timers until the next reload')
+            with self._cond:
+                self._heap, self._scheduled = [], {}
+            return
+        # A backlog preloaded after downtime can be large: claim it in REMINDER_TRIGGER_BATCH_SIZE
+        # slices, like the sweep does, so no single update_many grows past the command size limit
+        batch_size = Config.REMINDER_TRIGGER_BATCH_SIZE
+        for start in range(0, len(due), batch_size):
+            batch = due[start:start + batch_size]
+            now = datetime.now()
+            reminder_ids = [reminder_id for _, reminder_id in batch]
+            result = Reminder.mark_triggered(reminder_ids, now)
+            fired_at = time.time()
+            if result.modified_count:
+                publish_triggered_reminders(Reminder.find_triggered_in_batch(reminder_ids, now))
+            with self._metrics_lock:
+                self._lags_ms.extend((fired_at - ts) * 1000 for ts, _ in batch)
+                self._fired += result.modified_count
+
+    def _change_loop(self):
+        try:
+            with Reminder.watch_changes() as stream:
+                self.log('[ReminderEngine] following reminder changes via change stream')
+                for change in stream:
+                    if self._stop.is_set():
+                        return
+                    if change['operationType'] == 'delete':
+                        self.on_change(deleted_id=change['documentKey']['_id'])
+                    elif change.get('fullDocument'):
+                        self.on_change(change['fullDocument'])
+        except OperationFailure:
+            self.log(f"[ReminderEngine] change streams unavailable; syncing every {self.sync_seconds}s instead")
+        except PyMongoError as e:
+            self.log(f"[ReminderEngine] change stream failed ({e}); syncing every {self.sync_seconds}s instead")
+        while not self._stop.wait(self.sync_seconds):
+            try:
+                self._sync_incremental()
+            except PyMongoError as e:
+                self.log(f"[ReminderEngine] incremental sync failed: {e}")
+
+    def start(self):
+        self.reload()
+        for target, name in ((self._timer_loop, 'reminder-timer'), (self._change_loop, 'reminder-changes')):
+            thread = threading.Thread(target=target, name=name, daemon=True)
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        self._stop.set()
+        with self._cond:
+            self._cond.notify_all()
+
+    # --- Metrics ---
+
+    def lag_stats(self):
+        """Trigger-lag percentiles (ms) over the most recent fired reminders."""
+        with self._metrics_lock:
+            lags, fired = list(self._lags_ms), self._fired
+        lags.sort()
+        if not lags:
+            return {'fired': fired, 'samples': 0}
+        pick = lambda q: round(lags[min(len(lags) - 1, int(q * len(lags)))], 1)
+        return {
+            'fired': fired,
+            'samples': len(lags),
+            'p50_ms': pick(0.50),
+            'p90_ms': pick(0.90),
+            'p99_ms': pick(0.99),
+            'max_ms': round(lags[-1], 1),
+            'scheduled': len(self._scheduled)
+        }
@@ -1,8 +1,17 @@
+import time
 from datetime import datetime, timedelta
-# CRITICAL FIX: Import the database connection 'db' along with the Reminder model.
-from ..models.reminder import Reminder, db 
+from bson.objectid import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from ..config import Config
+from ..models.reminder import Reminder
+from ..models.db import get_db
 from ..models.task import Task
+from ..models.normalize import parse_due_date, normalize_user_id, due_of, effective_due
+from .event_service import publish_triggered_reminders
 
+# Reminder types whose trigger time is derived from the task's due date
+RELATIVE_REMINDER_TYPES = ('Relative_Hours_Before',)
 def calculate_trigger_time(task_id, trigger_value, reminder_type):
     """Calculates the absolute datetime for the reminder trigger."""
     
@@ -12,7 +21,9 @@ def calculate_trigger_time(task_id, trigger_value, reminder_type):
         if not task or not task.get('due_date'):
             raise ValueError("Task not found or task has no due date for relative calculation.")
             
-        task_due_dt = datetime.strptime(task['due_date'], '%Y-%m-%d')
+        # Stored as a BSON date; parse_due_date also accepts not-yet-migrated string values
+        task_due_dt, due_has_time = parse_due_date(task['due_date'])
+        due_has_time = task.get('due_has_time', due_has_time)
     else:
         task_due_dt = None # Only used for Absolute reminders without task context
     
@@ -29,9 +40,8 @@ def calculate_trigger_time(task_id, trigger_value, reminder_type):
         if not task_due_dt:
              raise ValueError("Relative reminder requires an associated task with a due date.")
              
-        # For simplicity, let's assume the deadline is 5 PM on the due date if no time is specified in the task (for now)
-        due_dt = datetime.strptime(task['due_date'], '%Y-%m-%d') + timedelta(hours=17) # 5 PM
-        return due_dt - timedelta(hours=hours)
+        # Assume the deadline is 5 PM on the due date if no time is specified in the task
+        return effective_due(task_due_dt, due_has_time) - timedelta(hours=hours)
 
     else: # Default/Error case
         raise ValueError(f"Invalid reminder type: {reminder_type}")
@@ -66,19 +76,138 @@ def add_reminder(user_id, task_id, trigger_value, message, reminder_type='Absolu
             task_id=task_id if task_id else None, # Store ObjectId or None if General
             trigger_time=final_trigger_time,
             message=message,
-            reminder_type=reminder_type
+            reminder_type=reminder_type,
+            # Kept so the trigger time can be recomputed when the task's due date moves
+            offset_hours=int(trigger_value) if reminder_type in RELATIVE_REMINDER_TYPES else None
         )
         new_reminder.save()
         return {'message': 'Reminder set successfully'}, 201
 
+    except DuplicateKeyError:
+        return {'error': 'An identical reminder is already pending for this task'}, 409
     except ValueError as e:
         return {'error': str(e)}, 400
     except Exception as e:
         return {'error': f"Internal server error: {e}"}, 500
 
-def get_user_reminders(user_id):
-    """Fetches all reminders for a user and formats them."""
-    reminders = Reminder.find_by_user_id(user_id)
+def add_reminders_bulk(user_id, filters, trigger_value, message=None, reminder_type='Relative_Hours_Before', requested_ids=None):
+    """
+    Creates one reminder per task matching `filters` from a single rule.
+    The tasks are fetched with one query, trigger times are computed in memory and the reminders
+    are written with one unordered insert_many; reminders identical to a pending one (same task,
+    type and trigger time) are rejected by the unique index and reported as duplicates.
+    Tasks without a due date (relative rules) or whose trigger time has passed are skipped.
+    `requested_ids` (when tasks were selected by ID) lets IDs that matched nothing be reported.
+    Returns (response_dict, status_code).
+    """
+    # Validate the rule before touching the database
+    if reminder_type != 'Absolute' and reminder_type not in RELATIVE_REMINDER_TYPES:
+        return {'error': f"Invalid reminder type: {reminder_type}"}, 400
+    try:
+        if reminder_type == 'Absolute':
+            absolute_time, offset_hours = calculate_trigger_time(None, trigger_value, reminder_type), None
+        else:
+            offset_hours = int(trigger_value)
+    except (TypeError, ValueError):
+        return {'error': 'Invalid trigger_value for this reminder type'}, 400
+
+    # One more than the limit is enough to tell the filter is too broad, without loading every match
+    tasks = Task.find_reminder_targets(normalize_user_id(user_id), filters, Config.REMINDER_BULK_MAX_TASKS + 1)
+    if len(tasks) > Config.REMINDER_BULK_MAX_TASKS:
+        return {'error': f"At most {Config.REMINDER_BULK_MAX_TASKS} tasks can be targeted per request"}, 400
+
+    now = datetime.now()
+    docs = []
+    skipped = {'no_due_date': 0, 'past': 0}
+    for task in tasks:
+        if offset_hours is None:
+            trigger_time = absolute_time
+            text = message or f"Reminder for task: {task['title']} set for {trigger_time.strftime('%Y-%m-%d %H:%M')}."
+        else:
+            due_date, due_has_time = due_of(task)
+            if due_date is None:
+                skipped['no_due_date'] += 1
+                continue
+            trigger_time = effective_due(due_date, due_has_time) - timedelta(hours=offset_hours)
+            text = message or f"Reminder for task: {task['title']}, {offset_hours} hours before deadline."
+        if trigger_time <= now:
+            skipped['past'] += 1
+            continue
+        docs.append(Reminder(user_id, str(task['_id']), trigger_time, text, reminder_type, offset_hours).to_document())
+
+    created = duplicates = 0
+    if docs:
+        try:
+            created = len(Reminder.insert_many(docs).inserted_ids)
+        except BulkWriteError as e:
+            errors = e.details.get('writeErrors', [])
+            if any(error.get('code') != 11000 for error in errors):
+                return {'error': f"Internal server error: {errors[0].get('errmsg')}"}, 500
+            created = e.details.get('nInserted', 0)
+            duplicates = len(errors)
+
+    response = {
+        'created': created,
+        'duplicates': duplicates,
+        'skipped': skipped,
+        'matched_tasks': len(tasks)
+    }
+    if requested_ids is not None:
+        found = {str(task['_id']) for task in tasks}
+        response['not_found'] = [task_id for task_id in requested_ids if task_id not in found]
+    return response, 201 if created else 200
+
+def reschedule_relative_reminders(changes):
+    """
+    Recomputes the trigger time of pending relative reminders after due-date changes.
+    `changes` maps task ObjectId -> (task_before, task_after). The affected reminders are found
+    through the task_id index and rewritten with one bulk_write; returns the number updated.
+    Reminders of a task whose due date was cleared are left as they are.
+    """
+    deadlines = {}  # task_id -> (old deadline or None, new deadline)
+    for task_id, (before, after) in changes.items():
+        new_due, new_has_time = due_of(after)
+        if new_due is None:
+            continue
+        old_due, old_has_time = due_of(before or {})
+        old_deadline = effective_due(old_due, old_has_time) if old_due else None
+        new_deadline = effective_due(new_due, new_has_time)
+        if old_deadline != new_deadline:
+            deadlines[task_id] = (old_deadline, new_deadline)
+    if not deadlines:
+        return 0
+
+    now = datetime.now()
+    requests = []
+    for reminder in Reminder.find_pending_relative_by_task_ids(deadlines, RELATIVE_REMINDER_TYPES):
+        old_deadline, new_deadline = deadlines[reminder['task_id']]
+        if reminder.get('offset_hours') is not None:
+            offset = timedelta(hours=reminder['offset_hours'])
+        elif old_deadline is not None:
+            # Reminders created before offset_hours was stored: keep their original lead time
+            offset = old_deadline - reminder['trigger_time']
+        else:
+            continue
+        requests.append(UpdateOne(
+            {'_id': reminder['_id'], 'status': 'Pending'},
+            {'$set': {'trigger_time': new_deadline - offset, 'updated_at': now}}
+        ))
+    if not requests:
+        return 0
+    try:
+        return Reminder.bulk_write(requests).modified_count
+    except BulkWriteError as e:
+        # A reminder that would land on an identical pending one (unique index) keeps its old time
+        return e.details.get('nModified', 0)
+
+def delete_task_reminders(task_ids):
+    """Cascade-deletes the reminders of deleted tasks; returns the number removed."""
+    task_ids = [ObjectId(t) if isinstance(t, str) else t for t in task_ids]
+    return Reminder.delete_by_task_ids(task_ids).deleted_count if task_ids else 0
+
+def get_user_reminders(user_id, include_archived=False):
+    """Fetches all reminders for a user and formats them (archived ones only on request, up to REMINDER_LIST_ARCHIVED_LIMIT)."""
+    reminders = Reminder.find_by_user_id(user_id, include_archived)
     
     # Format for JSON
     for reminder in reminders:
@@ -88,6 +217,10 @@ def get_user_reminders(user_id):
             
         reminder['trigger_time'] = reminder['trigger_time'].isoformat()
         reminder['created_at'] = reminder['created_at'].isoformat()
+        for field in ('updated_at', 'triggered_at', 'archived_at'):
+            if reminder.get(field):
+                reminder[field] = reminder[field].isoformat()
+        reminder['archived'] = 'archived_at' in reminder
         
     return reminders
 
@@ -100,8 +233,7 @@ def dismiss_reminder(reminder_id):
 
 def get_triggered_reminders(user_id):
     """Fetches all reminders marked as Triggered for the Alerts page."""
-    # The 'db' variable is now correctly imported from the Reminder model.
-    reminders = db.reminders.find({ 
+    reminders = get_db().reminders.find({ 
         'user_id': user_id, 
         'status': 'Triggered'
     }).sort('trigger_time', 1)
@@ -119,23 +251,95 @@ def get_triggered_reminders(user_id):
     
 # --- Background Processor Logic ---
 
-def check_and_trigger_reminders():
+def check_and_trigger_reminders(batch_size=None, time_budget_seconds=None, partitions=None, fence=None):
     """
-    Checks the database for pending reminders that are past due
-    and updates their status to 'Triggered'.
+    Checks the database for pending reminders that are past due and marks them 'Triggered'
+    in bounded batches (one find + one update_many each). Stops when nothing is due or the
+    time budget is spent, leaving any remainder for the next pass.
+    Every reminder that is flipped is published as a 'reminder.triggered' event.
+    `partitions` limits the pass to the reminder partitions this instance leases, and `fence`
+    (a callable) is checked before every batch so an instance that lost its leases stops writing.
+    Returns {'triggered', 'batches': [{'claimed', 'triggered', 'latency_ms'}], 'elapsed_ms',
+    'budget_exhausted', 'fenced'}.
     """
+    batch_size = batch_size or Config.REMINDER_TRIGGER_BATCH_SIZE
+    time_budget = time_budget_seconds if time_budget_seconds is not None else Config.REMINDER_TRIGGER_TIME_BUDGET_SECONDS
+    started = time.monotonic()
     now = datetime.now()
-    due_reminders = Reminder.find_pending_before(now)
-    
+
+    batches = []
     triggered_count = 0
-    for reminder in due_reminders:
-        try:
-            # Mark the reminder as triggered
-            Reminder.update_status(str(reminder['_id']), 'Triggered')
-            triggered_count += 1
-            # print(f"Reminder triggered: ID {reminder['_id']}, Task ID {reminder['task_id']}") # Logging handled by scheduler.py
-        except Exception as e:
-            # print(f"Error triggering reminder {reminder['_id']}: {e}") # Logging handled by scheduler.py
-            pass
-            
-    return triggered_count
\ No newline at end of file
+    budget_exhausted = False
+    fenced = False
+    while True:
+        if time.monotonic() - started >= time_budget:
+            budget_exhausted = True
+            break
+        if fence is not None and not fence():
+            fenced = True
+            break
+        batch_started = time.monotonic()
+        due_ids = Reminder.find_due_ids(now, batch_size, partitions)
+        if not due_ids:
+            break
+        result = Reminder.mark_triggered(due_ids, now)
+        if result.modified_count:
+            publish_triggered_reminders(Reminder.find_triggered_in_batch(due_ids, now))
+        batches.append({
+            'claimed': len(due_ids),
+            'triggered': result.modified_count,
+            'latency_ms': round((time.monotonic() - batch_started) * 1000, 1)
+        })
+        triggered_count += result.modified_count
+        if len(due_ids) < batch_size:
+            break
+
+    return {
+        'triggered': triggered_count,
+        'batches': batches,
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+        'budget_exhausted': budget_exhausted,
+        'fenced': fenced
+    }
+
+# --- Retention ---
+
+def archive_old_reminders(batch_size=None, time_budget_seconds=None, partitions=None, fence=None, now=None):
+    """
+    Moves Triggered/Dismissed reminders past their retention window (REMINDER_RETENTION_*_DAYS,
+    measured from the trigger time) to reminders_archive in batches of `batch_size`.
+    Like the trigger pass it is bounded by a time budget, limited to `partitions` and checks
+    `fence` before every batch. Returns {'archived': {status: count}, 'batches', 'elapsed_ms', 'fenced'}.
+    """
+    batch_size = batch_size or Config.REMINDER_ARCHIVE_BATCH_SIZE
+    time_budget = time_budget_seconds if time_budget_seconds is not None else Config.REMINDER_TRIGGER_TIME_BUDGET_SECONDS
+    now = now or datetime.now()
+    windows = {
+        'Triggered': Config.REMINDER_RETENTION_TRIGGERED_DAYS,
+        'Dismissed': Config.REMINDER_RETENTION_DISMISSED_DAYS,
+    }
+    started = time.monotonic()
+    archived = {status: 0 for status in windows}
+    batches = 0
+    fenced = False
+    for status, days in windows.items():
+        cutoff = now - timedelta(days=days)
+        while time.monotonic() - started < time_budget:
+            if fence is not None and not fence():
+                fenced = True
+                break
+            docs = Reminder.find_expired(status, cutoff, batch_size, partitions)
+            if not docs:
+                break
+            archived[status] += Reminder.archive(docs, status, now).deleted_count
+            batches += 1
+            if len(docs) < batch_size:
+                break
+        if fenced:
+            break
+    return {
+        'archived': archived,
+        'batches': batches,
+        'elapsed_ms': round((time.monotonic() - started) * 1000, 1),
+        'fenced': fenced
+    }
@@ -0,0 +1,79 @@
+# services/scheduler_coordinator.py
+import math
+import os
+import random
+import socket
+import threading
+import uuid
+from ..config import Config
+from ..models.lease import Lease, SchedulerMembers
+
+def _lease_name(partition):
+    return f"reminders:{partition}"
+
+class PartitionCoordinator:
+    """
+    Splits the reminder partitions between every running scheduler process.
+
+    Each instance heartbeats into scheduler_members and holds at most
+    ceil(partitions / live_instances) partition leases. Leases are renewed every
+    SCHEDULER_LEASE_RENEW_SECONDS; if an instance crashes, its leases expire after
+    SCHEDULER_LEASE_TTL_SECONDS and the survivors pick them up on their next rebalance.
+    """
+
+    def __init__(self, owner=None, partitions=None, ttl_seconds=None):
+        self.owner = owner or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.partitions = partitions or Config.REMINDER_PARTITIONS
+        self.ttl_seconds = ttl_seconds or Config.SCHEDULER_LEASE_TTL_SECONDS
+        self._held = {}  # partition -> fencing token
+        self._lock = threading.Lock()
+        # Each instance probes partitions in its own order so concurrent starts spread out
+        self._probe_order = list(range(self.partitions))
+        random.Random(self.owner).shuffle(self._probe_order)
+
+    def rebalance(self):
+        """Heartbeats, renews held leases, sheds extras and acquires free partitions up to the fair share."""
+        SchedulerMembers.heartbeat(self.owner, self.ttl_seconds)
+        alive = max(1, SchedulerMembers.count_alive())
+        target = math.ceil(self.partitions / alive)
+
+        with self._lock:
+            held = {}
+            for partition, token in self._held.items():
+                if Lease.renew(_lease_name(partition), self.owner, token, self.ttl_seconds):
+                    held[partition] = token
+
+            # Give back partitions above the fair share so newly started instances get work
+            for partition in sorted(held)[target:]:
+                Lease.release(_lease_name(partition), self.owner, held.pop(partition))
+
+            for partition in self._probe_order:
+                if len(held) >= target:
+                    break
+                if partition in held:
+                    continue
+                token = Lease.acquire(_lease_name(partition), self.owner, self.ttl_seconds)
+                if token is not None:
+                    held[partition] = token
+
+            self._held = held
+            return sorted(held)
+
+    def held_partitions(self):
+        with self._lock:
+            return sorted(self._held)
+
+    def still_valid(self):
+        """Fencing check before each write batch: False as soon as any held lease was lost."""
+        with self._lock:
+            held = dict(self._held)
+        names_and_tokens = [(_lease_name(p), t) for p, t in held.items()]
+        return Lease.count_valid(names_and_tokens, self.owner) == len(names_and_tokens)
+
+    def shutdown(self):
+        """Releases every lease and leaves the membership so the others take over immediately."""
+        with self._lock:
+            for partition, token in self._held.items():
+                Lease.release(_lease_name(partition), self.owner, token)
+            self._held = {}
+        SchedulerMembers.leave(self.owner)
@@ -1,13 +1,17 @@
 import json
 from ..models.subtask import Subtask
 from ..models.task import Task
-from ..services.ai_service import client, MODEL, _api_key_check
-from google.genai.errors import APIError
+from ..models.normalize import normalize_status, normalize_user_id
+from ..models.data_version import DataVersion
+from ..services.ai_service import provider, MODEL, _api_key_check
+from .ai_cache_service import ai_cache
+from .ai_providers import APIError, KIND_NUMBERED, KIND_BULLETS
 
 def create_subtask_manual(parent_task_id, title, user_id, description=""):
     """Manually create a subtask."""
-    new_subtask = Subtask(parent_task_id, title, description, user_id)
+    new_subtask = Subtask(parent_task_id, title, description, normalize_user_id(user_id))
     new_subtask.save()
+    DataVersion.bump(user_id)
     return {'message': 'Subtask created successfully'}, 201
 
 def get_subtasks_for_task(parent_task_id):
@@ -20,24 +24,34 @@ def get_subtasks_for_task(parent_task_id):
         subtask['created_at'] = subtask['created_at'].isoformat()
     return subtasks
 
-def mark_subtask_status(subtask_id, status):
+def mark_subtask_status(subtask_id, status, user_id=None):
     """Mark a subtask as completed or update status."""
+    try:
+        status = normalize_status(status)
+    except ValueError as e:
+        return {'error': str(e)}, 400
     result = Subtask.update_status(subtask_id, status)
     if result.modified_count > 0:
+        DataVersion.bump(user_id)
         return {'message': f'Subtask marked as {status}'}, 200
     return {'error': 'Subtask not found'}, 404
 
-def delete_subtask(subtask_id):
+def delete_subtask(subtask_id, user_id=None):
     """Delete a single subtask."""
     result = Subtask.delete_by_id(subtask_id)
     if result.deleted_count > 0:
+        DataVersion.bump(user_id)
         return {'message': 'Subtask deleted successfully'}, 200
     return {'error': 'Subtask not found'}, 404
 
 # --- AI Subtask Generation (Saves to DB - Used by task_list.html) ---
 
-def generate_subtasks_with_ai(parent_task_id, task_description, user_id):
-    """Generates subtasks using the Gemini API, parses them, and saves to the database."""
+def generate_subtasks_with_ai(parent_task_id, task_description, user_id, job_id=None):
+    """
+    Generates subtasks using the Gemini API, parses them, and saves to the database in one write.
+    When run as a background job, the subtasks are tagged with job_id and a retry first removes
+    whatever an earlier attempt saved, so retries never pile up duplicate subtasks.
+    """
     error_check = _api_key_check()
     if error_check:
         return {'error': error_check}, 500
@@ -50,12 +64,7 @@ def generate_subtasks_with_ai(parent_task_id, task_description, user_id):
     """
 
     try:
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=prompt,
-        )
-        
-        summary_text = response.text.strip()
+        summary_text = provider.generate(prompt, kind=KIND_NUMBERED).strip()
         
         # 💡 NEW PARSING: Split the text by newline and clean up numbering/whitespace
         raw_points = summary_text.split('\n')
@@ -77,19 +86,19 @@ def generate_subtasks_with_ai(parent_task_id, task_description, user_id):
         if not subtask_list:
             raise ValueError("AI failed to return any discernible subtasks.")
             
-        # Save each parsed subtask to the database
-        saved_titles = []
-        for item in subtask_list:
-            new_subtask = Subtask(
-                parent_task_id, 
-                item['title'], 
-                item['description'], 
-                user_id
-            )
-            new_subtask.save()
-            saved_titles.append(item['title'])
-
-        return {'message': f'Successfully generated and saved {len(saved_titles)} subtasks.', 'subtasks': subtask_list}, 200
+        # Save all parsed subtasks to the database with one insert_many
+        subtask_docs = [
+            Subtask(parent_task_id, item['title'], item['description'], normalize_user_id(user_id)).to_document()
+            for item in subtask_list
+        ]
+        if job_id is not None:
+            for doc in subtask_docs:
+                doc['job_id'] = job_id
+            Subtask.delete_by_job_id(job_id)  # A previous attempt may have saved some before failing
+        Subtask.insert_many(subtask_docs)
+        DataVersion.bump(user_id)
+
+        return {'message': f'Successfully generated and saved {len(subtask_docs)} subtasks.', 'subtasks': subtask_list}, 200
 
     except APIError as e:
         print(f"Gemini API Error (Subtasks): {e}")
@@ -100,6 +109,21 @@ def generate_subtasks_with_ai(parent_task_id, task_description, user_id):
 
 # --- AI Subtask Generation (No DB Save - Used by sandbox page) ---
 
+# 💡 FIX: Prompt for a clean markdown bullet list
+SUBTASKS_MARKDOWN_PROMPT_TEMPLATE = """Analyze the following task description and break it down into 4-6 detailed, actionable subtasks.
+    Return the output as a clean, structured list using markdown bullet points (*).
+    
+    Complex Task: {task_description}
+    """
+
+def _generate_subtasks_markdown(task_description):
+    """One upstream call; API errors propagate to the caller (and are never cached)."""
+    markdown = provider.generate(
+        SUBTASKS_MARKDOWN_PROMPT_TEMPLATE.format(task_description=task_description), kind=KIND_BULLETS
+    )
+    # 💡 FIX: Return the raw markdown text directly
+    return markdown.strip()
+
 def generate_subtasks_only(task_description, user_id):
     """Generates subtasks using the Gemini API and returns the markdown text."""
     error_check = _api_key_check()
@@ -107,21 +131,13 @@ def generate_subtasks_only(task_description, user_id):
         # 💡 FIX: Return error message in 'error' key
         return {'error': error_check}, 500
 
-    # 💡 FIX: Prompt for a clean markdown bullet list
-    prompt = f"""Analyze the following task description and break it down into 4-6 detailed, actionable subtasks.
-    Return the output as a clean, structured list using markdown bullet points (*).
-    
-    Complex Task: {task_description}
-    """
-
     try:
-        response = client.models.generate_content(
-            model=MODEL,
-            contents=prompt,
+        # Identical descriptions are answered from the AI cache (one upstream call for concurrent duplicates)
+        markdown_output = ai_cache.get_or_compute(
+            'subtasks_markdown', SUBTASKS_MARKDOWN_PROMPT_TEMPLATE, MODEL, task_description,
+            lambda: _generate_subtasks_markdown(task_description),
+            cacheable=bool
         )
-        
-        # 💡 FIX: Return the raw markdown text directly
-        markdown_output = response.text.strip()
              
         # Return the generated markdown text directly
         return {'message': 'Subtasks generated successfully.', 'markdown_output': markdown_output}, 200
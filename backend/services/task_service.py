@@ -1,36 +1,145 @@
+import base64
+from datetime import datetime, timedelta
+from bson import json_util
+from bson.objectid import ObjectId
+from bson.errors import InvalidId
+from pymongo import ASCENDING, DESCENDING, InsertOne, UpdateOne, DeleteOne
+from pymongo.errors import BulkWriteError
+from ..config import Config
 from ..models.task import Task
+from ..models.daily_stats import DailyStats, task_contributions
+from ..models.data_version import DataVersion
+from ..models.normalize import (
+    normalize_status, normalize_user_id, normalize_task_fields, parse_due_date, format_due_date, STATUS_COMPLETED
+)
 from ..services.ai_service import generate_task_summary
+from .event_service import publish, publish_many
+from .reminder_service import reschedule_relative_reminders, delete_task_reminders
 # 💡 NEW IMPORT: Import the subtask model's function
 from ..models.subtask import Subtask 
 
+# Sort fields accepted by the task list; each is backed by a (user_id, field, _id) index
+TASK_SORT_FIELDS = ('created_at', 'due_date')
+
 def create_task(title, description, priority, tags, due_date, status, user_id):
 # ... (Rest of function remains the same)
-    new_task = Task(title, description, priority, tags, due_date, status, user_id)
-    new_task.save()
+    try:
+        status = normalize_status(status)
+        due_date, due_has_time = parse_due_date(due_date)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    new_task = Task(title, description, priority, tags, due_date, status, normalize_user_id(user_id),
+                    due_has_time=due_has_time)
+    result = new_task.save()
+    DailyStats.apply_changes(new_task.user_id, after=new_task.to_document())
+    DataVersion.bump(new_task.user_id)
+    publish(new_task.user_id, 'task.created', {'task_id': str(result.inserted_id)})
     return {'message': 'Task created successfully'}, 201
 
-def get_user_tasks(user_id):
+def _serialize_task(task):
+    # Convert ObjectId/datetime fields for JSON serialization
+    task['_id'] = str(task['_id'])
+    task['created_at'] = task['created_at'].isoformat() if task.get('created_at') else None
+    task['updated_at'] = task['updated_at'].isoformat() if task.get('updated_at') else None
+    # Due dates are stored as BSON dates but keep their 'YYYY-MM-DD[THH:MM]' API format
+    task['due_date'] = format_due_date(task.get('due_date'), task.pop('due_has_time', False))
+    return task
+
+def build_task_filters(status=None, priority=None, tags=None, due_from=None, due_to=None):
+    """
+    Builds the Mongo filter for the task list from comma-separated query parameters.
+    tags matches tasks carrying any of the given tags; due_from/due_to are inclusive bounds
+    ('YYYY-MM-DD' covers the whole day, or 'YYYY-MM-DDTHH:MM').
+    Raises ValueError for an unknown status or malformed date.
+    """
+    filters = {}
+    if status:
+        filters['status'] = {'$in': [normalize_status(s) for s in status.split(',') if s.strip()]}
+    if priority:
+        filters['priority'] = {'$in': [p.strip() for p in priority.split(',') if p.strip()]}
+    if tags:
+        filters['tags'] = {'$in': [t.strip() for t in tags.split(',') if t.strip()]}
+    if due_from or due_to:
+        due_range = {}
+        if due_from:
+            due_range['$gte'] = parse_due_date(due_from)[0]
+        if due_to:
+            due_to_dt, has_time = parse_due_date(due_to)
+            if has_time:
+                due_range['$lte'] = due_to_dt
+            else:
+                due_range['$lt'] = due_to_dt + timedelta(days=1)
+        filters['due_date'] = due_range
+    return filters
+
+def _encode_cursor(task, sort_field):
+    raw = json_util.dumps([task.get(sort_field), task['_id']])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+def _decode_cursor(cursor):
+    value, last_id = json_util.loads(base64.urlsafe_b64decode(cursor.encode()).decode())
+    return value, last_id
+
+def get_user_tasks(user_id, filters=None):
 # ... (Rest of function remains the same)
-    tasks = Task.find_by_user_id(user_id)
-    # Convert ObjectId to string for JSON serialization
-    for task in tasks:
-        task['_id'] = str(task['_id'])
-        task['created_at'] = task['created_at'].isoformat() if task['created_at'] else None
-        task['updated_at'] = task['updated_at'].isoformat() if task['updated_at'] else None
-    return tasks
+    tasks = Task.find_by_user_id(user_id, filters)
+    return [_serialize_task(task) for task in tasks]
+
+def get_user_tasks_page(user_id, filters=None, sort='created_at', order='asc', limit=None, cursor=None):
+    """
+    Returns one keyset-paginated page of a user's tasks.
+    The page is ordered by (sort, _id) so ties are broken stably; pass the returned
+    'next_cursor' back as `cursor` to fetch the following page.
+    """
+    if sort not in TASK_SORT_FIELDS:
+        return {'error': f"Invalid sort field. Allowed: {', '.join(TASK_SORT_FIELDS)}"}, 400
+    if order not in ('asc', 'desc'):
+        return {'error': "Invalid order. Allowed: asc, desc"}, 400
+    try:
+        limit = int(limit) if limit is not None else Config.TASKS_PAGE_SIZE_DEFAULT
+    except (TypeError, ValueError):
+        return {'error': 'limit must be an integer'}, 400
+    limit = max(1, min(limit, Config.TASKS_PAGE_SIZE_MAX))
+
+    after = None
+    if cursor:
+        try:
+            after = _decode_cursor(cursor)
+        except Exception:
+            return {'error': 'Invalid cursor'}, 400
+
+    direction = ASCENDING if order == 'asc' else DESCENDING
+    tasks = Task.find_page(user_id, filters, sort, direction, limit, after)
+    has_more = len(tasks) > limit
+    tasks = tasks[:limit]
+    next_cursor = _encode_cursor(tasks[-1], sort) if has_more else None
+
+    return {
+        'tasks': [_serialize_task(task) for task in tasks],
+        'next_cursor': next_cursor,
+        'has_more': has_more,
+        'limit': limit
+    }, 200
 
 def get_task_by_id(task_id):
     task = Task.find_by_id(task_id)
     if task:
-        task['_id'] = str(task['_id'])
-        task['created_at'] = task['created_at'].isoformat() if task['created_at'] else None
-        task['updated_at'] = task['updated_at'].isoformat() if task['updated_at'] else None
+        _serialize_task(task)
     return task
 
 def update_task(task_id, update_data):
 # ... (Rest of function remains the same)
-    result = Task.update_task(task_id, update_data)
-    if result.modified_count > 0:
+    try:
+        normalize_task_fields(update_data)
+    except ValueError as e:
+        return {'error': str(e)}, 400
+    previous = Task.update_and_get_previous(task_id, update_data)
+    if previous:
+        DailyStats.apply_changes(previous.get('user_id'), before=previous, after={**previous, **update_data})
+        if 'due_date' in update_data:
+            reschedule_relative_reminders({previous['_id']: (previous, {**previous, **update_data})})
+        DataVersion.bump(previous.get('user_id'))
+        publish(previous.get('user_id'), 'task.updated', {'task_id': str(previous['_id']), 'fields': sorted(update_data)})
         return {'message': 'Task updated successfully'}, 200
     return {'error': 'Task not found'}, 404
 
@@ -38,46 +147,185 @@ def delete_task(task_id):
     # 💡 CRITICAL FIX: Delete associated subtasks first
     Subtask.delete_by_parent_id(task_id)
     
-    result = Task.delete_task(task_id)
-    if result.deleted_count > 0:
+    deleted = Task.delete_and_get_previous(task_id)
+    if deleted:
+        delete_task_reminders([deleted['_id']])
+        DailyStats.apply_changes(deleted.get('user_id'), before=deleted)
+        DataVersion.bump(deleted.get('user_id'))
+        publish(deleted.get('user_id'), 'task.deleted', {'task_id': str(deleted['_id'])})
         return {'message': 'Task deleted successfully'}, 200
     return {'error': 'Task not found'}, 404
     
 def mark_task_completed(task_id):
-    return update_task(task_id, {'status': 'Completed'})
+    return update_task(task_id, {'status': STATUS_COMPLETED})
+
+def get_alert_tasks(user_id, limit=None):
+    """
+    Returns the user's open tasks bucketed into overdue / due today / high priority.
+    Bucketing runs in the database; each bucket is capped at `limit` and carries its full count.
+    """
+    try:
+        limit = int(limit) if limit is not None else Config.ALERTS_BUCKET_LIMIT
+    except (TypeError, ValueError):
+        limit = Config.ALERTS_BUCKET_LIMIT
+    limit = max(1, min(limit, Config.ALERTS_BUCKET_LIMIT_MAX))
+
+    today = datetime.now().replace(hour=0, minute=0, second=0, microsecond=0)
+    raw = Task.aggregate_alerts(normalize_user_id(user_id), today, today + timedelta(days=1), limit)
+    counts = (raw.get('counts') or [{}])[0]
 
-def get_alert_tasks(user_id):
-# ... (Rest of function remains the same)
-    from datetime import datetime, date
-    
-    all_tasks = get_user_tasks(user_id)
-    
-    today = date.today()
-    # ... (Rest of function remains the same)
-    
-    overdue_tasks = []
-    due_today_tasks = []
-    high_priority_tasks = []
-    
-    for task in all_tasks:
-        # Skip completed tasks
-        if task['status'] == 'Completed':
-            continue
-            
-        # Check for overdue tasks
-        if task['due_date']:
-            due_date = datetime.strptime(task['due_date'], '%Y-%m-%d').date()
-            if due_date < today:
-                overdue_tasks.append(task)
-            elif due_date == today:
-                due_today_tasks.append(task)
-        
-        # Check for high priority tasks
-        if task['priority'] == 'High':
-            high_priority_tasks.append(task)
-    
     return {
-        'overdueTasks': overdue_tasks,
-        'dueTodayTasks': due_today_tasks,
-        'highPriorityTasks': high_priority_tasks
-    }
\ No newline at end of file
+        'overdueTasks': [_serialize_task(task) for task in raw.get('overdue', [])],
+        'dueTodayTasks': [_serialize_task(task) for task in raw.get('dueToday', [])],
+        'highPriorityTasks': [_serialize_task(task) for task in raw.get('highPriority', [])],
+        'counts': {
+            'overdue': int(counts.get('overdue', 0)),
+            'dueToday': int(counts.get('dueToday', 0)),
+            'highPriority': int(counts.get('highPriority', 0))
+        },
+        'limit': limit
+    }
+
+# --- Bulk Mutations ---
+
+BULK_OPERATIONS = ('create', 'update', 'complete', 'delete')
+_BULK_EVENT_TYPES = {'create': 'task.created', 'update': 'task.updated', 'complete': 'task.updated', 'delete': 'task.deleted'}
+# Fields a bulk update may never overwrite
+_PROTECTED_FIELDS = ('_id', 'user_id', 'created_at')
+
+def _build_bulk_request(op, user_id, now):
+    """
+    Validates one bulk operation and converts it to a pymongo write model.
+    Returns (write_model, task_object_id, written_fields); raises ValueError for invalid input.
+    """
+    kind = op.get('op') if isinstance(op, dict) else None
+    if kind not in BULK_OPERATIONS:
+        raise ValueError(f"op must be one of: {', '.join(BULK_OPERATIONS)}")
+
+    if kind == 'create':
+        data = op.get('task') or {}
+        if not isinstance(data, dict):
+            raise ValueError('create requires a task object')
+        if not data.get('title') or not data.get('description'):
+            raise ValueError('Title and description are required')
+        due_date, due_has_time = parse_due_date(data.get('due_date'))
+        task = Task(
+            data['title'], data['description'], data.get('priority', 'Medium'), data.get('tags', []),
+            due_date, normalize_status(data.get('status')), user_id, due_has_time=due_has_time
+        )
+        doc = task.to_document()
+        doc['_id'] = ObjectId()
+        return InsertOne(doc), doc['_id'], doc
+
+    try:
+        task_oid = ObjectId(op.get('task_id'))
+    except (InvalidId, TypeError):
+        raise ValueError('A valid task_id is required')
+
+    if kind == 'delete':
+        return DeleteOne({'_id': task_oid, 'user_id': user_id}), task_oid, None
+
+    if kind == 'complete':
+        update_data = {'status': STATUS_COMPLETED}
+    else:
+        data = op.get('data') or {}
+        if not isinstance(data, dict):
+            raise ValueError('update requires a non-empty data object')
+        update_data = {k: v for k, v in data.items() if k not in _PROTECTED_FIELDS}
+        if not update_data:
+            raise ValueError('update requires a non-empty data object')
+        normalize_task_fields(update_data)
+    update_data['updated_at'] = now
+    return UpdateOne({'_id': task_oid, 'user_id': user_id}, {'$set': update_data}), task_oid, update_data
+
+def bulk_mutate_tasks(user_id, operations, ordered=True):
+    """
+    Applies a list of create/update/complete/delete operations with one tasks bulk_write.
+    Subtasks and reminders of deleted tasks are removed with one delete_many each afterwards,
+    and relative reminders of tasks whose due date changed are rescheduled in one bulk_write.
+    Ordered mode stops at the first failure (later operations are reported as 'skipped');
+    unordered mode attempts every valid operation.
+    Returns ({'results': [...per operation...], 'summary': {...}}, status_code).
+    """
+    if not isinstance(operations, list) or not operations:
+        return {'error': 'operations must be a non-empty list'}, 400
+    if len(operations) > Config.TASK_BULK_MAX_OPERATIONS:
+        return {'error': f"At most {Config.TASK_BULK_MAX_OPERATIONS} operations are allowed per request"}, 400
+
+    user_id = normalize_user_id(user_id)
+    now = datetime.now()
+    results = [None] * len(operations)
+    prepared = []  # (operation_index, kind, write_model, task_oid, written_fields)
+    for index, op in enumerate(operations):
+        try:
+            write_model, task_oid, written = _build_bulk_request(op, user_id, now)
+        except ValueError as e:
+            if ordered:
+                return {'error': f"Operation {index} is invalid: {e}"}, 400
+            results[index] = {'index': index, 'status': 'invalid', 'error': str(e)}
+            continue
+        prepared.append((index, op['op'], write_model, task_oid, written))
+
+    # One lookup decides which referenced tasks exist, so every operation gets a precise outcome
+    referenced = {oid for _, kind, _, oid, _ in prepared if kind != 'create'}
+    existing = Task.find_existing(referenced, user_id) if referenced else {}
+
+    requests, request_ops = [], []
+    for index, kind, write_model, task_oid, written in prepared:
+        if kind != 'create' and task_oid not in existing:
+            results[index] = {'index': index, 'status': 'not_found', 'task_id': str(task_oid)}
+            continue
+        requests.append(write_model)
+        request_ops.append((index, kind, task_oid, written))
+
+    failed = {}
+    if requests:
+        try:
+            Task.bulk_write(requests, ordered=ordered)
+        except BulkWriteError as e:
+            for error in e.details.get('writeErrors', []):
+                failed[error['index']] = error.get('errmsg', 'Write failed')
+
+    stop_at = min(failed) if (ordered and failed) else None
+    deleted_ids = []
+    due_changes = {}  # task_oid -> (state before this request, state after), for relative reminders
+    states = dict(existing)  # Current state per task, so repeated operations on one task chain correctly
+    rollup = []
+    for position, (index, kind, task_oid, written) in enumerate(request_ops):
+        if position in failed:
+            results[index] = {'index': index, 'status': 'error', 'task_id': str(task_oid), 'error': failed[position]}
+        elif stop_at is not None and position > stop_at:
+            results[index] = {'index': index, 'status': 'skipped', 'task_id': str(task_oid)}
+        else:
+            results[index] = {'index': index, 'status': 'ok', 'op': kind, 'task_id': str(task_oid)}
+            if kind == 'delete':
+                deleted_ids.append(task_oid)
+            before = states.get(task_oid)
+            after = None if kind == 'delete' else {**(before or {}), **written}
+            rollup += task_contributions(before, -1) + task_contributions(after, 1)
+            states[task_oid] = after
+            if kind == 'update' and 'due_date' in written:
+                due_changes[task_oid] = (due_changes.get(task_oid, (before,))[0], after)
+
+    DailyStats.apply_contributions(user_id, rollup)
+    if any(r['status'] == 'ok' for r in results):
+        DataVersion.bump(user_id)
+    publish_many([
+        (user_id, _BULK_EVENT_TYPES[r['op']], {'task_id': r['task_id']})
+        for r in results if r['status'] == 'ok'
+    ])
+
+    # Cascade: remove subtasks and reminders of every task that was actually deleted
+    subtasks_deleted = Subtask.delete_by_parent_ids(deleted_ids).deleted_count if deleted_ids else 0
+    reminders_deleted = delete_task_reminders(deleted_ids)
+    reminders_rescheduled = reschedule_relative_reminders(
+        {oid: change for oid, change in due_changes.items() if oid not in deleted_ids}
+    )
+
+    summary = {status: sum(1 for r in results if r['status'] == status)
+               for status in ('ok', 'not_found', 'invalid', 'error', 'skipped')}
+    summary['subtasks_deleted'] = subtasks_deleted
+    summary['reminders_deleted'] = reminders_deleted
+    summary['reminders_rescheduled'] = reminders_rescheduled
+    status_code = 200 if summary['ok'] == len(operations) else 207
+    return {'results': results, 'summary': summary}, status_code
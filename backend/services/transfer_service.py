@@ -0,0 +1,252 @@
+# services/transfer_service.py
+import codecs
+import json
+import time
+from bson import json_util
+from bson.objectid import ObjectId
+from ..config import Config
+from ..models.task import Task
+from ..models.subtask import Subtask
+from ..models.reminder import Reminder
+from ..models.normalize import normalize_task_fields, normalize_user_id
+from ..models.daily_stats import DailyStats, task_contributions
+from ..models.data_version import DataVersion
+from .event_service import publish
+
+# Extended JSON keeps ObjectId/datetime values round-trippable between environments
+_JSON_OPTIONS = json_util.RELAXED_JSON_OPTIONS
+_DECODER = json.JSONDecoder(object_hook=json_util.object_hook)
+_READ_CHUNK_BYTES = 64 * 1024
+
+# --- Export ---
+
+def _chunks(cursor, size):
+    chunk = []
+    for doc in cursor:
+        chunk.append(doc)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+def _iter_export_docs(user_id, batch_size):
+    """Yields each task with its subtasks and reminders embedded, one batch of tasks at a time."""
+    for tasks in _chunks(Task.iter_by_user_id(user_id, batch_size), batch_size):
+        task_ids = [task['_id'] for task in tasks]
+        subtasks_by_task = {}
+        for subtask in Subtask.find_by_parent_ids(task_ids):
+            subtasks_by_task.setdefault(subtask['parent_task_id'], []).append(subtask)
+        reminders_by_task = {}
+        for reminder in Reminder.find_by_task_ids(task_ids):
+            reminders_by_task.setdefault(reminder['task_id'], []).append(reminder)
+
+        for task in tasks:
+            task['subtasks'] = subtasks_by_task.get(task['_id'], [])
+            task['reminders'] = reminders_by_task.get(task['_id'], [])
+            yield task
+
+def export_user_tasks(user_id, fmt='ndjson', batch_size=None):
+    """
+    Generator producing the export body.
+    ndjson: one task per line followed by a final {"_summary": {...}} line with throughput.
+    json: a single JSON array of tasks (throughput is logged server-side).
+    """
+    batch_size = batch_size or Config.TASK_EXPORT_BATCH_SIZE
+    started = time.perf_counter()
+    count = 0
+
+    if fmt == 'json':
+        yield '['
+    for doc in _iter_export_docs(user_id, batch_size):
+        line = json_util.dumps(doc, json_options=_JSON_OPTIONS)
+        if fmt == 'json':
+            yield (',' if count else '') + line
+        else:
+            yield line + '\n'
+        count += 1
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        'tasks': count,
+        'elapsed_seconds': round(elapsed, 3),
+        'tasks_per_second': round(count / elapsed, 1) if elapsed > 0 else None
+    }
+    if fmt == 'json':
+        yield ']'
+    else:
+        yield json.dumps({'_summary': summary}) + '\n'
+    print(f"[Export] user_id={user_id} format={fmt} {summary}")
+
+# --- Import ---
+
+def _iter_text(stream):
+    # Incremental decoding: a multibyte character split across two chunks is completed on the next read
+    decoder = codecs.getincrementaldecoder('utf-8')()
+    while True:
+        chunk = stream.read(_READ_CHUNK_BYTES)
+        if not chunk:
+            tail = decoder.decode(b'', final=True)  # Raises UnicodeDecodeError on a truncated character
+            if tail:
+                yield tail
+            return
+        yield decoder.decode(chunk) if isinstance(chunk, bytes) else chunk
+
+def _item_too_large(max_item):
+    return ValueError(f"An element exceeds TASK_IMPORT_MAX_ITEM_BYTES ({max_item}) or is malformed")
+
+def _iter_ndjson(chunks, buffer='', max_item=None):
+    max_item = max_item or Config.TASK_IMPORT_MAX_ITEM_BYTES
+    for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split('\n')
+        for line in lines:
+            if line.strip():
+                yield json_util.loads(line)
+        if len(buffer) > max_item:
+            raise _item_too_large(max_item)
+    if buffer.strip():
+        yield json_util.loads(buffer)
+
+def _iter_json_array(chunks, buffer, max_item=None):
+    """
+    Decodes the elements of a top-level JSON array without holding the whole array in memory.
+    An element that still does not decode once max_item characters are buffered is rejected.
+    """
+    max_item = max_item or Config.TASK_IMPORT_MAX_ITEM_BYTES
+    pos = buffer.index('[') + 1
+    chunks = iter(chunks)
+    while True:
+        # Skip separators between elements
+        while True:
+            while pos < len(buffer) and buffer[pos] in ' \t\r\n,':
+                pos += 1
+            if pos < len(buffer):
+                break
+            more = next(chunks, None)
+            if more is None:
+                raise ValueError('Unexpected end of JSON array')
+            buffer, pos = buffer[pos:] + more, 0
+        if buffer[pos] == ']':
+            return
+        try:
+            doc, end = _DECODER.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            if len(buffer) - pos > max_item:
+                raise _item_too_large(max_item)
+            more = next(chunks, None)
+            if more is None:
+                raise
+            buffer, pos = buffer[pos:] + more, 0
+            continue
+        yield doc
+        buffer, pos = buffer[end:], 0
+
+def iter_import_docs(stream):
+    """Detects the body format (JSON array or NDJSON) from its first character and yields task documents."""
+    chunks = _iter_text(stream)
+    buffer = ''
+    for chunk in chunks:
+        buffer += chunk
+        if buffer.strip():
+            break
+    if buffer.lstrip().startswith('['):
+        return _iter_json_array(chunks, buffer)
+    return _iter_ndjson(chunks, buffer)
+
+def _prepare_task(doc, user_id, task_batch, subtask_batch, reminder_batch):
+    """Re-keys one exported task (and its children) for the importing user."""
+    new_task_id = ObjectId()
+    subtasks = doc.pop('subtasks', None) or []
+    reminders = doc.pop('reminders', None) or []
+    for name, children in (('subtasks', subtasks), ('reminders', reminders)):
+        if not isinstance(children, list) or not all(isinstance(child, dict) for child in children):
+            raise ValueError(f"'{name}' must be a list of objects")
+    doc.pop('_id', None)
+    doc['_id'] = new_task_id
+    doc['user_id'] = user_id
+    task_batch.append(normalize_task_fields(doc))
+
+    for subtask in subtasks:
+        subtask.pop('_id', None)
+        subtask['parent_task_id'] = new_task_id
+        subtask['user_id'] = user_id
+        subtask_batch.append(normalize_task_fields(subtask))
+    for reminder in reminders:
+        reminder.pop('_id', None)
+        reminder['task_id'] = new_task_id
+        reminder['user_id'] = user_id
+        reminder_batch.append(reminder)
+
+def import_user_tasks(user_id, stream, batch_size=None):
+    """
+    Reads an export body from `stream` and writes it in insert_many batches of `batch_size`.
+    Imported tasks get new IDs and are owned by `user_id`.
+    Returns (response_dict, status_code).
+    """
+    try:
+        batch_size = int(batch_size) if batch_size else Config.TASK_IMPORT_BATCH_SIZE
+    except (TypeError, ValueError):
+        return {'error': 'batch_size must be an integer'}, 400
+    batch_size = max(1, min(batch_size, Config.TASK_IMPORT_BATCH_SIZE_MAX))
+
+    user_id = normalize_user_id(user_id)
+    counts = {'tasks': 0, 'subtasks': 0, 'reminders': 0}
+    batches = 0
+    task_batch, subtask_batch, reminder_batch = [], [], []
+    started = time.perf_counter()
+
+    def flush():
+        nonlocal batches, task_batch, subtask_batch, reminder_batch
+        # Tasks first so children never point at a task that failed to insert
+        if task_batch:
+            counts['tasks'] += len(Task.insert_many(task_batch).inserted_ids)
+            DailyStats.apply_contributions(
+                user_id, [c for task in task_batch for c in task_contributions(task)]
+            )
+        if subtask_batch:
+            counts['subtasks'] += len(Subtask.insert_many(subtask_batch).inserted_ids)
+        if reminder_batch:
+            counts['reminders'] += len(Reminder.insert_many(reminder_batch).inserted_ids)
+        if task_batch or subtask_batch:
+            DataVersion.bump(user_id)
+        batches += 1
+        task_batch, subtask_batch, reminder_batch = [], [], []
+
+    def throughput():
+        elapsed = time.perf_counter() - started
+        return {
+            'imported': counts,
+            'batches': batches,
+            'batch_size': batch_size,
+            'elapsed_seconds': round(elapsed, 3),
+            'tasks_per_second': round(counts['tasks'] / elapsed, 1) if elapsed > 0 else None
+        }
+
+    try:
+        for doc in iter_import_docs(stream):
+            if not isinstance(doc, dict):
+                raise ValueError('Each exported item must be a JSON object')
+            if '_summary' in doc:
+                continue
+            _prepare_task(doc, user_id, task_batch, subtask_batch, reminder_batch)
+            if len(task_batch) + len(subtask_batch) + len(reminder_batch) >= batch_size:
+                flush()
+        flush()
+    except ValueError as e:
+        # json.JSONDecodeError is a ValueError; report what was already committed
+        response = throughput()
+        response['error'] = f"Invalid import data: {e}"
+        return response, 400
+    except Exception as e:
+        response = throughput()
+        response['error'] = f"Internal server error: {e}"
+        return response, 500
+    finally:
+        # One event for the whole import (also after a partial failure) instead of one per task
+        if counts['tasks']:
+            publish(user_id, 'tasks.imported', {'count': counts['tasks']})
+
+    response = throughput()
+    response['message'] = 'Import completed successfully'
+    return response, 201
@@ -0,0 +1,129 @@
+import argparse
+import json
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# A stand-in for the Gemini REST API, for exercising the AI client's retries, deadline and circuit
+# breaker (backend/services/ai_client.py) without network access. It answers
+#   POST /<version>/models/<model>:generateContent
+#   POST /<version>/models/<model>:streamGenerateContent?alt=sse
+# with canned text, after an injected latency, and fails a configurable share of requests.
+#
+#   python fake_ai_server.py --port 8089 --latency-ms 200 --error-rate 0.2 --error-status 503
+#   GEMINI_BASE_URL=http://127.0.0.1:8089 GEMINI_API_KEY=fake python run.py
+#
+# Tests start it in-process with FakeAIServer(...).start() and script failures with fail_next().
+
+
+class FakeAIServer:
+    def __init__(self, host='127.0.0.1', port=0, latency_ms=0, error_rate=0.0, error_status=503,
+                 text='Fake AI response.', stream_chunks=3, seed=0):
+        self.latency_ms = latency_ms
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.text = text
+        self.stream_chunks = stream_chunks
+        self.request_count = 0
+        self._scripted = []  # Statuses for the next requests (200 = answer normally)
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def fail_next(self, *statuses):
+        """Scripts the status of the next requests, e.g. fail_next(503, 429) then normal answers."""
+        with self._lock:
+            self._scripted.extend(statuses)
+
+    def _next_status(self):
+        with self._lock:
+            self.request_count += 1
+            if self._scripted:
+                return self._scripted.pop(0)
+            return self.error_status if self._rng.random() < self.error_rate else 200
+
+    def start(self):
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name='fake-ai-server', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._httpd.shutdown()
+        self._httpd.server_close()
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, format, *args):
+                pass  # Keep test output quiet
+
+            def _send_json(self, status, body):
+                payload = json.dumps(body).encode('utf-8')
+                self.send_response(status)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            @staticmethod
+            def _candidate(text):
+                return {'candidates': [{'content': {'role': 'model', 'parts': [{'text': text}]},
+                                        'finishReason': 'STOP', 'index': 0}]}
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get('Content-Length') or 0))
+                status = server._next_status()
+                if server.latency_ms:
+                    time.sleep(server.latency_ms / 1000)
+                if status != 200:
+                    self._send_json(status, {'error': {'code': status, 'message': f"Injected failure ({status})",
+                                                       'status': 'UNAVAILABLE' if status >= 500 else 'RESOURCE_EXHAUSTED'}})
+                    return
+                if ':streamGenerateContent' not in self.path:
+                    self._send_json(200, self._candidate(server.text))
+                    return
+
+                words = server.text.split(' ')
+                size = max(1, -(-len(words) // server.stream_chunks))
+                chunks = [' '.join(words[i:i + size]) + (' ' if i + size < len(words) else '')
+                          for i in range(0, len(words), size)]
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/event-stream')
+                self.send_header('Connection', 'close')
+                self.end_headers()
+                for chunk in chunks:
+                    self.wfile.write(f"data: {json.dumps(self._candidate(chunk))}\r\n\r\n".encode('utf-8'))
+                    self.wfile.flush()
+                self.close_connection = True
+
+        return Handler
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Fake Gemini API with injected latency and errors.')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8089)
+    parser.add_argument('--latency-ms', type=float, default=0)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--error-status', type=int, default=503)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    fake = FakeAIServer(args.host, args.port, args.latency_ms, args.error_rate, args.error_status, seed=args.seed)
+    print(f'Fake AI server listening on {fake.base_url} '
+          f'(latency {args.latency_ms}ms, {args.error_rate:.0%} errors with status {args.error_status})')
+    try:
+        fake._httpd.serve_forever()
+    except KeyboardInterrupt:
+        fake.stop()
@@ -0,0 +1,29 @@
+import os
+import sys
+from dotenv import load_dotenv
+
+# Add the project root to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load environment variables
+load_dotenv()
+
+from backend.config import Config
+
+# Gunicorn settings for the web app:  gunicorn -c gunicorn.conf.py backend.app:app
+#
+# GET /api/events and the streaming AI endpoints hold their request open for minutes. With the
+# default sync worker every open stream would occupy a whole worker process, so a few browser
+# tabs would starve the API. The threaded worker serves each request on its own thread, so a worker
+# needs EVENTS_MAX_STREAMS_PER_WORKER threads for its event streams plus headroom for the API.
+
+bind = os.environ.get('GUNICORN_BIND', '0.0.0.0:8000')
+workers = int(os.environ.get('GUNICORN_WORKERS', 2))
+worker_class = 'gthread'
+threads = int(os.environ.get('GUNICORN_THREADS', Config.EVENTS_MAX_STREAMS_PER_WORKER + 32))
+
+# gthread workers report liveness from their main thread, so this restarts a hung worker
+# without cutting off long-running streams
+timeout = int(os.environ.get('GUNICORN_TIMEOUT', 60))
+graceful_timeout = int(os.environ.get('GUNICORN_GRACEFUL_TIMEOUT', 30))
+keepalive = int(os.environ.get('GUNICORN_KEEPALIVE', 5))
@@ -0,0 +1,56 @@
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Add the parent directory to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load environment variables
+load_dotenv()
+
+from backend.models.indexes import ensure_indexes, verify_indexes, explain_summary, IndexDriftError
+
+
+def print_index_rows(rows):
+    for row in rows:
+        print(f"  {row['collection']:<14} {row['name']:<22} {row['state']}")
+
+
+def print_explain_rows(title, rows):
+    print(title)
+    for row in rows:
+        print(f"  {row['collection']:<10} {row['query']:<30} {row['stages']:<24} "
+              f"docs={row['docs_examined']} keys={row['keys_examined']} returned={row['returned']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Create, verify and report the MongoDB indexes defined in backend/models/indexes.py.')
+    parser.add_argument('command', choices=['create', 'verify', 'report'],
+                        help="create: build missing indexes (fails on drift); verify: exit 1 if anything is missing or drifted; report: show state and query plans")
+    args = parser.parse_args()
+
+    if args.command == 'verify':
+        rows = verify_indexes()
+        print_index_rows(rows)
+        return 0 if all(r['state'] == 'ok' for r in rows) else 1
+
+    if args.command == 'report':
+        print_index_rows(verify_indexes())
+        print_explain_rows('Query plans:', explain_summary())
+        return 0
+
+    before = explain_summary()
+    try:
+        rows = ensure_indexes()
+    except IndexDriftError as e:
+        print(f"ERROR: {e}")
+        return 2
+    print_index_rows(rows)
+    print_explain_rows('Before:', before)
+    print_explain_rows('After:', explain_summary())
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,61 @@
+import os
+import sys
+import argparse
+from dotenv import load_dotenv
+
+# Add the parent directory to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load environment variables
+load_dotenv()
+
+from backend.models.migrations import MIGRATIONS, run_migration, migration_status
+from backend.models.daily_stats import DailyStats
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the resumable, batched data migrations defined in backend/models/migrations.py.')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = subparsers.add_parser('run', help='Run (or resume) a migration')
+    run_parser.add_argument('name', choices=sorted(MIGRATIONS))
+    run_parser.add_argument('--batch-size', type=int, default=1000)
+    run_parser.add_argument('--throttle-ms', type=int, default=0, help='Pause between batches to limit load on mongod')
+    run_parser.add_argument('--restart', action='store_true', help='Discard saved progress and start from the first document')
+
+    rebuild_parser = subparsers.add_parser('rebuild-daily-stats', help='Recompute the task_daily_stats analytics rollup from raw tasks')
+    rebuild_parser.add_argument('--user', help='Only rebuild the rows of this user_id')
+
+    subparsers.add_parser('status', help='Show the progress of every started migration')
+    subparsers.add_parser('list', help='List the available migrations')
+
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for name, migration in sorted(MIGRATIONS.items()):
+            print(f"  {name:<28} {migration['description']}")
+        return 0
+
+    if args.command == 'rebuild-daily-stats':
+        rows = DailyStats.rebuild(args.user)
+        print(f"task_daily_stats rebuilt: {rows} (user, day) row(s)")
+        return 0
+
+    if args.command == 'status':
+        for state in migration_status():
+            done = f"completed {state['completed_at']}" if state.get('completed_at') else 'in progress'
+            print(f"  {state['_id']:<28} {done} scanned={state.get('scanned', {})} modified={state.get('modified', {})}")
+        return 0
+
+    try:
+        state = run_migration(args.name, batch_size=args.batch_size,
+                              throttle_seconds=args.throttle_ms / 1000.0, restart=args.restart)
+    except KeyboardInterrupt:
+        print('Interrupted; progress is saved and the next run will resume.')
+        return 130
+    print(f"[{args.name}] done: scanned={state.get('scanned', {})} modified={state.get('modified', {})}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
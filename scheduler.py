@@ -13,28 +13,96 @@ load_dotenv()
 
 # Import necessary Flask components and services
 from backend.app import app
-from backend.services.reminder_service import check_and_trigger_reminders
+from backend.config import Config
+from backend.services.reminder_service import check_and_trigger_reminders, archive_old_reminders
+from backend.services.scheduler_coordinator import PartitionCoordinator
+from backend.services.reminder_engine import ReminderEngine
+
+# Any number of scheduler processes may run against the same database (e.g. start
+# `python scheduler.py` in several terminals): each leases its share of the reminder
+# partitions and takes over the partitions of an instance that stops or crashes.
+coordinator = PartitionCoordinator()
+
+# Fires reminders from an in-memory timer heap at their trigger time; reminder_job below then
+# only runs every REMINDER_ENGINE_CATCHUP_INTERVAL_SECONDS as a catch-up sweep for backlogs
+# (e.g. after downtime), so an idle system is not polled every minute.
+engine = ReminderEngine(coordinator.held_partitions, fence=coordinator.still_valid) if Config.REMINDER_ENGINE_ENABLED else None
+
+def lease_job():
+    """Renews this instance's partition leases and rebalances them across live instances."""
+    previous = coordinator.held_partitions()
+    held = coordinator.rebalance()
+    if held != previous:
+        print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] --- Scheduler {coordinator.owner}: now holds partitions {held}")
+        if engine is not None:
+            engine.reload()
 
 def reminder_job():
     """The function that runs the reminder check within the Flask application context."""
     with app.app_context():
-        # Get the current time and check for due reminders
-        triggered_count = check_and_trigger_reminders()
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        partitions = coordinator.held_partitions()
+        if not partitions:
+            print(f"[{timestamp}] --- Scheduler: No partitions leased; standing by.")
+            return
+
+        # Get the current time and check for due reminders in the partitions this instance holds
+        stats = check_and_trigger_reminders(partitions=partitions, fence=coordinator.still_valid)
         
         # Log the activity for debugging
-        if triggered_count > 0:
-            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] --- Scheduler: Triggered {triggered_count} reminder(s).")
+        if stats['triggered'] > 0:
+            latencies = [batch['latency_ms'] for batch in stats['batches']]
+            print(f"[{timestamp}] --- Scheduler: Triggered {stats['triggered']} reminder(s) in {len(stats['batches'])} batch(es), "
+                  f"{stats['elapsed_ms']} ms total, max batch {max(latencies)} ms.")
         else:
-            print(f"[{datetime.now().strftime('%Y-%m-%d %H:%M:%S')}] --- Scheduler: No reminders due.")
+            print(f"[{timestamp}] --- Scheduler: No reminders due.")
+        if stats['budget_exhausted']:
+            print(f"[{timestamp}] --- Scheduler: Time budget reached; remaining due reminders carry over to the next run.")
+        if stats['fenced']:
+            print(f"[{timestamp}] --- Scheduler: Lost a partition lease mid-run; stopped writing until the next rebalance.")
+        if engine is not None:
+            print(f"[{timestamp}] --- Scheduler: Timer engine trigger lag {engine.lag_stats()}")
+
+def archive_job():
+    """Moves reminders past their retention window to reminders_archive (partitions held by this instance only)."""
+    with app.app_context():
+        partitions = coordinator.held_partitions()
+        if not partitions:
+            return
+        stats = archive_old_reminders(partitions=partitions, fence=coordinator.still_valid)
+        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+        if any(stats['archived'].values()):
+            print(f"[{timestamp}] --- Scheduler: Archived {stats['archived']} reminder(s) in {stats['batches']} batch(es), "
+                  f"{stats['elapsed_ms']} ms.")
+        if stats['fenced']:
+            print(f"[{timestamp}] --- Scheduler: Lost a partition lease during archival; stopped until the next run.")
 
 
 if __name__ == '__main__':
     # Initialize the scheduler
     scheduler = BackgroundScheduler()
+
+    # Take partition leases before the first reminder check, then keep them renewed
+    lease_job()
+    if engine is not None:
+        engine.start()
+    scheduler.add_job(lease_job, 'interval', seconds=Config.SCHEDULER_LEASE_RENEW_SECONDS, id='lease_renewal',
+                      max_instances=1, coalesce=True)
     
     # Schedule reminder_job to run every 60 seconds (1 minute)
     # This is the heartbeat of your Context-Aware Reminders system.
-    scheduler.add_job(reminder_job, 'interval', seconds=60, id='reminder_check')
+    # max_instances/coalesce ensure a slow run is never overlapped by the next tick.
+    # With the timer engine it is only a catch-up sweep and runs far less often.
+    check_interval = Config.REMINDER_ENGINE_CATCHUP_INTERVAL_SECONDS if engine is not None else Config.REMINDER_CHECK_INTERVAL_SECONDS
+    if engine is not None:
+        reminder_job()  # Catch up on anything that came due while no scheduler was running
+    if check_interval > 0:
+        scheduler.add_job(reminder_job, 'interval', seconds=check_interval, id='reminder_check',
+                          max_instances=1, coalesce=True)
+
+    # Retention: keeps db.reminders down to the active working set
+    scheduler.add_job(archive_job, 'interval', seconds=Config.REMINDER_ARCHIVE_INTERVAL_SECONDS, id='reminder_archive',
+                      max_instances=1, coalesce=True)
     
     print('Starting Reminder Scheduler...')
     scheduler.start()
@@ -46,4 +114,8 @@ if __name__ == '__main__':
     except (KeyboardInterrupt, SystemExit):
         # Shut down the scheduler cleanly when interrupted
         scheduler.shutdown()
+        if engine is not None:
+            engine.stop()
+        # Hand our partitions over right away instead of waiting for the leases to expire
+        coordinator.shutdown()
         print('Scheduler stopped.')
\ No newline at end of file
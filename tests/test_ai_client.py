@@ -0,0 +1,208 @@
+import json
+import os
+import sys
+import time
+import unittest
+import urllib.error
+import urllib.request
+
+# Add the project root to the path to import backend modules and the fake server
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from fake_ai_server import FakeAIServer
+from backend.services.ai_client import ResilientAIClient, AIUnavailableError
+
+
+class _Response:
+    def __init__(self, text):
+        self.text = text
+
+
+class _HTTPModels:
+    """Minimal Gemini-shaped client over urllib: HTTP errors carry .code, and streams are lazy like the SDK's."""
+
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def _post(self, model, method, contents):
+        url = f"{self.base_url}/v1beta/models/{model}:{method}"
+        body = json.dumps({'contents': [{'parts': [{'text': contents}]}]}).encode('utf-8')
+        request = urllib.request.Request(url, data=body, headers={'Content-Type': 'application/json'})
+        try:
+            return urllib.request.urlopen(request, timeout=5)
+        except urllib.error.HTTPError:
+            raise
+        except urllib.error.URLError as e:
+            # Surface connection failures the way the SDKs do (e.g. httpx.ConnectError)
+            raise e.reason if isinstance(e.reason, OSError) else e
+
+    @staticmethod
+    def _text(payload):
+        return payload['candidates'][0]['content']['parts'][0]['text']
+
+    def generate_content(self, model, contents, config=None):
+        with self._post(model, 'generateContent', contents) as response:
+            return _Response(self._text(json.loads(response.read())))
+
+    def generate_content_stream(self, model, contents, config=None):
+        with self._post(model, 'streamGenerateContent?alt=sse', contents) as response:
+            for line in response:
+                line = line.decode('utf-8').strip()
+                if line.startswith('data: '):
+                    yield _Response(self._text(json.loads(line[len('data: '):])))
+
+
+class _HTTPClient:
+    def __init__(self, base_url):
+        self.models = _HTTPModels(base_url)
+
+
+class ResilientAIClientTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAIServer(text='one two three four five six').start()
+        self.delays = []
+
+    def tearDown(self):
+        self.server.stop()
+
+    def make_client(self, **overrides):
+        options = dict(rate_per_second=100, burst=100, rate_wait_seconds=1, max_retries=3,
+                       retry_base_seconds=0.1, retry_max_seconds=1, deadline_seconds=10,
+                       breaker_threshold=5, breaker_reset_seconds=30, sleep=self.delays.append)
+        options.update(overrides)
+        return ResilientAIClient(_HTTPClient(self.server.base_url), **options)
+
+    def generate(self, client):
+        return client.models.generate_content(model='fake-model', contents='Summarize this').text
+
+    def test_retries_429_and_5xx_with_jittered_exponential_backoff(self):
+        client = self.make_client()
+        self.server.fail_next(503, 429)
+
+        self.assertEqual(self.generate(client), 'one two three four five six')
+        self.assertEqual(self.server.request_count, 3)
+        self.assertEqual(len(self.delays), 2)
+        self.assertTrue(0 <= self.delays[0] <= 0.1)
+        self.assertTrue(0 <= self.delays[1] <= 0.2)
+        stats = client.stats()
+        self.assertEqual((stats['retries'], stats['successes']), (2, 1))
+        self.assertEqual(stats['breaker']['state'], 'closed')
+
+    def test_client_errors_are_not_retried(self):
+        client = self.make_client()
+        self.server.fail_next(400)
+
+        with self.assertRaises(urllib.error.HTTPError):
+            self.generate(client)
+        self.assertEqual(self.server.request_count, 1)
+        self.assertEqual(client.stats()['breaker']['consecutiveFailures'], 0)
+
+    def test_gives_up_after_max_retries(self):
+        client = self.make_client(max_retries=2)
+        self.server.fail_next(503, 503, 503, 503)
+
+        with self.assertRaises(urllib.error.HTTPError):
+            self.generate(client)
+        self.assertEqual(self.server.request_count, 3)
+
+    def test_deadline_bounds_the_retries(self):
+        self.server.latency_ms = 100
+        self.server.error_rate = 1.0
+        client = self.make_client(max_retries=50, retry_base_seconds=0.05, retry_max_seconds=0.05,
+                                  deadline_seconds=0.5, sleep=time.sleep)
+
+        started = time.monotonic()
+        with self.assertRaises(urllib.error.HTTPError):
+            self.generate(client)
+        self.assertLess(time.monotonic() - started, 0.5 + 0.2)
+        self.assertEqual(client.stats()['deadlineExceeded'], 1)
+        self.assertLess(self.server.request_count, 10)
+
+    def test_breaker_opens_fails_fast_then_half_open_probe_closes_it(self):
+        client = self.make_client(max_retries=0, breaker_threshold=2, breaker_reset_seconds=0.2)
+        self.server.fail_next(503, 503)
+        for _ in range(2):
+            with self.assertRaises(urllib.error.HTTPError):
+                self.generate(client)
+        self.assertEqual(client.stats()['breaker']['state'], 'open')
+
+        with self.assertRaises(AIUnavailableError):
+            self.generate(client)
+        self.assertEqual(self.server.request_count, 2)  # Rejected without calling upstream
+
+        time.sleep(0.25)
+        self.assertEqual(self.generate(client), 'one two three four five six')
+        self.assertEqual(client.stats()['breaker']['state'], 'closed')
+
+    def test_failed_half_open_probe_reopens_the_breaker(self):
+        client = self.make_client(max_retries=0, breaker_threshold=1, breaker_reset_seconds=0.2)
+        self.server.fail_next(503, 503)
+        with self.assertRaises(urllib.error.HTTPError):
+            self.generate(client)
+        time.sleep(0.25)
+        with self.assertRaises(urllib.error.HTTPError):
+            self.generate(client)
+        self.assertEqual(client.stats()['breaker']['state'], 'open')
+
+    def test_rate_limited_call_does_not_leave_the_probe_stuck(self):
+        client = self.make_client(max_retries=0, breaker_threshold=1, breaker_reset_seconds=0.1,
+                                  rate_per_second=5, burst=1, rate_wait_seconds=0)
+        self.server.fail_next(503)
+        with self.assertRaises(urllib.error.HTTPError):
+            self.generate(client)
+        time.sleep(0.25)
+        self.assertTrue(client.bucket.acquire(0))  # Drain the bucket just as the breaker turns half-open
+
+        with self.assertRaises(AIUnavailableError):
+            self.generate(client)
+        time.sleep(0.25)
+        self.assertEqual(self.generate(client), 'one two three four five six')
+        self.assertEqual(client.stats()['breaker']['state'], 'closed')
+
+    def test_stream_open_failures_are_retried_before_the_first_chunk(self):
+        client = self.make_client()
+        self.server.fail_next(503)
+
+        chunks = [c.text for c in client.models.generate_content_stream(model='fake-model', contents='Hi')]
+        self.assertEqual(''.join(chunks), 'one two three four five six')
+        self.assertGreater(len(chunks), 1)
+        self.assertEqual(client.stats()['retries'], 1)
+
+    def test_connection_errors_are_retried(self):
+        client = self.make_client(max_retries=1)
+        client.raw = _HTTPClient('http://127.0.0.1:9')  # Nothing listens on the discard port
+
+        with self.assertRaises(ConnectionError):
+            self.generate(client)
+        self.assertEqual(client.stats()['retries'], 1)
+        self.assertEqual(client.stats()['breaker']['consecutiveFailures'], 2)
+
+
+try:
+    from google import genai
+    from google.genai import types
+except ImportError:
+    genai = None
+
+
+@unittest.skipIf(genai is None, 'google-genai is not installed')
+class GeminiSDKAgainstFakeServerTest(unittest.TestCase):
+    """The real SDK pointed at the fake server through GEMINI_BASE_URL-style http options."""
+
+    def setUp(self):
+        self.server = FakeAIServer(text='Fake summary.').start()
+        raw = genai.Client(api_key='fake-key', http_options=types.HttpOptions(base_url=self.server.base_url))
+        self.client = ResilientAIClient(raw, max_retries=2, retry_base_seconds=0.01, sleep=lambda s: None)
+
+    def tearDown(self):
+        self.server.stop()
+
+    def test_sdk_errors_are_retried(self):
+        self.server.fail_next(503)
+        response = self.client.models.generate_content(model='gemini-2.5-flash', contents='Summarize')
+        self.assertEqual(response.text, 'Fake summary.')
+        self.assertEqual(self.client.stats()['retries'], 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,176 @@
+import os
+import sys
+import threading
+import time
+import unittest
+from unittest import mock
+
+# Add the project root to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models.ai_cache import AICacheEntry
+from backend.services.cache_service import TTLCache
+from backend.services.ai_cache_service import AIResponseCache, cache_key
+
+
+class TTLCacheTest(unittest.TestCase):
+    def test_hits_misses_and_stats(self):
+        cache = TTLCache(max_entries=4, ttl_seconds=60)
+        cache.set('a', 1)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.get('b', 'default'), 'default')
+        stats = cache.stats()
+        self.assertEqual((stats['entries'], stats['hits'], stats['misses']), (1, 1, 2))
+        self.assertEqual(stats['hitRatio'], 0.333)
+
+    def test_expired_entries_are_dropped_on_read(self):
+        cache = TTLCache(max_entries=4, ttl_seconds=60)
+        cache.set('a', 1, ttl_seconds=-1)
+        cache.set('b', 2, ttl_seconds=0.05)
+        time.sleep(0.1)
+
+        self.assertIsNone(cache.get('a'))
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['expirations'], 2)
+        self.assertEqual(cache.stats()['entries'], 0)
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')  # 'b' is now the least recently used
+        cache.set('c', 3)
+
+        self.assertEqual((cache.get('a'), cache.get('b'), cache.get('c')), (1, None, 3))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_overwriting_refreshes_the_value(self):
+        cache = TTLCache(max_entries=2, ttl_seconds=60)
+        cache.set('a', 1)
+        cache.set('a', 2)
+        self.assertEqual(cache.get('a'), 2)
+        self.assertEqual(cache.stats()['entries'], 1)
+
+
+class AIResponseCacheTest(unittest.TestCase):
+    """The shared ai_cache collection is replaced by a dict so the tests run without MongoDB."""
+
+    def setUp(self):
+        self.store = {}
+        patches = [
+            mock.patch.object(AICacheEntry, 'get', side_effect=lambda key: self.store.get(key)),
+            mock.patch.object(AICacheEntry, 'put', side_effect=self._put),
+        ]
+        for patch in patches:
+            patch.start()
+            self.addCleanup(patch.stop)
+        self.cache = AIResponseCache(max_entries=16, memory_ttl_seconds=60, store_ttl_seconds=60, enabled=True)
+        self.calls = 0
+        self.calls_lock = threading.Lock()
+
+    def _put(self, key, kind, model, value, compute_ms, ttl_seconds):
+        self.store[key] = {'value': value, 'compute_ms': compute_ms}
+
+    def compute(self, value='summary', delay=0.0, error=None):
+        def run():
+            with self.calls_lock:
+                self.calls += 1
+            time.sleep(delay)
+            if error is not None:
+                raise error
+            return value
+        return run
+
+    def lookup(self, text='Write the report', compute=None, **kwargs):
+        return self.cache.get_or_compute('summary', 'v1', 'model', text, compute or self.compute(), **kwargs)
+
+    def test_key_ignores_whitespace_but_not_template_or_model(self):
+        key = cache_key('summary', 'v1', 'model', 'Write  the\nreport ')
+        self.assertEqual(key, cache_key('summary', 'v1', 'model', 'Write the report'))
+        self.assertNotEqual(key, cache_key('summary', 'v2', 'model', 'Write the report'))
+        self.assertNotEqual(key, cache_key('summary', 'v1', 'other-model', 'Write the report'))
+
+    def test_second_request_is_served_from_memory(self):
+        self.assertEqual(self.lookup(), 'summary')
+        self.assertEqual(self.lookup(text='Write   the report'), 'summary')
+
+        self.assertEqual(self.calls, 1)
+        stats = self.cache.stats()
+        self.assertEqual((stats['upstreamCalls'], stats['memoryHits'], stats['storeHits']), (1, 1, 0))
+
+    def test_shared_store_serves_other_workers(self):
+        self.lookup()
+        other_worker = AIResponseCache(max_entries=16, memory_ttl_seconds=60, store_ttl_seconds=60, enabled=True)
+
+        value = other_worker.get_or_compute('summary', 'v1', 'model', 'Write the report', self.compute('fresh'))
+        self.assertEqual(value, 'summary')
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(other_worker.stats()['storeHits'], 1)
+
+    def test_concurrent_identical_requests_share_one_upstream_call(self):
+        results = []
+        release = threading.Event()
+
+        def blocked():
+            release.wait(5)
+            return self.compute('shared')()
+
+        threads = [threading.Thread(target=lambda: results.append(self.lookup(compute=blocked))) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while self.cache.stats()['requests'] < len(threads) and time.monotonic() < deadline:
+            time.sleep(0.01)
+        time.sleep(0.1)  # Let the followers reach the in-flight wait
+        release.set()
+        for thread in threads:
+            thread.join(5)
+
+        self.assertEqual(results, ['shared'] * len(threads))
+        self.assertEqual(self.calls, 1)
+        self.assertEqual(self.cache.stats()['sharedInFlight'], len(threads) - 1)
+
+    def test_followers_call_upstream_themselves_when_the_leader_fails(self):
+        results, errors = [], []
+        leader_started = threading.Event()
+
+        def failing():
+            leader_started.set()
+            return self.compute(delay=0.2, error=RuntimeError('upstream down'))()
+
+        def leader():
+            try:
+                self.lookup(compute=failing)
+            except RuntimeError as e:
+                errors.append(e)
+
+        thread = threading.Thread(target=leader)
+        thread.start()
+        leader_started.wait(5)
+        results.append(self.lookup(compute=self.compute('recovered')))
+        thread.join(5)
+
+        self.assertEqual(len(errors), 1)
+        self.assertEqual(results, ['recovered'])
+        self.assertEqual(self.calls, 2)
+
+    def test_uncacheable_values_are_recomputed(self):
+        not_error = lambda value: not value.startswith('Error:')
+        self.assertEqual(self.lookup(compute=self.compute('Error: quota'), cacheable=not_error), 'Error: quota')
+        self.assertEqual(self.lookup(compute=self.compute('summary'), cacheable=not_error), 'summary')
+
+        self.assertEqual(self.calls, 2)
+        self.assertEqual([entry['value'] for entry in self.store.values()], ['summary'])
+
+    def test_disabled_cache_always_computes(self):
+        self.cache = AIResponseCache(enabled=False)
+        self.lookup()
+        self.lookup()
+        self.assertEqual(self.calls, 2)
+        self.assertEqual(self.store, {})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,79 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+
+# Add the project root to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.models.normalize import parse_due_date, format_due_date, due_of, effective_due, DEFAULT_DUE_HOUR
+
+
+def _local(aware):
+    return aware.astimezone().replace(tzinfo=None)
+
+
+class ParseDueDateTest(unittest.TestCase):
+    def test_date_only_is_midnight_without_time(self):
+        self.assertEqual(parse_due_date('2024-05-01'), (datetime(2024, 5, 1), False))
+
+    def test_date_time_has_time(self):
+        self.assertEqual(parse_due_date('2024-05-01T09:30'), (datetime(2024, 5, 1, 9, 30), True))
+        self.assertEqual(parse_due_date(' 2024-05-01T09:30:15 '), (datetime(2024, 5, 1, 9, 30, 15), True))
+
+    def test_offsets_and_z_become_naive_local_time(self):
+        expected = _local(datetime(2024, 5, 1, 7, 30, tzinfo=timezone.utc))
+        for text in ('2024-05-01T07:30Z', '2024-05-01T07:30:00+00:00', '2024-05-01T09:30+02:00'):
+            with self.subTest(text=text):
+                self.assertEqual(parse_due_date(text), (expected, True))
+
+    def test_datetime_values(self):
+        self.assertEqual(parse_due_date(datetime(2024, 5, 1)), (datetime(2024, 5, 1), False))
+        self.assertEqual(parse_due_date(datetime(2024, 5, 1, 9, 30)), (datetime(2024, 5, 1, 9, 30), True))
+        aware = datetime(2024, 5, 1, 9, 30, tzinfo=timezone(timedelta(hours=2)))
+        self.assertEqual(parse_due_date(aware)[0], _local(aware))
+
+    def test_empty_values(self):
+        self.assertEqual(parse_due_date(None), (None, False))
+        self.assertEqual(parse_due_date(''), (None, False))
+
+    def test_invalid_values_raise_value_error(self):
+        for value in ('tomorrow', '2024-13-01', '2024-05-01T25:00', '01/05/2024'):
+            with self.subTest(value=value):
+                with self.assertRaises(ValueError):
+                    parse_due_date(value)
+
+
+class FormatDueDateTest(unittest.TestCase):
+    def test_formats_by_has_time(self):
+        self.assertEqual(format_due_date(datetime(2024, 5, 1, 9, 30), True), '2024-05-01T09:30')
+        self.assertEqual(format_due_date(datetime(2024, 5, 1), False), '2024-05-01')
+
+    def test_round_trips_the_api_formats(self):
+        for text in ('2024-05-01', '2024-05-01T09:30'):
+            with self.subTest(text=text):
+                self.assertEqual(format_due_date(*parse_due_date(text)), text)
+
+    def test_legacy_values_pass_through(self):
+        self.assertEqual(format_due_date('N/A'), 'N/A')
+        self.assertIsNone(format_due_date(None))
+
+
+class EffectiveDueTest(unittest.TestCase):
+    def test_stored_flag_wins_over_the_parsed_one(self):
+        self.assertEqual(due_of({'due_date': datetime(2024, 5, 1, 9, 30), 'due_has_time': False}),
+                         (datetime(2024, 5, 1, 9, 30), False))
+        self.assertEqual(due_of({'due_date': '2024-05-01T09:30'}), (datetime(2024, 5, 1, 9, 30), True))
+
+    def test_unusable_due_dates(self):
+        for task in ({}, {'due_date': None}, {'due_date': 'N/A'}):
+            with self.subTest(task=task):
+                self.assertEqual(due_of(task), (None, False))
+
+    def test_date_only_deadline_is_the_default_hour(self):
+        self.assertEqual(effective_due(datetime(2024, 5, 1), False), datetime(2024, 5, 1, DEFAULT_DUE_HOUR))
+        self.assertEqual(effective_due(datetime(2024, 5, 1, 9, 30), True), datetime(2024, 5, 1, 9, 30))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,117 @@
+import json
+import math
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+# Add the project root to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from backend.services import priority_ranking_service as ranking
+from backend.services.priority_ranking_service import score_columns, rank_tasks, compact_prompt_json, ranking_markdown
+
+NOW = datetime(2024, 5, 10, 12, 0)
+
+
+def _due(hours):
+    return (NOW + timedelta(hours=hours)).strftime('%Y-%m-%dT%H:%M')
+
+
+class ScoreColumnsTest(unittest.TestCase):
+    columns = (
+        [math.nan, -500.0, -2.0, 0.0, 3.0, 48.0, 24 * 30],        # hours until due
+        [1.0, 0.6, 0.3, 0.5, 1.0, 0.6, 0.3],                      # priority level
+        [0.0, 40.0, 3.0, 0.5, 14.0, 0.0, 100.0],                  # age in days
+        [math.nan, 0.5, 1.0, 0.0, math.nan, 0.25, math.nan],      # subtask progress
+    )
+
+    def pure_python(self):
+        with mock.patch.object(ranking, 'np', None):
+            return score_columns(*self.columns)
+
+    @unittest.skipIf(ranking.np is None, 'numpy is not installed')
+    def test_numpy_and_pure_python_paths_agree(self):
+        vectorized = score_columns(*self.columns)
+        self.assertEqual(len(vectorized), len(self.columns[0]))
+        for expected, actual in zip(self.pure_python(), vectorized):
+            self.assertAlmostEqual(expected, actual, places=12)
+
+    def test_urgency_rises_towards_the_deadline_and_past_it(self):
+        with mock.patch.object(ranking, 'np', None):
+            score = lambda hours: score_columns([hours], [0.5], [0.0], [math.nan])[0]
+            self.assertGreater(score(-24.0), score(0.0))
+            self.assertGreater(score(0.0), score(24.0))
+            self.assertGreater(score(24.0), score(math.nan))
+            # Overdue urgency stops growing after OVERDUE_CAP_HOURS
+            self.assertAlmostEqual(score(-ranking.OVERDUE_CAP_HOURS), score(-10 * ranking.OVERDUE_CAP_HOURS))
+
+    def test_unknown_values_never_produce_nan(self):
+        self.assertFalse(any(math.isnan(score) for score in self.pure_python()))
+        self.assertFalse(any(math.isnan(score) for score in score_columns(*self.columns)))
+
+    def test_empty_columns(self):
+        self.assertEqual(score_columns([], [], [], []), [])
+        with mock.patch.object(ranking, 'np', None):
+            self.assertEqual(score_columns([], [], [], []), [])
+
+
+class RankTasksTest(unittest.TestCase):
+    def setUp(self):
+        self.tasks = [
+            {'id': 't-nodue', 'title': 'Someday', 'priority': 'Medium', 'due_date': 'N/A'},
+            {'id': 't-week', 'title': 'Next week', 'priority': 'Medium', 'due_date': _due(24 * 7)},
+            {'id': 't-overdue', 'title': 'Late', 'priority': 'Medium', 'due_date': _due(-30)},
+            {'id': 't-soon', 'title': 'Soon', 'priority': 'Medium', 'due_date': _due(2)},
+        ]
+
+    def test_most_pressing_first_with_sequential_ranks(self):
+        ranked = rank_tasks(self.tasks, now=NOW)
+
+        self.assertEqual([item['id'] for item in ranked], ['t-overdue', 't-soon', 't-week', 't-nodue'])
+        self.assertEqual([item['rank'] for item in ranked], [1, 2, 3, 4])
+        self.assertIsNone(ranked[-1]['due_date'])
+        self.assertEqual(ranked[0]['justification'], 'Overdue by 1 day; Medium priority.')
+
+    def test_priority_orders_tasks_due_at_the_same_time(self):
+        tasks = [{'id': level, 'title': level, 'priority': level, 'due_date': _due(48)} for level in ('Low', 'High', 'Medium')]
+        self.assertEqual([item['id'] for item in rank_tasks(tasks, now=NOW)], ['High', 'Medium', 'Low'])
+
+    def test_both_paths_produce_the_same_ranking(self):
+        with mock.patch.object(ranking, 'np', None):
+            pure = rank_tasks(self.tasks, now=NOW)
+        self.assertEqual([(i['id'], i['score']) for i in rank_tasks(self.tasks, now=NOW)],
+                         [(i['id'], i['score']) for i in pure])
+
+    def test_ties_keep_input_order(self):
+        tasks = [{'id': f"t{i}", 'title': f"Task {i}", 'priority': 'Medium'} for i in range(5)]
+        self.assertEqual([item['id'] for item in rank_tasks(tasks, now=NOW)], [f"t{i}" for i in range(5)])
+
+    def test_naive_and_aware_created_at_are_accepted(self):
+        tasks = [
+            {'id': 'naive', 'title': 'A', 'created_at': '2024-04-01T09:00:00'},
+            {'id': 'offset', 'title': 'B', 'created_at': '2024-04-01T09:00:00+02:00'},
+            {'id': 'zulu', 'title': 'C', 'created_at': '2024-04-01T09:00:00Z'},
+            {'id': 'bad', 'title': 'D', 'created_at': 'yesterday'},
+        ]
+        ranked = {item['id']: item for item in rank_tasks(tasks, now=NOW)}
+        self.assertIn('open for 39 days', ranked['naive']['justification'])
+        self.assertIn('open for', ranked['zulu']['justification'])
+        self.assertNotIn('open for', ranked['bad']['justification'])
+
+    def test_compact_prompt_keeps_only_the_top_k(self):
+        ranked = rank_tasks(self.tasks, now=NOW)
+        items = json.loads(compact_prompt_json(ranked, k=2))
+
+        self.assertEqual([item['title'] for item in items], ['Late', 'Soon'])
+        self.assertEqual(compact_prompt_json(ranked, k=2), json.dumps(items, separators=(',', ':'), ensure_ascii=False))
+        self.assertNotIn('desc', items[0])  # Empty fields are left out
+
+    def test_markdown_escapes_table_cells(self):
+        ranked = rank_tasks([{'id': 'x', 'title': 'A | B\nC', 'priority': 'Low'}], now=NOW)
+        self.assertIn('| 1 | A \\| B C |', ranking_markdown(ranked))
+
+
+if __name__ == '__main__':
+    unittest.main()
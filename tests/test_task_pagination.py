@@ -0,0 +1,95 @@
+import os
+import sys
+import unittest
+from datetime import datetime, timedelta
+
+# Add the project root to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson.objectid import ObjectId
+from pymongo import ASCENDING, DESCENDING
+from backend.models.task import _keyset_after
+from backend.services.task_service import _encode_cursor, _decode_cursor
+
+
+def _matches(doc, query):
+    """Evaluates the subset of the Mongo query language _keyset_after produces (null matches missing)."""
+    for key, condition in query.items():
+        if key == '$or':
+            if not any(_matches(doc, q) for q in condition):
+                return False
+        elif key == '$and':
+            if not all(_matches(doc, q) for q in condition):
+                return False
+        elif isinstance(condition, dict):
+            value = doc.get(key)
+            for op, operand in condition.items():
+                if op == '$ne':
+                    ok = value != operand
+                elif value is None or operand is None:
+                    ok = False  # $gt/$lt never match across null
+                elif op == '$gt':
+                    ok = value > operand
+                elif op == '$lt':
+                    ok = value < operand
+                else:
+                    raise AssertionError(f"Unsupported operator {op}")
+                if not ok:
+                    return False
+        elif doc.get(key) != condition:
+            return False
+    return True
+
+
+def _mongo_sorted(docs, field, direction):
+    """Sorts like Mongo: null/missing before every value ascending, after every value descending."""
+    ordered = sorted(docs, key=lambda d: (d.get(field) is not None, d.get(field) or 0, d['_id']))
+    return ordered if direction == ASCENDING else ordered[::-1]
+
+
+class KeysetPaginationTest(unittest.TestCase):
+    def setUp(self):
+        base = datetime(2024, 5, 1, 9, 0)
+        due_dates = [None, base, base + timedelta(days=1), None, base, base + timedelta(days=2), None, base]
+        self.docs = [{'_id': ObjectId(), 'due_date': due} for due in due_dates]
+
+    def page_through(self, field, direction, limit):
+        """Follows _keyset_after page by page and returns the _ids in the order they were served."""
+        served, after = [], None
+        while True:
+            candidates = [d for d in self.docs if after is None or _matches(d, _keyset_after(field, direction, *after))]
+            page = _mongo_sorted(candidates, field, direction)[:limit]
+            if not page:
+                return served
+            served += [d['_id'] for d in page]
+            after = _decode_cursor(_encode_cursor(page[-1], field))
+
+    def test_every_page_size_serves_each_task_once_in_sort_order(self):
+        for direction in (ASCENDING, DESCENDING):
+            expected = [d['_id'] for d in _mongo_sorted(self.docs, 'due_date', direction)]
+            for limit in (1, 2, 3, len(self.docs)):
+                with self.subTest(direction=direction, limit=limit):
+                    self.assertEqual(self.page_through('due_date', direction, limit), expected)
+
+    def test_null_sort_value_only_continues_into_later_rows(self):
+        last = {'_id': ObjectId(), 'due_date': None}
+        ascending = _keyset_after('due_date', ASCENDING, None, last['_id'])
+        descending = _keyset_after('due_date', DESCENDING, None, last['_id'])
+
+        self.assertTrue(_matches({'_id': ObjectId(), 'due_date': datetime(2024, 1, 1)}, ascending))
+        self.assertFalse(_matches({'_id': ObjectId(), 'due_date': datetime(2024, 1, 1)}, descending))
+        self.assertFalse(_matches(last, ascending))
+        self.assertFalse(_matches(last, descending))
+
+    def test_cursor_round_trips_dates_nulls_and_ids(self):
+        for task in ({'_id': ObjectId(), 'due_date': datetime(2024, 5, 1, 9, 30)}, {'_id': ObjectId()}):
+            with self.subTest(task=task):
+                self.assertEqual(_decode_cursor(_encode_cursor(task, 'due_date')), (task.get('due_date'), task['_id']))
+
+    def test_cursor_is_url_safe(self):
+        cursor = _encode_cursor({'_id': ObjectId(), 'created_at': datetime(2024, 5, 1, 9, 30, 15)}, 'created_at')
+        self.assertRegex(cursor, r'^[A-Za-z0-9_=-]+$')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,116 @@
+import io
+import json
+import os
+import sys
+import unittest
+from datetime import datetime
+from unittest import mock
+
+# Add the project root to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bson import json_util
+from bson.objectid import ObjectId
+from backend.services import transfer_service
+from backend.services.transfer_service import _iter_json_array, _iter_ndjson, _prepare_task, iter_import_docs
+
+
+def _split(text, size):
+    return [text[i:i + size] for i in range(0, len(text), size)]
+
+
+class ImportParsingTest(unittest.TestCase):
+    def setUp(self):
+        self.docs = [
+            {'_id': ObjectId(), 'title': 'Write report', 'due_date': datetime(2024, 5, 1, 9, 30),
+             'subtasks': [{'title': 'Outline'}, {'title': 'Draft'}]},
+            {'_id': ObjectId(), 'title': 'Pay bills, then relax ]', 'tags': ['home']},
+            {'_id': ObjectId(), 'title': 'Café ☕ planning', 'description': 'Größe 日本'},
+        ]
+        self.array_text = '[' + ',\n'.join(json_util.dumps(d) for d in self.docs) + ']'
+        self.ndjson_text = '\n'.join(json_util.dumps(d) for d in self.docs) + '\n'
+
+    def test_json_array_elements_survive_any_chunk_boundary(self):
+        for size in (1, 2, 7, 64, len(self.array_text)):
+            with self.subTest(size=size):
+                chunks = _split(self.array_text, size)
+                self.assertEqual(list(_iter_json_array(chunks[1:], chunks[0])), self.docs)
+
+    def test_ndjson_lines_survive_any_chunk_boundary(self):
+        for size in (1, 3, 64, len(self.ndjson_text)):
+            with self.subTest(size=size):
+                self.assertEqual(list(_iter_ndjson(_split(self.ndjson_text, size))), self.docs)
+
+    def test_ndjson_without_trailing_newline(self):
+        self.assertEqual(list(_iter_ndjson([self.ndjson_text.rstrip('\n')])), self.docs)
+
+    def test_multibyte_characters_split_across_reads(self):
+        for body in (self.array_text, self.ndjson_text):
+            with self.subTest(format='array' if body.startswith('[') else 'ndjson'):
+                with mock.patch.object(transfer_service, '_READ_CHUNK_BYTES', 1):
+                    self.assertEqual(list(iter_import_docs(io.BytesIO(body.encode('utf-8')))), self.docs)
+
+    def test_truncated_multibyte_character_is_rejected(self):
+        body = self.ndjson_text.encode('utf-8') + 'é'.encode('utf-8')[:1]
+        with self.assertRaises(UnicodeDecodeError):
+            list(iter_import_docs(io.BytesIO(body)))
+
+    def test_malformed_element_raises_value_error(self):
+        text = '[' + json_util.dumps(self.docs[0]) + ', {"title": oops}, ' + json_util.dumps(self.docs[1]) + ']'
+        chunks = _split(text, 16)
+        parsed = _iter_json_array(chunks[1:], chunks[0])
+        self.assertEqual(next(parsed), self.docs[0])
+        with self.assertRaises(ValueError):
+            next(parsed)
+
+    def test_malformed_element_stops_buffering_at_the_item_cap(self):
+        consumed = []
+
+        def chunks():
+            yield '{"title": oops, "padding": "'
+            for i in range(10000):
+                consumed.append(i)
+                yield 'x' * 100
+
+        with self.assertRaisesRegex(ValueError, 'TASK_IMPORT_MAX_ITEM_BYTES'):
+            list(_iter_json_array(chunks(), '[', max_item=1000))
+        self.assertLess(len(consumed), 20)
+
+    def test_overlong_ndjson_line_stops_buffering_at_the_item_cap(self):
+        consumed = []
+
+        def chunks():
+            for i in range(10000):
+                consumed.append(i)
+                yield 'x' * 100
+
+        with self.assertRaisesRegex(ValueError, 'TASK_IMPORT_MAX_ITEM_BYTES'):
+            list(_iter_ndjson(chunks(), max_item=1000))
+        self.assertLess(len(consumed), 20)
+
+    def test_unterminated_array_raises_value_error(self):
+        with self.assertRaises(ValueError):
+            list(_iter_json_array([json.dumps({'title': 'a'}) + ','], '['))
+
+    def test_empty_array(self):
+        self.assertEqual(list(_iter_json_array([' ]'], '[')), [])
+
+    def test_children_must_be_lists_of_objects(self):
+        for field, value in (('subtasks', 'x'), ('subtasks', [1]), ('reminders', {'message': 'hi'})):
+            with self.subTest(field=field, value=value):
+                with self.assertRaises(ValueError):
+                    _prepare_task({'title': 'T', field: value}, 'user-1', [], [], [])
+
+    def test_prepared_children_point_at_the_new_task(self):
+        tasks, subtasks, reminders = [], [], []
+        _prepare_task(dict(self.docs[0], reminders=[{'_id': ObjectId(), 'message': 'm'}]),
+                      'user-1', tasks, subtasks, reminders)
+        new_id = tasks[0]['_id']
+        self.assertNotEqual(new_id, self.docs[0]['_id'])
+        self.assertEqual({s['parent_task_id'] for s in subtasks}, {new_id})
+        self.assertEqual(reminders[0]['task_id'], new_id)
+        self.assertNotIn('_id', reminders[0])
+
+
+if __name__ == '__main__':
+    unittest.main()
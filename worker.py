@@ -0,0 +1,44 @@
+import os
+import sys
+import time
+import threading
+from dotenv import load_dotenv
+
+# Add the parent directory to the path to import backend modules
+sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+
+# Load environment variables
+load_dotenv()
+
+from backend.app import app
+from backend.config import Config
+from backend.services.job_service import JobWorker
+
+# Runs the background AI jobs queued by the web app's async endpoints (?async=true).
+# Start as many `python worker.py` processes as needed; jobs are claimed atomically,
+# so each one runs on exactly one worker thread.
+
+def run_worker_thread(worker):
+    with app.app_context():
+        worker.run_forever()
+
+
+if __name__ == '__main__':
+    workers = [JobWorker() for _ in range(Config.JOB_WORKER_THREADS)]
+    threads = [threading.Thread(target=run_worker_thread, args=(w,), name=f'job-worker-{i}', daemon=True)
+               for i, w in enumerate(workers)]
+    for thread in threads:
+        thread.start()
+    print(f'Starting Job Worker with {len(workers)} thread(s)...')
+
+    # Keep the main thread alive, so the worker threads can run in the background
+    try:
+        while True:
+            time.sleep(2)
+    except (KeyboardInterrupt, SystemExit):
+        for worker in workers:
+            worker.stop()
+        # Let in-flight jobs finish so their results are recorded
+        for thread in threads:
+            thread.join(timeout=Config.JOB_LEASE_SECONDS)
+        print('Job worker stopped.')